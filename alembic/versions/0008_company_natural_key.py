@@ -0,0 +1,72 @@
+"""unique natural key on companies (name, region, source)
+
+Revision ID: 0008_company_natural_key
+Revises: 0007_outbox_approval
+Create Date: 2026-01-21
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0008_company_natural_key"
+down_revision = "0007_outbox_approval"
+branch_labels = None
+depends_on = None
+
+
+def _merge_duplicate_companies(conn: sa.engine.Connection) -> None:
+    rows = conn.execute(
+        sa.text("SELECT id, name, region, source FROM companies ORDER BY id")
+    ).fetchall()
+    keeper_by_key: dict[tuple, int] = {}
+    duplicates: dict[int, int] = {}
+    for company_id, name, region, source in rows:
+        key = (name, region, source)
+        if key in keeper_by_key:
+            duplicates[company_id] = keeper_by_key[key]
+        else:
+            keeper_by_key[key] = company_id
+
+    for dup_id, keeper_id in duplicates.items():
+        contacts = conn.execute(
+            sa.text("SELECT id, email FROM contacts WHERE company_id = :cid"), {"cid": dup_id}
+        ).fetchall()
+        for contact_id, email in contacts:
+            existing = conn.execute(
+                sa.text("SELECT id FROM contacts WHERE company_id = :cid AND email = :email"),
+                {"cid": keeper_id, "email": email},
+            ).scalar()
+            if existing is None:
+                conn.execute(
+                    sa.text("UPDATE contacts SET company_id = :keeper WHERE id = :id"),
+                    {"keeper": keeper_id, "id": contact_id},
+                )
+                continue
+            conn.execute(
+                sa.text("UPDATE leads SET contact_id = :keep WHERE contact_id = :dup"),
+                {"keep": existing, "dup": contact_id},
+            )
+            conn.execute(sa.text("DELETE FROM contacts WHERE id = :id"), {"id": contact_id})
+        conn.execute(
+            sa.text("UPDATE leads SET company_id = :keeper WHERE company_id = :dup"),
+            {"keeper": keeper_id, "dup": dup_id},
+        )
+        conn.execute(
+            sa.text("DELETE FROM company_qualification WHERE company_id = :dup"), {"dup": dup_id}
+        )
+        conn.execute(sa.text("DELETE FROM companies WHERE id = :dup"), {"dup": dup_id})
+
+
+def upgrade() -> None:
+    _merge_duplicate_companies(op.get_bind())
+    with op.batch_alter_table("companies") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_companies_name_region_source", ["name", "region", "source"]
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("companies") as batch_op:
+        batch_op.drop_constraint("uq_companies_name_region_source", type_="unique")
@@ -0,0 +1,51 @@
+"""add persistent lead dedupe key
+
+Revision ID: 0009_lead_dedupe_key
+Revises: 0008_company_natural_key
+Create Date: 2026-01-21
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0009_lead_dedupe_key"
+down_revision = "0008_company_natural_key"
+branch_labels = None
+depends_on = None
+
+
+def _dedupe_key(name: str | None, domain: str | None) -> str | None:
+    normalized = " ".join((name or "").strip().lower().split())
+    if not normalized or not domain:
+        return None
+    return f"{normalized}|{domain.lower()}"
+
+
+def upgrade() -> None:
+    op.add_column("leads", sa.Column("dedupe_key", sa.String(length=512), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.text(
+            "SELECT leads.id, companies.name, companies.website_domain "
+            "FROM leads JOIN companies ON companies.id = leads.company_id ORDER BY leads.id"
+        )
+    )
+    # The oldest lead owns each key; later duplicates stay NULL rather than being deleted.
+    assigned: dict[str, int] = {}
+    for lead_id, name, domain in rows:
+        key = _dedupe_key(name, domain)
+        if key and key not in assigned:
+            assigned[key] = lead_id
+    updates = [{"id": lead_id, "key": key} for key, lead_id in assigned.items()]
+    if updates:
+        conn.execute(sa.text("UPDATE leads SET dedupe_key = :key WHERE id = :id"), updates)
+
+    op.create_index("ix_leads_dedupe_key", "leads", ["dedupe_key"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_leads_dedupe_key", table_name="leads")
+    op.drop_column("leads", "dedupe_key")
@@ -0,0 +1,29 @@
+"""add company minhash signatures for near-duplicate detection
+
+Revision ID: 0010_company_signatures
+Revises: 0009_lead_dedupe_key
+Create Date: 2026-01-21
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0010_company_signatures"
+down_revision = "0009_lead_dedupe_key"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "company_signatures",
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id"), primary_key=True),
+        sa.Column("signatures", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("company_signatures")
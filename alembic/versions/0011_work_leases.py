@@ -0,0 +1,36 @@
+"""add work claim leases to leads, outbox and outreach
+
+Revision ID: 0011_work_leases
+Revises: 0010_company_signatures
+Create Date: 2026-01-21
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0011_work_leases"
+down_revision = "0010_company_signatures"
+branch_labels = None
+depends_on = None
+
+
+_TABLES = ("leads", "outbox", "outreach")
+
+
+def upgrade() -> None:
+    for table in _TABLES:
+        op.add_column(table, sa.Column("claimed_by", sa.String(length=128), nullable=True))
+        op.add_column(
+            table, sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True)
+        )
+        op.create_index(f"ix_{table}_lease_expires_at", table, ["lease_expires_at"])
+
+
+def downgrade() -> None:
+    for table in reversed(_TABLES):
+        op.drop_index(f"ix_{table}_lease_expires_at", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("lease_expires_at")
+            batch.drop_column("claimed_by")
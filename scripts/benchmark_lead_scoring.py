@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from amis_agent.application.services.lead_scoring import BatchLeadScorer, CompanyColumns, ScoringRules
+from amis_agent.application.services.qualification import qualify_company
+
+
+def synthetic_columns(rows: int, seed: int = 7) -> CompanyColumns:
+    rng = random.Random(seed)
+    statuses = ["has_website", "has_website", "has_website", "no_website", None]
+    sources = ["seed_static", "chamber_nyc", "zipleaf_us", "zipleaf_uk", None]
+    regions = ["US", "UK", None]
+    names: list[str | None] = []
+    urls: list[str | None] = []
+    for i in range(rows):
+        names.append(rng.choice([f"Company {i}", f"  company {i} llc ", "", "   ", None]))
+        urls.append(rng.choice([f"https://www.c{i % 5000}.com/about", f"http://c{i % 5000}.io", None]))
+    return CompanyColumns(
+        names=names,
+        website_statuses=[rng.choice(statuses) for _ in range(rows)],
+        website_urls=urls,
+        regions=[rng.choice(regions) for _ in range(rows)],
+        sources=[rng.choice(sources) for _ in range(rows)],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--allowed-sources", default="seed_static,chamber_nyc,zipleaf_us")
+    args = parser.parse_args()
+
+    allowed_sources = {s for s in args.allowed_sources.split(",") if s}
+    columns = synthetic_columns(args.rows)
+
+    start = time.perf_counter()
+    expected = [
+        qualify_company(
+            name=name,
+            website_status=status,
+            website_url=url,
+            region=region,
+            source=source,
+            allowed_sources=allowed_sources,
+            allowed_domains=set(),
+        )
+        for name, status, url, region, source in zip(
+            columns.names,
+            columns.website_statuses,
+            columns.website_urls,
+            columns.regions,
+            columns.sources,
+        )
+    ]
+    per_row_s = time.perf_counter() - start
+
+    scorer = BatchLeadScorer(ScoringRules(allowed_sources=frozenset(allowed_sources)))
+    start = time.perf_counter()
+    batch = scorer.score(columns)
+    batch_s = time.perf_counter() - start
+
+    mismatches = sum(1 for i, decision in enumerate(expected) if batch.decision(i) != decision)
+    print(f"rows={args.rows}")
+    print(f"qualify_company loop: {per_row_s:.2f}s ({args.rows / per_row_s:,.0f} rows/s)")
+    print(f"BatchLeadScorer:      {batch_s:.2f}s ({args.rows / batch_s:,.0f} rows/s)")
+    print(f"speedup: {per_row_s / batch_s:.1f}x, mismatches: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -50,10 +50,16 @@ sudo cp "$REPO_DIR/deploy/systemd/amis-agent-worker.service" /etc/systemd/system
 sudo systemctl daemon-reload
 sudo systemctl enable --now amis-agent-worker
 
+echo "Install systemd service for draft worker"
+sudo cp "$REPO_DIR/deploy/systemd/amis-agent-draft-worker.service" /etc/systemd/system/
+sudo systemctl daemon-reload
+sudo systemctl enable --now amis-agent-draft-worker
+
 echo "Restart services"
 sudo systemctl restart amis-agent-scheduler
 sudo systemctl restart amis-agent-api
 sudo systemctl restart amis-agent-worker
+sudo systemctl restart amis-agent-draft-worker
 sudo systemctl restart nginx
 
 echo "Done"
@@ -7,9 +7,8 @@ from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from amis_agent.api.deps import get_db_session, require_admin
-from amis_agent.application.services.llm_email_writer import write_outbox_draft
+from amis_agent.application.services.jobs import enqueue_drafting
 from amis_agent.application.services.send_outbox import SendBlockedError, send_outbox_draft
-from amis_agent.application.services.templates import pick_persona
 from amis_agent.infrastructure.db.contact_repository import fetch_contacts_for_company
 from amis_agent.infrastructure.db.models import (
     AuditLogModel,
@@ -18,7 +17,7 @@ from amis_agent.infrastructure.db.models import (
     LeadModel,
     OutboxModel,
 )
-from amis_agent.infrastructure.db.memory_repository import get_industry_insight
+from amis_agent.infrastructure.llm.token_budget import get_token_ledger
 from amis_agent.infrastructure.queue.scheduler_store import SchedulerStore
 
 
@@ -46,13 +45,16 @@ async def stats(session: AsyncSession = Depends(get_db_session)) -> dict:
     store = SchedulerStore()
     last_runs = {
         name: (store.get_last_run(name).isoformat() if store.get_last_run(name) else None)
-        for name in ["discover", "qualify", "enrich", "outreach", "send_outbox"]
+        for name in [
+            "discover", "qualify", "enrich", "outreach", "draft", "draft_batch", "send_outbox"
+        ]
     }
     return {
         "companies": company_count,
         "leads_by_status": lead_counts,
         "outbox_by_status": outbox_counts,
         "last_runs": last_runs,
+        "llm_tokens_today": await get_token_ledger().summary(),
         "recent_activity": [
             {"action": a, "source": s, "created_at": c.isoformat()} for a, s, c in audits
         ],
@@ -156,53 +158,25 @@ async def approve_outbox(outbox_id: int, session: AsyncSession = Depends(get_db_
 
 
 @router.post("/outbox/{outbox_id}/regenerate")
-async def regenerate_outbox(outbox_id: int, session: AsyncSession = Depends(get_db_session)) -> dict:
+async def regenerate_outbox(
+    outbox_id: int, fresh: bool = False, session: AsyncSession = Depends(get_db_session)
+) -> dict:
     stmt = (
-        select(OutboxModel, LeadModel, CompanyModel, ContactModel)
+        select(OutboxModel, LeadModel)
         .join(LeadModel, OutboxModel.lead_id == LeadModel.id)
-        .join(CompanyModel, LeadModel.company_id == CompanyModel.id)
-        .outerjoin(ContactModel, LeadModel.contact_id == ContactModel.id)
         .where(OutboxModel.id == outbox_id)
     )
     row = (await session.execute(stmt)).first()
     if not row:
         raise HTTPException(status_code=404, detail="outbox_not_found")
-    outbox, lead, company, contact = row
+    outbox, lead = row
     await session.delete(outbox)
+    lead.status = "enriched"
     await session.commit()
-    if lead.status != "enriched":
-        lead.status = "enriched"
-        await session.commit()
-    insight = await get_industry_insight(session, company.industry)
-    persona = insight.preferred_persona if insight and insight.preferred_persona else pick_persona(
-        company.industry
-    )
-    snippets = {
-        "about": company.about_snippet,
-        "contact": None,
-    }
-    value_props = [
-        "automation of repetitive tasks",
-        "faster response times",
-        "reduced operational overhead",
-    ]
-    tone_by_persona = {
-        "Founder": "formal, concise, founder-to-founder",
-        "CTO": "formal, technical, concise",
-        "Ops": "formal, operations-focused, concise",
-    }
-    draft = await write_outbox_draft(
-        session,
-        lead=lead,
-        company=company,
-        contact=contact,
-        snippets=snippets,
-        value_props=value_props,
-        persona=persona,
-        tone=tone_by_persona.get(persona, "formal, concise"),
-        status="ready_for_review",
-    )
-    return {"status": "ready_for_review", "id": draft.id}
+    # The LLM call runs on the draft queue, so this request never waits on it. The old
+    # draft is already gone, so a spent budget must still produce a (template) draft.
+    job = enqueue_drafting(lead_ids=[lead.id], bypass_cache=fresh, budget_action="fallback")
+    return {"status": "queued", "lead_id": lead.id, "job_id": job.id}
 
 
 @router.post("/outbox/{outbox_id}/send")
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from amis_agent.application.services.lead_pipeline import assert_transition
+from amis_agent.application.services.llm_email_writer import (
+    GenerateResult,
+    LLMEmailInput,
+    LLMEmailWriter,
+    _fallback,
+    _hash_prompt,
+    _output_from_content,
+    _prompt_payload,
+    _validate_output,
+    draft_audit_details,
+    draft_values,
+)
+from amis_agent.core.logging import get_logger
+from amis_agent.infrastructure.db.audit_repository import bulk_log_audit
+from amis_agent.infrastructure.db.claims import release_claims
+from amis_agent.infrastructure.db.lead_repository import (
+    bulk_set_lead_status,
+    fetch_draft_candidates,
+)
+from amis_agent.infrastructure.db.models import LeadModel
+from amis_agent.infrastructure.db.outbox_repository import (
+    bulk_create_llm_drafts,
+    fetch_existing_drafts,
+)
+from amis_agent.infrastructure.db.unit_of_work import unit_of_work
+from amis_agent.infrastructure.llm.batch import BatchStatus, LLMBatchClient
+from amis_agent.infrastructure.llm.token_budget import TokenLedger
+
+
+logger = get_logger(service="batch_drafting")
+
+_CUSTOM_ID_PREFIX = "lead-"
+
+
+def custom_id_for(lead_id: int) -> str:
+    return f"{_CUSTOM_ID_PREFIX}{lead_id}"
+
+
+def lead_id_from(custom_id: str) -> int | None:
+    if not custom_id.startswith(_CUSTOM_ID_PREFIX):
+        return None
+    try:
+        return int(custom_id[len(_CUSTOM_ID_PREFIX) :])
+    except ValueError:
+        return None
+
+
+@dataclass
+class BatchManifest:
+    batch_id: str
+    input_file_id: str
+    request_file: str
+    model: str
+    lead_ids: list[int]
+    status: str = "submitted"
+    submitted_at: float = 0.0
+    ingested_at: float | None = None
+    drafted: int = 0
+    fallbacks: int = 0
+    skipped: int = 0
+    errors: dict[str, int] = field(default_factory=dict)
+    # Holder of the claims on lead_ids, released once the results are ingested.
+    worker_id: str = ""
+
+
+class BatchManifestStore:
+    # One JSON manifest per submitted batch next to its request file; a batch is
+    # open until its results have been ingested, so any later run can resume it.
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, batch_id: str) -> Path:
+        return self.root / f"{batch_id}.json"
+
+    def new_request_path(self) -> Path:
+        return self.root / f"requests-{time.time_ns()}.jsonl"
+
+    def result_path(self, batch_id: str, file_id: str) -> Path:
+        return self.root / f"{batch_id}.{file_id}.jsonl"
+
+    def save(self, manifest: BatchManifest) -> None:
+        path = self._path(manifest.batch_id)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(manifest), sort_keys=True), encoding="utf-8")
+        tmp.replace(path)
+
+    def load(self, batch_id: str) -> BatchManifest | None:
+        path = self._path(batch_id)
+        if not path.exists():
+            return None
+        return BatchManifest(**json.loads(path.read_text(encoding="utf-8")))
+
+    def open_batches(self) -> list[BatchManifest]:
+        manifests = []
+        for path in sorted(self.root.glob("*.json")):
+            manifest = self.load(path.stem)
+            if manifest is not None and manifest.ingested_at is None:
+                manifests.append(manifest)
+        return manifests
+
+
+@dataclass(frozen=True)
+class BatchRequest:
+    lead_id: int
+    payload: dict
+
+
+def write_batch_requests(path: Path, inputs: list[LLMEmailInput], writer: LLMEmailWriter) -> None:
+    with path.open("w", encoding="utf-8") as handle:
+        for data in inputs:
+            line = {
+                "custom_id": custom_id_for(data.lead.id),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": writer.request_body(_prompt_payload(data)),
+            }
+            handle.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+
+def read_batch_requests(path: Path) -> list[BatchRequest]:
+    # The prompt payload is the user message, so the request file alone is enough to
+    # rebuild inputs and prompt hashes when a batch is resumed in another process.
+    requests = []
+    with path.open(encoding="utf-8") as handle:
+        for raw in handle:
+            if not raw.strip():
+                continue
+            line = json.loads(raw)
+            lead_id = lead_id_from(line["custom_id"])
+            if lead_id is None:
+                continue
+            payload = json.loads(line["body"]["messages"][-1]["content"])
+            requests.append(BatchRequest(lead_id=lead_id, payload=payload))
+    return requests
+
+
+async def submit_draft_batch(
+    client: LLMBatchClient,
+    store: BatchManifestStore,
+    inputs: list[LLMEmailInput],
+    *,
+    writer: LLMEmailWriter,
+    worker_id: str = "",
+) -> BatchManifest | None:
+    if not inputs:
+        return None
+    request_path = store.new_request_path()
+    write_batch_requests(request_path, inputs, writer)
+    input_file_id = await client.upload_file(request_path)
+    batch = await client.create_batch(input_file_id, metadata={"job": "draft_batch"})
+    manifest = BatchManifest(
+        batch_id=batch.id,
+        input_file_id=input_file_id,
+        request_file=str(request_path),
+        model=writer.model,
+        lead_ids=[data.lead.id for data in inputs],
+        status=batch.status,
+        submitted_at=time.time(),
+        worker_id=worker_id,
+    )
+    store.save(manifest)
+    logger.info("draft_batch_submitted", batch_id=batch.id, items=len(inputs))
+    return manifest
+
+
+async def wait_for_batch(
+    client: LLMBatchClient,
+    batch_id: str,
+    *,
+    poll_interval_s: float,
+    max_wait_s: float,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+) -> BatchStatus:
+    # Returns the last seen status once max_wait_s is used up; the batch stays open
+    # and the next run picks it up again.
+    deadline = time.monotonic() + max_wait_s
+    while True:
+        batch = await client.get_batch(batch_id)
+        if batch.finished or time.monotonic() + poll_interval_s > deadline:
+            return batch
+        await sleep(poll_interval_s)
+
+
+async def _download_results(
+    client: LLMBatchClient, store: BatchManifestStore, batch: BatchStatus
+) -> dict[int, dict]:
+    items: dict[int, dict] = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        path = store.result_path(batch.id, file_id)
+        if not path.exists():
+            path.write_text(await client.download_file(file_id), encoding="utf-8")
+        for raw in path.read_text(encoding="utf-8").splitlines():
+            if not raw.strip():
+                continue
+            item = json.loads(raw)
+            lead_id = lead_id_from(item.get("custom_id", ""))
+            if lead_id is not None:
+                items.setdefault(lead_id, item)
+    return items
+
+
+def batch_item_result(data: LLMEmailInput, prompt_hash: str, item: dict | None) -> GenerateResult:
+    if item is None:
+        return _fallback(data), prompt_hash, None, None, "missing_from_batch"
+    response = item.get("response") or {}
+    error = item.get("error")
+    if error or response.get("status_code") != 200:
+        reason = (error or {}).get("code") or f"status_{response.get('status_code')}"
+        return _fallback(data), prompt_hash, None, None, reason
+    body = response.get("body") or {}
+    usage = body.get("usage")
+    try:
+        output = _output_from_content(body["choices"][0]["message"]["content"])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return _fallback(data), prompt_hash, usage, None, "invalid_output"
+    if not _validate_output(output):
+        return _fallback(data), prompt_hash, usage, None, "validation_failed"
+    return output, prompt_hash, usage, None, None
+
+
+async def ingest_draft_batch(
+    session,
+    client: LLMBatchClient,
+    store: BatchManifestStore,
+    manifest: BatchManifest,
+    batch: BatchStatus,
+    *,
+    commit_every: int = 100,
+    status: str = "ready_for_review",
+    ledger: TokenLedger | None = None,
+) -> BatchManifest:
+    items = await _download_results(client, store, batch)
+    requests = read_batch_requests(Path(manifest.request_file))
+    lead_ids = [request.lead_id for request in requests]
+    candidates = {
+        candidate.lead.id: candidate
+        for candidate in await fetch_draft_candidates(
+            session, lead_ids=lead_ids, limit=len(lead_ids) or 1
+        )
+    }
+    # Safe to re-run after a crash: drafts written last time are found here and skipped.
+    existing = await fetch_existing_drafts(session, lead_ids)
+    manifest.drafted = manifest.fallbacks = manifest.skipped = 0
+    manifest.errors = {}
+    async with unit_of_work(session, commit_every=commit_every) as uow:
+        # Rows are built per chunk and written with one statement per table, so a large
+        # batch costs a few round-trips per chunk rather than a few per item.
+        for start in range(0, len(requests), uow.commit_every):
+            drafts: list[dict] = []
+            audits: list[dict] = []
+            moved: list[int] = []
+            for request in requests[start : start + uow.commit_every]:
+                candidate = candidates.get(request.lead_id)
+                if candidate is None:
+                    # The lead moved on (or was deleted) while the batch was running.
+                    manifest.skipped += 1
+                    continue
+                if request.lead_id not in existing:
+                    payload = request.payload
+                    data = LLMEmailInput(
+                        lead=candidate.lead,
+                        company=candidate.company,
+                        contact=candidate.contact,
+                        snippets=payload.get("snippets") or {},
+                        value_props=payload.get("value_props") or [],
+                        persona=payload.get("persona") or "",
+                        tone=payload.get("tone") or "",
+                    )
+                    item = items.get(request.lead_id)
+                    result = batch_item_result(data, _hash_prompt(payload), item)
+                    error = result[4]
+                    if ledger is not None:
+                        # Usage is charged to the batch id as its run.
+                        await ledger.record(
+                            result[2],
+                            model=manifest.model,
+                            persona=data.persona,
+                            run_id=manifest.batch_id,
+                        )
+                    if error is None:
+                        manifest.drafted += 1
+                    else:
+                        manifest.fallbacks += 1
+                        manifest.errors[error] = manifest.errors.get(error, 0) + 1
+                    audits.append(draft_audit_details(result, model=manifest.model))
+                    drafts.append(draft_values(data, result, model=manifest.model, status=status))
+                assert_transition(candidate.lead.status, "ready_for_review")
+                moved.append(request.lead_id)
+            await bulk_log_audit(
+                session, action="llm_draft", source="batch_drafting", details=audits
+            )
+            await bulk_create_llm_drafts(session, drafts)
+            await bulk_set_lead_status(session, moved, "ready_for_review")
+            await uow.commit()
+    if manifest.worker_id:
+        await release_claims(session, LeadModel, lead_ids, worker_id=manifest.worker_id)
+    manifest.status = batch.status
+    manifest.ingested_at = time.time()
+    store.save(manifest)
+    logger.info(
+        "draft_batch_ingested",
+        batch_id=manifest.batch_id,
+        status=batch.status,
+        drafted=manifest.drafted,
+        fallbacks=manifest.fallbacks,
+        skipped=manifest.skipped,
+        errors=manifest.errors,
+    )
+    return manifest
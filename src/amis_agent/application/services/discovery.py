@@ -1,9 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import contextlib
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, field
 from typing import Protocol
 
 from amis_agent.core.logging import get_logger
+from amis_agent.core.metrics import DISCOVERY_CONNECTOR_ITEMS, DISCOVERY_CONNECTOR_LATENCY
 
 
 @dataclass(frozen=True)
@@ -20,15 +26,149 @@ class DiscoveryConnector(Protocol):
         ...
 
 
-def discover_businesses(connectors: list[DiscoveryConnector], *, region: str, limit: int) -> list[BusinessListing]:
+@dataclass(frozen=True)
+class ConnectorStats:
+    name: str
+    status: str
+    items: int
+    latency_ms: int
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class DiscoveryReport:
+    listings: list[BusinessListing]
+    stats: list[ConnectorStats] = field(default_factory=list)
+
+
+def _named_connectors(
+    connectors: Iterable[DiscoveryConnector] | Mapping[str, DiscoveryConnector],
+) -> list[tuple[str, DiscoveryConnector]]:
+    if isinstance(connectors, Mapping):
+        return list(connectors.items())
+    named = []
+    for index, connector in enumerate(connectors):
+        name = getattr(connector, "name", None) or f"{type(connector).__name__}_{index}"
+        named.append((str(name), connector))
+    return named
+
+
+def _settle(future: asyncio.Future, result: object, error: BaseException | None) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def run_in_daemon_thread(
+    loop: asyncio.AbstractEventLoop, name: str, fn: Callable[[], object]
+) -> asyncio.Future:
+    future = loop.create_future()
+
+    def _target() -> None:
+        try:
+            result, error = fn(), None
+        except BaseException as exc:  # noqa: BLE001
+            result, error = None, exc
+        # The loop may be gone by the time an abandoned connector returns.
+        with contextlib.suppress(RuntimeError):
+            loop.call_soon_threadsafe(_settle, future, result, error)
+
+    threading.Thread(target=_target, name=f"discovery-{name}", daemon=True).start()
+    return future
+
+
+async def discover_businesses_async(
+    connectors: Iterable[DiscoveryConnector] | Mapping[str, DiscoveryConnector],
+    *,
+    region: str,
+    limit: int,
+    connector_timeout_s: float | None = None,
+    deadline_s: float | None = None,
+) -> DiscoveryReport:
     logger = get_logger(worker="discovery_service")
-    listings: list[BusinessListing] = []
-    for connector in connectors:
+    named = _named_connectors(connectors)
+    if not named:
+        return DiscoveryReport(listings=[], stats=[])
+
+    loop = asyncio.get_running_loop()
+    # Connectors are blocking; give each its own thread so a hung source cannot starve
+    # the others. A timed-out fetch cannot be interrupted, so the thread is a daemon:
+    # it is abandoned rather than joined, and never keeps the worker process alive.
+
+    async def _run_one(name: str, connector: DiscoveryConnector) -> tuple[list[BusinessListing], ConnectorStats]:
+        start = time.perf_counter()
+        status = "ok"
+        error = None
+        results: list[BusinessListing] = []
         try:
-            results = connector.fetch(region=region, limit=limit)
-        except Exception as exc:  # pragma: no cover - defensive safety
-            logger.warning("discovery_connector_failed", error=str(exc))
-            continue
+            call = run_in_daemon_thread(
+                loop, name, lambda: connector.fetch(region=region, limit=limit)
+            )
+            results = await asyncio.wait_for(call, timeout=connector_timeout_s)
+        except asyncio.TimeoutError:
+            status, error = "timeout", "connector_timeout"
+        except asyncio.CancelledError:
+            status, error = "timeout", "deadline_exceeded"
+        except Exception as exc:  # noqa: BLE001
+            status, error = "error", str(exc)
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        return results, ConnectorStats(
+            name=name, status=status, items=len(results), latency_ms=latency_ms, error=error
+        )
+
+    tasks = [asyncio.ensure_future(_run_one(name, connector)) for name, connector in named]
+    await asyncio.wait(tasks, timeout=deadline_s)
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+    listings: list[BusinessListing] = []
+    stats: list[ConnectorStats] = []
+    for (name, _), outcome in zip(named, outcomes):
+        if isinstance(outcome, BaseException):  # pragma: no cover - defensive safety
+            outcome = ([], ConnectorStats(name=name, status="error", items=0, latency_ms=0, error=str(outcome)))
+        results, stat = outcome
         listings.extend(results)
-    return listings
+        stats.append(stat)
+        DISCOVERY_CONNECTOR_LATENCY.labels(stat.name, stat.status).observe(stat.latency_ms / 1000)
+        DISCOVERY_CONNECTOR_ITEMS.labels(stat.name).inc(stat.items)
+        if stat.status == "ok":
+            logger.info(
+                "discovery_connector_finished",
+                connector=stat.name,
+                items=stat.items,
+                latency_ms=stat.latency_ms,
+            )
+        else:
+            logger.warning(
+                "discovery_connector_failed",
+                connector=stat.name,
+                status=stat.status,
+                error=stat.error,
+                latency_ms=stat.latency_ms,
+            )
+    return DiscoveryReport(listings=listings, stats=stats)
+
 
+def discover_businesses(
+    connectors: Iterable[DiscoveryConnector] | Mapping[str, DiscoveryConnector],
+    *,
+    region: str,
+    limit: int,
+    connector_timeout_s: float | None = None,
+    deadline_s: float | None = None,
+) -> list[BusinessListing]:
+    report = asyncio.run(
+        discover_businesses_async(
+            connectors,
+            region=region,
+            limit=limit,
+            connector_timeout_s=connector_timeout_s,
+            deadline_s=deadline_s,
+        )
+    )
+    return report.listings
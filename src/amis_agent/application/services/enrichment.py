@@ -1,19 +1,25 @@
 from __future__ import annotations
 
-import re
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
 from dataclasses import dataclass
-from typing import Callable
-from urllib.parse import urljoin, urlparse
-
-from bs4 import BeautifulSoup
-
-from amis_agent.infrastructure.scraping.http_client import HttpResponse, RateLimiter, fetch
+from urllib.parse import urlparse
+
+from amis_agent.application.services.page_analysis import (
+    EMAIL_REGEX,
+    PageAnalysis,
+    analyze_page,
+    contact_links_from_soup,
+    mailto_emails_from_soup,
+    parse_html,
+    personalization_line_from_soup,
+)
+from amis_agent.infrastructure.scraping.http_client import HttpResponse, fetch, fetch_async
+from amis_agent.infrastructure.scraping.page_cache import PageCache, get_page_cache
+from amis_agent.infrastructure.scraping.rate_limit import RateLimiter
 from amis_agent.infrastructure.scraping.robots import RobotsCache
 
 
-EMAIL_REGEX = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.IGNORECASE)
-
-
 @dataclass(frozen=True)
 class EmailEvidence:
     email: str
@@ -28,6 +34,31 @@ class EnrichmentResult:
 
 
 Fetcher = Callable[[str, int], HttpResponse]
+AsyncFetcher = Callable[[str, int], Awaitable[HttpResponse]]
+
+
+class DomainAllowlist:
+    def __init__(self, domains: Iterable[str]):
+        self.domains = frozenset(d.strip().lower().strip(".") for d in domains if d.strip())
+
+    @classmethod
+    def from_csv(cls, value: str) -> DomainAllowlist:
+        return cls(value.split(","))
+
+    def __bool__(self) -> bool:
+        return bool(self.domains)
+
+    def allows(self, url: str) -> bool:
+        # An empty allowlist allows everything; otherwise the host or one of its parent
+        # domains must be listed, found with one set lookup per label.
+        if not self.domains:
+            return True
+        host = urlparse(url).hostname or ""
+        while host:
+            if host in self.domains:
+                return True
+            _, _, host = host.partition(".")
+        return False
 
 
 def extract_emails_from_html(html: str) -> set[str]:
@@ -35,37 +66,20 @@ def extract_emails_from_html(html: str) -> set[str]:
 
 
 def extract_mailto_emails(html: str) -> set[str]:
-    soup = BeautifulSoup(html, "html.parser")
-    emails = set()
-    for link in soup.select("a[href^='mailto:']"):
-        href = link.get("href") or ""
-        email = href.replace("mailto:", "").split("?")[0].strip().lower()
-        if email:
-            emails.add(email)
-    return emails
+    return set(mailto_emails_from_soup(parse_html(html)))
 
 
 def find_contact_links(html: str, base_url: str, *, limit: int) -> list[str]:
-    soup = BeautifulSoup(html, "html.parser")
-    host = urlparse(base_url).hostname or ""
-    links: list[str] = []
-    for link in soup.select("a[href]"):
-        href = link.get("href") or ""
-        if not href:
-            continue
-        if "contact" not in href.lower() and "about" not in href.lower():
-            continue
-        url = urljoin(base_url, href)
-        parsed = urlparse(url)
-        if parsed.scheme not in {"http", "https"}:
-            continue
-        if parsed.hostname and parsed.hostname != host:
-            continue
-        if url not in links:
-            links.append(url)
-        if len(links) >= limit:
-            break
-    return links
+    return contact_links_from_soup(parse_html(html), base_url, limit=limit)
+
+
+def _merge_page_emails(emails: dict[str, EmailEvidence], page: PageAnalysis, source_url: str) -> None:
+    for email in page.mailto_emails:
+        existing = emails.get(email)
+        if not existing or existing.confidence < 90:
+            emails[email] = EmailEvidence(email=email, source_url=source_url, confidence=90)
+    for email in page.text_emails:
+        emails.setdefault(email, EmailEvidence(email=email, source_url=source_url, confidence=70))
 
 
 class EmailEnricher:
@@ -73,21 +87,50 @@ class EmailEnricher:
         self,
         *,
         fetcher: Fetcher | None = None,
+        async_fetcher: AsyncFetcher | None = None,
         robots: RobotsCache | None = None,
         rate_limiter: RateLimiter | None = None,
+        page_cache: PageCache | None = None,
     ) -> None:
-        self.fetcher = fetcher or (lambda url, timeout: fetch(url, timeout_s=timeout))
-        self.robots = robots or RobotsCache(cache={})
+        if page_cache is None and fetcher is None and async_fetcher is None:
+            page_cache = get_page_cache()
+        self.page_cache = page_cache
+        self.fetcher = fetcher or self._fetch_network
+        if async_fetcher is None and fetcher is not None:
+            async_fetcher = lambda url, timeout: asyncio.to_thread(fetcher, url, timeout)  # noqa: E731
+        self.async_fetcher = async_fetcher or self._fetch_network_async
         self.rate_limiter = rate_limiter or RateLimiter()
+        self.robots = robots or RobotsCache(cache={}, rate_limiter=self.rate_limiter)
         self.cache: dict[str, str] = {}
 
+    def _fetch_network(self, url: str, timeout_s: int) -> HttpResponse:
+        if self.page_cache is not None:
+            return self.page_cache.fetch(url, timeout_s=timeout_s)
+        return fetch(url, timeout_s=timeout_s)
+
+    async def _fetch_network_async(self, url: str, timeout_s: int) -> HttpResponse:
+        if self.page_cache is not None:
+            return await self.page_cache.fetch_async(url, timeout_s=timeout_s)
+        return await fetch_async(url, timeout_s=timeout_s)
+
+    def _cached_html(self, url: str) -> str | None:
+        if url in self.cache:
+            return self.cache[url]
+        if self.page_cache is not None:
+            fresh = self.page_cache.get_fresh(url)
+            if fresh is not None:
+                self.cache[url] = fresh
+                return fresh
+        return None
+
     def _fetch_html(self, url: str, *, timeout_s: int, user_agent: str, max_requests: int, request_count: int) -> tuple[str | None, int]:
         if request_count >= max_requests:
             return None, request_count
         if not self.robots.get(url, user_agent).can_fetch(user_agent, url):
             return None, request_count
-        if url in self.cache:
-            return self.cache[url], request_count
+        cached = self._cached_html(url)
+        if cached is not None:
+            return cached, request_count
         host = urlparse(url).hostname or ""
         self.rate_limiter.wait(host)
         resp = self.fetcher(url, timeout_s)
@@ -96,6 +139,26 @@ class EmailEnricher:
         self.cache[url] = resp.text
         return resp.text, request_count + 1
 
+    async def _fetch_html_async(
+        self, url: str, *, timeout_s: int, user_agent: str, max_requests: int, request_count: int
+    ) -> tuple[str | None, int]:
+        if request_count >= max_requests:
+            return None, request_count
+        # robots.txt lookups may hit Redis or the network on first sight of a host.
+        parser = await asyncio.to_thread(self.robots.get, url, user_agent)
+        if not parser.can_fetch(user_agent, url):
+            return None, request_count
+        cached = self._cached_html(url)
+        if cached is not None:
+            return cached, request_count
+        host = urlparse(url).hostname or ""
+        await self.rate_limiter.acquire(host)
+        resp = await self.async_fetcher(url, timeout_s)
+        if resp.status_code != 200:
+            return None, request_count + 1
+        self.cache[url] = resp.text
+        return resp.text, request_count + 1
+
     def enrich(
         self,
         *,
@@ -116,16 +179,12 @@ class EmailEnricher:
         if not homepage_html:
             return EnrichmentResult([], None)
 
-        personalization_line = extract_personalization_line(homepage_html)
-
+        homepage = analyze_page(homepage_html, website_url, contact_link_limit=max_contact_pages)
+        personalization_line = homepage.personalization_line
         emails: dict[str, EmailEvidence] = {}
-        for email in extract_mailto_emails(homepage_html):
-            emails[email] = EmailEvidence(email=email, source_url=website_url, confidence=90)
-        for email in extract_emails_from_html(homepage_html):
-            emails.setdefault(email, EmailEvidence(email=email, source_url=website_url, confidence=70))
+        _merge_page_emails(emails, homepage, website_url)
 
-        contact_links = find_contact_links(homepage_html, website_url, limit=max_contact_pages)
-        for link in contact_links:
+        for link in homepage.contact_links:
             if request_count >= max_requests:
                 break
             html, request_count = self._fetch_html(
@@ -137,25 +196,60 @@ class EmailEnricher:
             )
             if not html:
                 continue
+            page = analyze_page(html, link, include_personalization=personalization_line is None)
+            if personalization_line is None:
+                personalization_line = page.personalization_line
+            _merge_page_emails(emails, page, link)
+        return EnrichmentResult(list(emails.values()), personalization_line)
+
+    async def enrich_async(
+        self,
+        *,
+        website_url: str,
+        user_agent: str,
+        timeout_s: int,
+        max_contact_pages: int = 2,
+        max_requests: int = 5,
+    ) -> EnrichmentResult:
+        request_count = 0
+        homepage_html, request_count = await self._fetch_html_async(
+            website_url,
+            timeout_s=timeout_s,
+            user_agent=user_agent,
+            max_requests=max_requests,
+            request_count=request_count,
+        )
+        if not homepage_html:
+            return EnrichmentResult([], None)
+
+        # Parsing is CPU-bound; keep it off the event loop so other leads keep fetching.
+        homepage = await asyncio.to_thread(
+            analyze_page, homepage_html, website_url, contact_link_limit=max_contact_pages
+        )
+        personalization_line = homepage.personalization_line
+        emails: dict[str, EmailEvidence] = {}
+        _merge_page_emails(emails, homepage, website_url)
+
+        for link in homepage.contact_links:
+            if request_count >= max_requests:
+                break
+            html, request_count = await self._fetch_html_async(
+                link,
+                timeout_s=timeout_s,
+                user_agent=user_agent,
+                max_requests=max_requests,
+                request_count=request_count,
+            )
+            if not html:
+                continue
+            page = await asyncio.to_thread(
+                analyze_page, html, link, include_personalization=personalization_line is None
+            )
             if personalization_line is None:
-                personalization_line = extract_personalization_line(html)
-            for email in extract_mailto_emails(html):
-                existing = emails.get(email)
-                if not existing or existing.confidence < 90:
-                    emails[email] = EmailEvidence(email=email, source_url=link, confidence=90)
-            for email in extract_emails_from_html(html):
-                emails.setdefault(email, EmailEvidence(email=email, source_url=link, confidence=70))
+                personalization_line = page.personalization_line
+            _merge_page_emails(emails, page, link)
         return EnrichmentResult(list(emails.values()), personalization_line)
 
 
 def extract_personalization_line(html: str) -> str | None:
-    soup = BeautifulSoup(html, "html.parser")
-    text = " ".join(soup.get_text(separator=" ").split())
-    if not text:
-        return None
-    for sentence in text.split("."):
-        cleaned = sentence.strip()
-        if len(cleaned) >= 20:
-            snippet = cleaned + "."
-            return snippet[:512]
-    return None
+    return personalization_line_from_soup(parse_html(html))
@@ -20,6 +20,10 @@ DEFAULT_JOBS = {
     "enrich": JobSpec(name="enrich", func_path="amis_agent.workers.enrichment.run"),
     "outreach": JobSpec(name="outreach", func_path="amis_agent.workers.outreach.run"),
     "send_outbox": JobSpec(name="send_outbox", func_path="amis_agent.workers.outbox_sender.run"),
+    "draft": JobSpec(name="draft", func_path="amis_agent.workers.drafting.run", timeout_s=600),
+    "draft_batch": JobSpec(
+        name="draft_batch", func_path="amis_agent.workers.draft_batch.run", timeout_s=900
+    ),
 }
 
 
@@ -51,3 +55,10 @@ def enqueue_enrichment(job_id: str | None = None, **kwargs: object):
 def enqueue_outbox_send(job_id: str | None = None, **kwargs: object):
     return enqueue_job(DEFAULT_JOBS["send_outbox"], job_id=job_id, **kwargs)
 
+
+def enqueue_drafting(job_id: str | None = None, **kwargs: object):
+    return enqueue_job(DEFAULT_JOBS["draft"], job_id=job_id, **kwargs)
+
+
+def enqueue_draft_batch(job_id: str | None = None, **kwargs: object):
+    return enqueue_job(DEFAULT_JOBS["draft_batch"], job_id=job_id, **kwargs)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+
+from amis_agent.application.services.qualification import QualificationDecision, extract_domain
+
+
+# scheme://host[:digits] followed by /, ?, # or the end, with a plain ASCII host.
+# Anything else (userinfo, IPv6, whitespace, unicode) goes through urlparse via
+# extract_domain, so the two always agree.
+_SIMPLE_URL = re.compile(
+    r"[A-Za-z][A-Za-z0-9+.-]*://([A-Za-z0-9._~!$&'()*+,;=-]*)(?::[0-9]*)?(?:[/?#]|\Z)"
+)
+
+
+def fast_extract_domain(url: str | None) -> str | None:
+    if not url:
+        return None
+    match = _SIMPLE_URL.match(url)
+    if match is None or "\t" in url or "\r" in url or "\n" in url:
+        return extract_domain(url)
+    return match.group(1).lower() or None
+
+
+@dataclass(frozen=True)
+class ScoringRules:
+    base_score: int = 50
+    domain_weight: int = 20
+    region_weight: int = 10
+    source_weight: int = 10
+    missing_name_score: int = 0
+    missing_website_score: int = 10
+    not_allowed_score: int = 20
+    max_score: int = 100
+    allowed_sources: frozenset[str] = frozenset()
+    allowed_domains: frozenset[str] = frozenset()
+    denied_sources: frozenset[str] = frozenset()
+    denied_domains: frozenset[str] = frozenset()
+    # Extra points per source on top of source_weight; may be negative.
+    source_priors: Mapping[str, int] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class CompanyColumns:
+    names: Sequence[str | None]
+    website_statuses: Sequence[str | None]
+    website_urls: Sequence[str | None]
+    regions: Sequence[str | None]
+    sources: Sequence[str | None]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+@dataclass(frozen=True)
+class ScoredBatch:
+    allowed: list[bool]
+    scores: list[int]
+    reasons: list[str | None]
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def decision(self, index: int) -> QualificationDecision:
+        return QualificationDecision(self.allowed[index], self.scores[index], self.reasons[index])
+
+
+class BatchLeadScorer:
+    def __init__(self, rules: ScoringRules):
+        self.rules = rules
+        self._allowed_sources = frozenset(rules.allowed_sources)
+        self._allowed_domains = frozenset(rules.allowed_domains)
+        self._denied_sources = frozenset(rules.denied_sources)
+        self._denied_domains = frozenset(rules.denied_domains)
+        self._source_bonus = {
+            source: rules.source_weight + prior for source, prior in rules.source_priors.items()
+        }
+
+    def _source_bonus_for(self, source: str | None) -> int:
+        if not source:
+            return 0
+        return self._source_bonus.get(source, self.rules.source_weight)
+
+    def score(self, columns: CompanyColumns) -> ScoredBatch:
+        rules = self.rules
+        size = len(columns)
+        if not all(
+            len(column) == size
+            for column in (
+                columns.website_statuses,
+                columns.website_urls,
+                columns.regions,
+                columns.sources,
+            )
+        ):
+            raise ValueError("column_length_mismatch")
+
+        # Column passes first; the final pass only combines precomputed values.
+        has_name = [bool(name) and not name.isspace() for name in columns.names]
+        has_website = [status == "has_website" for status in columns.website_statuses]
+        domains = [
+            fast_extract_domain(url) if website else None
+            for url, website in zip(columns.website_urls, has_website)
+        ]
+        source_bonus = [self._source_bonus_for(source) for source in columns.sources]
+
+        allowed_sources = self._allowed_sources
+        allowed_domains = self._allowed_domains
+        denied_sources = self._denied_sources
+        denied_domains = self._denied_domains
+        base = rules.base_score
+        domain_weight = rules.domain_weight
+        region_weight = rules.region_weight
+        max_score = rules.max_score
+        missing_name = (False, rules.missing_name_score, "missing_name")
+        missing_website = (False, rules.missing_website_score, "missing_website")
+
+        allowed: list[bool] = []
+        scores: list[int] = []
+        reasons: list[str | None] = []
+        for named, website, domain, region, source, bonus in zip(
+            has_name, has_website, domains, columns.regions, columns.sources, source_bonus
+        ):
+            if not named:
+                verdict = missing_name
+            elif not website:
+                verdict = missing_website
+            elif allowed_domains and (domain is None or domain not in allowed_domains):
+                verdict = (False, rules.not_allowed_score, "domain_not_allowed")
+            elif allowed_sources and (source is None or source not in allowed_sources):
+                verdict = (False, rules.not_allowed_score, "source_not_allowed")
+            elif domain is not None and domain in denied_domains:
+                verdict = (False, rules.not_allowed_score, "domain_denied")
+            elif source is not None and source in denied_sources:
+                verdict = (False, rules.not_allowed_score, "source_denied")
+            else:
+                score = base + bonus
+                if domain:
+                    score += domain_weight
+                if region:
+                    score += region_weight
+                verdict = (True, max(0, min(score, max_score)), None)
+            allowed.append(verdict[0])
+            scores.append(verdict[1])
+            reasons.append(verdict[2])
+        return ScoredBatch(allowed=allowed, scores=scores, reasons=reasons)
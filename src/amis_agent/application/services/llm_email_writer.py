@@ -1,19 +1,43 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
 import re
-from dataclasses import dataclass
+import uuid
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
 from typing import Any
 
 from amis_agent.application.services.drafts import build_outbox_draft
+from amis_agent.application.services.lead_pipeline import assert_transition
 from amis_agent.application.services.templates import pick_persona
 from amis_agent.core.config import get_settings
 from amis_agent.core.logging import get_logger
+from amis_agent.core.metrics import LLM_CACHE_EVENTS, LLM_CACHE_TOKENS_SAVED
 from amis_agent.infrastructure.db.models import CompanyModel, ContactModel, LeadModel, OutboxModel
-from amis_agent.infrastructure.db.outbox_repository import create_llm_draft, fetch_existing_draft
+from amis_agent.infrastructure.db.outbox_repository import create_llm_draft, fetch_existing_drafts
+from amis_agent.infrastructure.db.unit_of_work import unit_of_work
 from amis_agent.infrastructure.db.audit_repository import log_audit
-from amis_agent.infrastructure.llm.client import LLMClient
+from amis_agent.infrastructure.db.lead_repository import fetch_leads, update_lead
+from amis_agent.infrastructure.llm.client import (
+    AsyncLLMClient,
+    LLMClient,
+    LLMResponse,
+    LLMStreamAborted,
+    get_async_llm_client,
+)
+from amis_agent.infrastructure.llm.json_stream import JSONObjectStream
+from amis_agent.infrastructure.llm.response_cache import (
+    CachedLLMResponse,
+    LLMResponseCache,
+    get_llm_response_cache,
+)
+from amis_agent.infrastructure.llm.token_budget import (
+    TokenBudgetExceeded,
+    TokenLedger,
+    get_token_ledger,
+)
 
 
 logger = get_logger(service="llm_email_writer")
@@ -25,7 +49,7 @@ class LLMEmailInput:
     company: CompanyModel
     contact: ContactModel | None
     snippets: dict
-    value_props: list[str]
+    value_props: Sequence[str]
     persona: str
     tone: str
 
@@ -58,7 +82,7 @@ def _prompt_payload(data: LLMEmailInput) -> dict:
         },
         "contact": {"email": data.contact.email if data.contact else None},
         "snippets": data.snippets,
-        "value_props": data.value_props,
+        "value_props": list(data.value_props),
         "persona": data.persona,
         "tone": data.tone,
         "constraints": {"max_words": 110, "subject_variants": 3},
@@ -81,6 +105,11 @@ def _hash_prompt(payload: dict) -> str:
     return hashlib.sha256(raw).hexdigest()
 
 
+def _estimate_tokens(messages: list[dict], max_tokens: int) -> int:
+    # Roughly four characters per prompt token, plus the most the reply can spend.
+    return sum(len(message["content"]) for message in messages) // 4 + max_tokens
+
+
 def _fallback(data: LLMEmailInput) -> LLMEmailOutput:
     persona = data.persona or pick_persona(data.company.industry)
     draft = build_outbox_draft(
@@ -126,6 +155,53 @@ def _validate_output(output: LLMEmailOutput) -> bool:
     return True
 
 
+class StreamingOutputValidator:
+    # Applies the _validate_output rules to a streamed completion field by field, so a
+    # draft that is bound to fail is rejected before the rest of it is generated. A
+    # rule only fires once no continuation of the stream could still pass it.
+    def __init__(self) -> None:
+        self.parser = JSONObjectStream()
+        self._variants: list | None = None
+        self._chosen: str | None = None
+
+    def feed(self, delta: str) -> str | None:
+        try:
+            completed = self.parser.feed(delta)
+        except ValueError:
+            return "invalid_json"
+        for key, value in completed:
+            reason = self._check_field(key, value)
+            if reason is not None:
+                return reason
+        key, partial = self.parser.partial_string()
+        if key == "body_text" and partial is not None:
+            return self._check_body(partial)
+        return None
+
+    def _check_body(self, body: str) -> str | None:
+        if _word_count(body) > 110:
+            return "body_too_long"
+        if _PLACEHOLDER_RE.search(body):
+            return "body_placeholder"
+        return None
+
+    def _check_field(self, key: str, value: Any) -> str | None:
+        if key == "subject_variants":
+            if not isinstance(value, list) or len(value) != 3:
+                return "subject_variants"
+            self._variants = value
+        elif key == "chosen_subject":
+            self._chosen = value
+        elif key == "body_text":
+            return self._check_body(value) if isinstance(value, str) else "body_text"
+        elif key in ("personalization_fact", "personalization_source_url") and not value:
+            return key
+        if self._variants is not None and self._chosen is not None:
+            if self._chosen not in self._variants:
+                return "chosen_subject"
+        return None
+
+
 def _parse_json_content(content: str) -> dict:
     trimmed = content.strip()
     if trimmed.startswith("{") and trimmed.endswith("}"):
@@ -137,66 +213,235 @@ def _parse_json_content(content: str) -> dict:
     return json.loads(trimmed)
 
 
+_SYSTEM_PROMPT = (
+    "You are an outreach copywriter. Return ONLY valid JSON matching output_format. "
+    "Do not include markdown or commentary. Use <=110 words. Provide 3 subject variants. "
+    "Use a neutral greeting if no contact name is provided. Include exactly one personalization line "
+    "based on a verified fact and include its source URL in personalization_source_url."
+)
+
+# Part of every cache key, so editing the prompt never serves drafts written for the old one.
+_SYSTEM_PROMPT_VERSION = hashlib.sha256(_SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+GenerateResult = tuple[LLMEmailOutput, str, dict | None, int | None, str | None]
+
+
+def _output_from_content(content: str) -> LLMEmailOutput:
+    parsed = _parse_json_content(content)
+    return LLMEmailOutput(
+        subject_variants=parsed["subject_variants"],
+        chosen_subject=parsed["chosen_subject"],
+        body_text=parsed["body_text"],
+        followup_text=parsed["followup_text"],
+        personalization_fields=parsed.get("personalization_fields", {}),
+        personalization_fact=parsed.get("personalization_fact"),
+        personalization_source_url=parsed.get("personalization_source_url"),
+        confidence=float(parsed.get("confidence", 0.5)),
+        rationale=parsed.get("rationale", ""),
+    )
+
+
+def _cache_key(model: str, prompt_hash: str) -> str:
+    return f"{model}:{_SYSTEM_PROMPT_VERSION}:{prompt_hash}"
+
+
 class LLMEmailWriter:
-    def __init__(self, client: LLMClient | None = None) -> None:
+    def __init__(
+        self,
+        client: LLMClient | None = None,
+        async_client: AsyncLLMClient | None = None,
+        cache: LLMResponseCache | None = None,
+        budget: TokenLedger | None = None,
+        run_id: str | None = None,
+        budget_action: str | None = None,
+    ) -> None:
         settings = get_settings()
         self.client = client or LLMClient(
             base_url=settings.llm_base_url,
             api_key=settings.llm_api_key,
             timeout_s=settings.llm_timeout,
         )
+        self.async_client = async_client
+        self.cache = cache if cache is not None else get_llm_response_cache()
+        self.budget = budget if budget is not None else get_token_ledger()
+        # Everything generated by one writer is charged to the same run budget.
+        self.run_id = run_id or uuid.uuid4().hex[:16]
+        self.budget_action = budget_action or settings.llm_budget_action
         self.model = settings.llm_model
         self.max_tokens = settings.llm_max_tokens
+        self.stream = settings.llm_stream
+        self.stream_retries = max(settings.llm_stream_retries, 0)
+
+    def _messages(self, payload: dict) -> list[dict]:
+        user = json.dumps(payload, ensure_ascii=False)
+        return [{"role": "system", "content": _SYSTEM_PROMPT}, {"role": "user", "content": user}]
+
+    def request_body(self, payload: dict) -> dict:
+        return {
+            "model": self.model,
+            "messages": self._messages(payload),
+            "max_tokens": self.max_tokens,
+            "temperature": 0.4,
+        }
+
+    def _result(
+        self, data: LLMEmailInput, prompt_hash: str, response: LLMResponse
+    ) -> GenerateResult:
+        output = _output_from_content(response.content)
+        if not _validate_output(output):
+            usage, latency_ms = response.usage, response.latency_ms
+            return _fallback(data), prompt_hash, usage, latency_ms, "validation_failed"
+        return output, prompt_hash, response.usage, response.latency_ms, None
+
+    def _cache_hit(
+        self, prompt_hash: str, entry: CachedLLMResponse | None
+    ) -> GenerateResult | None:
+        output = None
+        if entry is not None:
+            try:
+                output = LLMEmailOutput(**entry.output)
+            except TypeError:
+                output = None
+        if output is None or not _validate_output(output):
+            LLM_CACHE_EVENTS.labels(self.model, "miss").inc()
+            return None
+        saved = entry.total_tokens()
+        LLM_CACHE_EVENTS.labels(self.model, "hit").inc()
+        LLM_CACHE_TOKENS_SAVED.labels(self.model).inc(saved)
+        return output, prompt_hash, {"cache_hit": True, "saved_tokens": saved}, 0, None
+
+    def _cache_entry(
+        self, result: GenerateResult, response: LLMResponse
+    ) -> CachedLLMResponse | None:
+        output, _, _, _, error = result
+        # Fallbacks and outputs that failed validation are never cached.
+        if error is not None or output.rationale == "fallback_template":
+            return None
+        return CachedLLMResponse(output=asdict(output), model=response.model, usage=response.usage)
 
-    def generate(
-        self, data: LLMEmailInput
-    ) -> tuple[LLMEmailOutput, str, dict | None, int | None, str | None]:
+    def _record_stored(self, evicted: int) -> None:
+        LLM_CACHE_EVENTS.labels(self.model, "stored").inc()
+        if evicted:
+            LLM_CACHE_EVENTS.labels(self.model, "evicted").inc(evicted)
+
+    def generate(self, data: LLMEmailInput, *, bypass_cache: bool = False) -> GenerateResult:
         payload = _prompt_payload(data)
         prompt_hash = _hash_prompt(payload)
-        system = (
-            "You are an outreach copywriter. Return ONLY valid JSON matching output_format. "
-            "Do not include markdown or commentary. Use <=110 words. Provide 3 subject variants. "
-            "Use a neutral greeting if no contact name is provided. Include exactly one personalization line "
-            "based on a verified fact and include its source URL in personalization_source_url."
-        )
-        user = json.dumps(payload, ensure_ascii=False)
+        key = _cache_key(self.model, prompt_hash)
+        if self.cache is not None:
+            if bypass_cache:
+                LLM_CACHE_EVENTS.labels(self.model, "bypass").inc()
+            else:
+                cached = self._cache_hit(prompt_hash, self.cache.get(key))
+                if cached is not None:
+                    return cached
+        # The ledger is async; a sync caller is charged against the same budgets on a
+        # short-lived loop per ledger call, just like generate_async.
+        reserved = _estimate_tokens(self._messages(payload), self.max_tokens)
+        reserve = self.budget.reserve(self.run_id, reserved, action=self.budget_action)
+        exhausted = asyncio.run(reserve)
+        if exhausted is not None:
+            return _fallback(data), prompt_hash, None, None, exhausted
         try:
             response = self.client.create_chat_completion(
                 model=self.model,
-                messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
+                messages=self._messages(payload),
                 max_tokens=self.max_tokens,
             )
-            parsed = _parse_json_content(response.content)
-            output = LLMEmailOutput(
-                subject_variants=parsed["subject_variants"],
-                chosen_subject=parsed["chosen_subject"],
-                body_text=parsed["body_text"],
-                followup_text=parsed["followup_text"],
-                personalization_fields=parsed.get("personalization_fields", {}),
-                personalization_fact=parsed.get("personalization_fact"),
-                personalization_source_url=parsed.get("personalization_source_url"),
-                confidence=float(parsed.get("confidence", 0.5)),
-                rationale=parsed.get("rationale", ""),
+            asyncio.run(
+                self.budget.record(
+                    response.usage, model=self.model, persona=data.persona, run_id=self.run_id
+                )
+            )
+            result = self._result(data, prompt_hash, response)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("llm_generate_failed", error=str(exc))
+            return _fallback(data), prompt_hash, None, None, str(exc)
+        finally:
+            asyncio.run(self.budget.release(self.run_id, reserved))
+        entry = self._cache_entry(result, response)
+        if self.cache is not None and entry is not None:
+            self._record_stored(self.cache.put(key, entry))
+        return result
+
+    async def _complete_async(
+        self, client: AsyncLLMClient, data: LLMEmailInput, payload: dict
+    ) -> LLMResponse:
+        messages = self._messages(payload)
+        if not self.stream:
+            return await client.create_chat_completion(
+                model=self.model, messages=messages, max_tokens=self.max_tokens
+            )
+        attempt = 0
+        while True:
+            try:
+                return await client.stream_chat_completion(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=self.max_tokens,
+                    check_factory=lambda: StreamingOutputValidator().feed,
+                )
+            except LLMStreamAborted as exc:
+                # The tokens streamed before the abort were still spent.
+                await self.budget.record(
+                    exc.usage, model=self.model, persona=data.persona, run_id=self.run_id
+                )
+                attempt += 1
+                if attempt > self.stream_retries:
+                    raise
+                logger.info("llm_stream_retry", reason=exc.reason, attempt=attempt)
+
+    async def generate_async(
+        self, data: LLMEmailInput, *, bypass_cache: bool = False
+    ) -> GenerateResult:
+        payload = _prompt_payload(data)
+        prompt_hash = _hash_prompt(payload)
+        key = _cache_key(self.model, prompt_hash)
+        if self.cache is not None:
+            if bypass_cache:
+                LLM_CACHE_EVENTS.labels(self.model, "bypass").inc()
+            else:
+                cached = self._cache_hit(prompt_hash, await self.cache.aget(key))
+                if cached is not None:
+                    return cached
+        # Held against the budgets until the call's real usage is recorded.
+        reserved = _estimate_tokens(self._messages(payload), self.max_tokens)
+        exhausted = await self.budget.reserve(self.run_id, reserved, action=self.budget_action)
+        if exhausted is not None:
+            return _fallback(data), prompt_hash, None, None, exhausted
+        client = self.async_client or get_async_llm_client()
+        try:
+            response = await self._complete_async(client, data, payload)
+            await self.budget.record(
+                response.usage, model=self.model, persona=data.persona, run_id=self.run_id
             )
-            if not _validate_output(output):
-                return _fallback(data), prompt_hash, response.usage, response.latency_ms, "validation_failed"
-            return output, prompt_hash, response.usage, response.latency_ms, None
+            result = self._result(data, prompt_hash, response)
+        except LLMStreamAborted as exc:
+            return _fallback(data), prompt_hash, exc.usage, None, f"stream_aborted:{exc.reason}"
         except Exception as exc:  # noqa: BLE001
             logger.warning("llm_generate_failed", error=str(exc))
             return _fallback(data), prompt_hash, None, None, str(exc)
+        finally:
+            await self.budget.release(self.run_id, reserved)
+        entry = self._cache_entry(result, response)
+        if self.cache is not None and entry is not None:
+            self._record_stored(await self.cache.aput(key, entry))
+        return result
 
 
 async def write_outbox_draft(
-    session,
+    session_factory,
     *,
     lead: LeadModel,
     company: CompanyModel,
     contact: ContactModel | None,
     snippets: dict,
-    value_props: list[str],
+    value_props: Sequence[str],
     persona: str,
     tone: str,
     status: str = "ready_for_review",
+    writer: LLMEmailWriter | None = None,
+    bypass_cache: bool = False,
 ) -> OutboxModel:
     data = LLMEmailInput(
         lead=lead,
@@ -207,45 +452,111 @@ async def write_outbox_draft(
         persona=persona,
         tone=tone,
     )
-    payload = _prompt_payload(data)
-    prompt_hash = _hash_prompt(payload)
+    drafts = await write_outbox_drafts(
+        session_factory, [data], status=status, writer=writer, bypass_cache=bypass_cache
+    )
+    if drafts[0] is None:
+        raise TokenBudgetExceeded("draft_deferred")
+    return drafts[0]
 
-    existing = await fetch_existing_draft(session, lead_id=lead.id)
-    if existing:
-        return existing
-    writer = LLMEmailWriter()
-    output, prompt_hash, usage, latency_ms, error = writer.generate(data)
 
-    await log_audit(
-        session,
-        action="llm_draft",
-        source="llm_email_writer",
-        details={
-            "prompt_hash": prompt_hash,
-            "model": writer.model,
-            "latency_ms": latency_ms,
-            "usage": usage,
-            "error": error or (None if output.rationale != "fallback_template" else "fallback_template"),
-        },
-    )
+async def write_outbox_drafts(
+    session_factory,
+    inputs: list[LLMEmailInput],
+    *,
+    status: str = "ready_for_review",
+    writer: LLMEmailWriter | None = None,
+    bypass_cache: bool = False,
+) -> list[OutboxModel | None]:
+    # Sessions only live for a short read and a short write; no connection is held
+    # while the LLM calls run, so pool usage does not depend on LLM latency.
+    lead_ids = [data.lead.id for data in inputs]
+    async with session_factory() as session:
+        existing = await fetch_existing_drafts(session, lead_ids)
+    pending = [data for data in inputs if data.lead.id not in existing]
+    writer = writer or LLMEmailWriter()
+
+    async def _generate(data: LLMEmailInput) -> GenerateResult | None:
+        try:
+            return await writer.generate_async(data, bypass_cache=bypass_cache)
+        except TokenBudgetExceeded:
+            return None
+
+    results = await asyncio.gather(*(_generate(data) for data in pending))
 
-    return await create_llm_draft(
-        session,
-        lead_id=lead.id,
-        to_email=lead.contact_email,
-        subject=output.chosen_subject,
-        subject_variants=output.subject_variants,
-        body_text=output.body_text,
-        body_html=None,
-        followup_text=output.followup_text,
-        personalization_vars=output.personalization_fields,
-        personalization_fact=output.personalization_fact,
-        personalization_source_url=output.personalization_source_url,
-        prompt_hash=prompt_hash,
-        llm_model=writer.model,
-        llm_latency_ms=latency_ms,
-        llm_token_usage=usage,
-        llm_confidence=output.confidence,
-        llm_rationale=output.rationale,
-        status=status,
+    created: dict[int, OutboxModel] = {}
+    deferred = 0
+    async with session_factory() as session:
+        async with unit_of_work(session):
+            # Another worker may have drafted the same lead while the LLM was busy.
+            existing.update(await fetch_existing_drafts(session, lead_ids))
+            leads = await fetch_leads(session, lead_ids)
+            for data, result in zip(pending, results):
+                if result is None:
+                    deferred += 1
+                    continue
+                if data.lead.id in existing:
+                    continue
+                created[data.lead.id] = await save_generated_draft(
+                    session, data, result, model=writer.model, status=status
+                )
+            for lead_id in set(existing) | set(created):
+                lead = leads.get(lead_id)
+                if lead is not None and lead.status == "enriched":
+                    assert_transition(lead.status, "ready_for_review")
+                    await update_lead(session, lead, status="ready_for_review")
+    if deferred:
+        logger.info("llm_drafts_deferred", count=deferred, run_id=writer.run_id)
+    # Deferred leads come back as None and stay enriched for a later run.
+    return [existing.get(data.lead.id) or created.get(data.lead.id) for data in inputs]
+
+
+def draft_audit_details(result: GenerateResult, *, model: str) -> dict:
+    output, prompt_hash, usage, latency_ms, error = result
+    if error is None and output.rationale == "fallback_template":
+        error = "fallback_template"
+    return {
+        "prompt_hash": prompt_hash,
+        "model": model,
+        "latency_ms": latency_ms,
+        "usage": usage,
+        "error": error,
+    }
+
+
+def draft_values(data: LLMEmailInput, result: GenerateResult, *, model: str, status: str) -> dict:
+    output, prompt_hash, usage, latency_ms, _ = result
+    return {
+        "lead_id": data.lead.id,
+        "to_email": data.lead.contact_email,
+        "subject": output.chosen_subject,
+        "subject_variants": output.subject_variants,
+        "body_text": output.body_text,
+        "body_html": None,
+        "followup_text": output.followup_text,
+        "personalization_vars": output.personalization_fields,
+        "personalization_fact": output.personalization_fact,
+        "personalization_source_url": output.personalization_source_url,
+        "prompt_hash": prompt_hash,
+        "llm_model": model,
+        "llm_latency_ms": latency_ms,
+        "llm_token_usage": usage,
+        "llm_confidence": output.confidence,
+        "llm_rationale": output.rationale,
+        "status": status,
+    }
+
+
+async def save_generated_draft(
+    session,
+    data: LLMEmailInput,
+    result: GenerateResult,
+    *,
+    model: str,
+    status: str = "ready_for_review",
+    source: str = "llm_email_writer",
+) -> OutboxModel:
+    await log_audit(
+        session, action="llm_draft", source=source, details=draft_audit_details(result, model=model)
     )
+    return await create_llm_draft(session, **draft_values(data, result, model=model, status=status))
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import random
+import re
+import zlib
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from amis_agent.application.services.qualification import extract_domain
+
+
+# Only entity-type suffixes: words such as "the", "co" or "company" are often the
+# distinguishing part of a name, and dropping them makes distinct firms collide.
+LEGAL_SUFFIXES = {
+    "llc",
+    "llp",
+    "lp",
+    "pllc",
+    "inc",
+    "incorporated",
+    "ltd",
+    "limited",
+    "corp",
+    "corporation",
+    "plc",
+    "gmbh",
+}
+# Second-level labels that sit in front of a ccTLD (acme.co.uk, acme.com.au).
+_SECOND_LEVEL_LABELS = {"co", "com", "org", "net", "ac", "gov", "ltd", "plc"}
+_STRIP_CHARS = re.compile(r"[.'’]")
+_TOKEN_SPLIT = re.compile(r"[^a-z0-9]+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+Signature = tuple[int, ...]
+
+
+def company_core(name: str | None) -> str:
+    # "ACME Plumbing, L.L.C." -> "acmeplumbing", so names line up with domain labels.
+    lowered = _STRIP_CHARS.sub("", (name or "").lower().replace("&", " and "))
+    tokens = [t for t in _TOKEN_SPLIT.split(lowered) if t and t not in LEGAL_SUFFIXES]
+    return "".join(tokens)
+
+
+def domain_core(domain_or_url: str | None) -> str:
+    if not domain_or_url:
+        return ""
+    host = extract_domain(domain_or_url) if "//" in domain_or_url else domain_or_url.lower()
+    labels = [label for label in (host or "").split(".") if label]
+    if labels and labels[0] == "www":
+        labels = labels[1:]
+    if len(labels) >= 3 and labels[-2] in _SECOND_LEVEL_LABELS:
+        labels = labels[:-2]
+    elif len(labels) >= 2:
+        labels = labels[:-1]
+    return company_core(" ".join(labels[-1:]).replace("-", " "))
+
+
+def shingles(core: str, size: int = 3) -> set[str]:
+    if len(core) <= size:
+        return {core} if core else set()
+    return {core[i : i + size] for i in range(len(core) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 32, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, items: set[str]) -> Signature | None:
+        if not items:
+            return None
+        # crc32 rather than hash(): signatures are persisted, so they must not depend
+        # on the per-process string hash seed.
+        hashes = [zlib.crc32(item.encode("utf-8")) for item in items]
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH
+            for a, b in self._perms
+        )
+
+
+def pack_signatures(signatures: list[Signature]) -> bytes:
+    packed = array("I")
+    for signature in signatures:
+        packed.extend(signature)
+    return packed.tobytes()
+
+
+def unpack_signatures(raw: bytes | None, num_perm: int) -> list[Signature]:
+    if not raw:
+        return []
+    values = array("I")
+    values.frombytes(raw)
+    return [tuple(values[i : i + num_perm]) for i in range(0, len(values), num_perm)]
+
+
+def similarity(left: Sequence[int], right: Sequence[int]) -> float:
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+@dataclass(frozen=True)
+class NearDuplicate:
+    company_id: int
+    similarity: float
+    # None when either company has no domain, so only the region can tell them apart.
+    same_domain: bool | None
+
+
+class NearDuplicateIndex:
+    def __init__(
+        self, *, num_perm: int = 32, bands: int = 8, threshold: float = 0.8, seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.hasher = MinHasher(num_perm=num_perm, seed=seed)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.last_company_id = 0
+        # One bucket map per band; a bucket holds a bare id until a second id shares it,
+        # which keeps the index to a few hundred bytes per company.
+        self._buckets: list[dict[int, int | list[int]]] = [{} for _ in range(bands)]
+        self._signatures: dict[int, list[array]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, company_id: int) -> bool:
+        return company_id in self._signatures
+
+    def signatures_of(self, company_id: int) -> list[Signature]:
+        return [tuple(signature) for signature in self._signatures.get(company_id, [])]
+
+    def signatures_for(self, name: str | None, domain: str | None) -> list[Signature]:
+        # Positional: the name's signature, then the domain's if there is one. A company
+        # without a usable name gets none, since names must match for a near-duplicate.
+        name_signature = self.hasher.signature(shingles(company_core(name)))
+        if name_signature is None:
+            return []
+        domain_signature = self.hasher.signature(shingles(domain_core(domain)))
+        return [name_signature] + ([domain_signature] if domain_signature is not None else [])
+
+    def _bands(self, signature: Signature):
+        rows = self.rows
+        for band in range(self.bands):
+            # Buckets only live in memory, so the salted built-in hash is fine here.
+            yield band, hash(signature[band * rows : (band + 1) * rows])
+
+    def add(self, company_id: int, signatures: list[Signature]) -> None:
+        if not signatures:
+            return
+        self._signatures[company_id] = [array("I", sig) for sig in signatures]
+        # Only names are bucketed: a company whose name does not match is never a duplicate.
+        for band, key in self._bands(signatures[0]):
+            bucket = self._buckets[band]
+            current = bucket.get(key)
+            if current is None:
+                bucket[key] = company_id
+            elif isinstance(current, int):
+                if current != company_id:
+                    bucket[key] = [current, company_id]
+            elif company_id not in current:
+                current.append(company_id)
+        self.last_company_id = max(self.last_company_id, company_id)
+
+    def query(
+        self, signatures: list[Signature], *, before_id: int | None = None
+    ) -> list[NearDuplicate]:
+        # Candidates whose name matches; the caller decides on the region when a domain is
+        # missing. Domains must match exactly, since look-alike domains are often rivals.
+        if not signatures:
+            return []
+        candidates: set[int] = set()
+        for band, key in self._bands(signatures[0]):
+            found = self._buckets[band].get(key)
+            if isinstance(found, int):
+                candidates.add(found)
+            elif found:
+                candidates.update(found)
+        matches = []
+        for company_id in candidates:
+            if before_id is not None and company_id >= before_id:
+                continue
+            theirs = self._signatures[company_id]
+            name_similarity = similarity(signatures[0], theirs[0])
+            if name_similarity < self.threshold:
+                continue
+            same_domain = None
+            if len(signatures) > 1 and len(theirs) > 1:
+                same_domain = tuple(signatures[1]) == tuple(theirs[1])
+                if not same_domain:
+                    continue
+            matches.append(
+                NearDuplicate(
+                    company_id=company_id, similarity=name_similarity, same_domain=same_domain
+                )
+            )
+        matches.sort(key=lambda match: (-match.similarity, match.company_id))
+        return matches
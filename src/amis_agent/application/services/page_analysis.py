@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import importlib.util
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from amis_agent.core.config import get_settings
+from amis_agent.core.logging import get_logger
+
+
+logger = get_logger(service="page_analysis")
+
+EMAIL_REGEX = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.IGNORECASE)
+
+# bs4 tree builder name -> module that must be importable for it to work.
+_PARSER_MODULES = {"lxml": "lxml", "html5lib": "html5lib", "html.parser": None}
+
+
+@dataclass(frozen=True)
+class PageAnalysis:
+    mailto_emails: list[str]
+    text_emails: list[str]
+    contact_links: list[str]
+    personalization_line: str | None
+
+
+@lru_cache
+def resolve_parser(name: str) -> str:
+    module = _PARSER_MODULES.get(name, name)
+    if module and importlib.util.find_spec(module) is None:
+        logger.warning("html_parser_unavailable", parser=name, fallback="html.parser")
+        return "html.parser"
+    return name
+
+
+def parse_html(html: str, parser: str | None = None) -> BeautifulSoup:
+    return BeautifulSoup(html, resolve_parser(parser or get_settings().scrape_html_parser))
+
+
+def _mailto_email(href: str) -> str | None:
+    email = href.replace("mailto:", "").split("?")[0].strip().lower()
+    return email or None
+
+
+def _contact_link(href: str, base_url: str, host: str) -> str | None:
+    lowered = href.lower()
+    if "contact" not in lowered and "about" not in lowered:
+        return None
+    url = urljoin(base_url, href)
+    parsed = urlparse(url)
+    if parsed.scheme not in {"http", "https"}:
+        return None
+    if parsed.hostname and parsed.hostname != host:
+        return None
+    return url
+
+
+def mailto_emails_from_soup(soup: BeautifulSoup) -> list[str]:
+    emails: list[str] = []
+    for link in soup.find_all("a", href=True):
+        href = link.get("href") or ""
+        if not href.startswith("mailto:"):
+            continue
+        email = _mailto_email(href)
+        if email and email not in emails:
+            emails.append(email)
+    return emails
+
+
+def contact_links_from_soup(soup: BeautifulSoup, base_url: str, *, limit: int) -> list[str]:
+    host = urlparse(base_url).hostname or ""
+    links: list[str] = []
+    for link in soup.find_all("a", href=True):
+        url = _contact_link(link.get("href") or "", base_url, host)
+        if url and url not in links:
+            links.append(url)
+        if len(links) >= limit:
+            break
+    return links
+
+
+def personalization_line_from_soup(soup: BeautifulSoup) -> str | None:
+    text = " ".join(soup.get_text(separator=" ").split())
+    if not text:
+        return None
+    for sentence in text.split("."):
+        cleaned = sentence.strip()
+        if len(cleaned) >= 20:
+            snippet = cleaned + "."
+            return snippet[:512]
+    return None
+
+
+def text_emails(html: str) -> list[str]:
+    emails: list[str] = []
+    seen: set[str] = set()
+    for match in EMAIL_REGEX.finditer(html):
+        email = match.group(0).lower()
+        if email not in seen:
+            seen.add(email)
+            emails.append(email)
+    return emails
+
+
+def analyze_page(
+    html: str,
+    base_url: str,
+    *,
+    contact_link_limit: int = 0,
+    include_personalization: bool = True,
+    parser: str | None = None,
+) -> PageAnalysis:
+    soup = parse_html(html, parser)
+    host = urlparse(base_url).hostname or ""
+    mailto: list[str] = []
+    links: list[str] = []
+    # One walk over the anchors feeds both the mailto and the contact-link extraction.
+    for link in soup.find_all("a", href=True):
+        href = link.get("href") or ""
+        if href.startswith("mailto:"):
+            email = _mailto_email(href)
+            if email and email not in mailto:
+                mailto.append(email)
+        if len(links) < contact_link_limit and href:
+            url = _contact_link(href, base_url, host)
+            if url and url not in links:
+                links.append(url)
+    return PageAnalysis(
+        mailto_emails=mailto,
+        text_emails=text_emails(html),
+        contact_links=links,
+        personalization_line=personalization_line_from_soup(soup) if include_personalization else None,
+    )
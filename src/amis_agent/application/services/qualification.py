@@ -58,8 +58,8 @@ def qualify_company(
     return QualificationDecision(True, min(score, 100), None)
 
 
-def should_dedupe(company_name: str, website_domain: str | None, existing_keys: set[tuple[str, str]]) -> bool:
-    if not company_name or not website_domain:
-        return False
-    key = (normalize_company_name(company_name), website_domain.lower())
-    return key in existing_keys
+def lead_dedupe_key(company_name: str | None, website_domain: str | None) -> str | None:
+    normalized = normalize_company_name(company_name)
+    if not normalized or not website_domain:
+        return None
+    return f"{normalized}|{website_domain.lower()}"
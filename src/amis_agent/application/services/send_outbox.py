@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from amis_agent.application.services.email import EmailMessage
@@ -11,7 +10,7 @@ from amis_agent.application.services.preflight import run_preflight
 from amis_agent.core.config import get_settings
 from amis_agent.core.signature import load_signature
 from amis_agent.infrastructure.db.audit_repository import log_audit
-from amis_agent.infrastructure.db.models import CompanyModel, LeadModel, OutboxModel
+from amis_agent.infrastructure.db.outbox_repository import fetch_delivery
 from amis_agent.infrastructure.email.gmail_sender import from_settings
 
 
@@ -32,20 +31,10 @@ async def send_outbox_draft(session: AsyncSession, outbox_id: int) -> SendResult
 
     signature = load_signature()
     sender = from_settings()
-    draft = (
-        await session.execute(select(OutboxModel).where(OutboxModel.id == outbox_id))
-    ).scalar_one_or_none()
-    if not draft:
+    delivery = await fetch_delivery(session, outbox_id)
+    if not delivery:
         raise SendBlockedError(f"outbox_id_not_found:{outbox_id}")
-
-    lead = (
-        await session.execute(select(LeadModel).where(LeadModel.id == draft.lead_id))
-    ).scalar_one_or_none()
-    company = None
-    if lead:
-        company = (
-            await session.execute(select(CompanyModel).where(CompanyModel.id == lead.company_id))
-        ).scalar_one_or_none()
+    draft, lead, company = delivery.draft, delivery.lead, delivery.company
     if not lead or not company:
         raise SendBlockedError("lead_or_company_missing")
 
@@ -52,6 +52,19 @@ PERSONA_TEMPLATES = {
     ),
 }
 
+VALUE_PROPS = (
+    "automation of repetitive tasks",
+    "faster response times",
+    "reduced operational overhead",
+)
+
+TONE_BY_PERSONA = {
+    "Founder": "formal, concise, founder-to-founder",
+    "CTO": "formal, technical, concise",
+    "Ops": "formal, operations-focused, concise",
+}
+DEFAULT_TONE = "formal, concise"
+
 
 def pick_persona(industry: str | None) -> str:
     if not industry:
@@ -28,6 +28,31 @@ class Settings(BaseSettings):
     llm_model: str = Field(default="gpt-4o", alias="LLM_MODEL")
     llm_timeout: int = Field(default=30, alias="LLM_TIMEOUT")
     llm_max_tokens: int = Field(default=400, alias="LLM_MAX_TOKENS")
+    llm_max_concurrency: int = Field(default=8, alias="LLM_MAX_CONCURRENCY")
+    llm_max_connections: int = Field(default=20, alias="LLM_MAX_CONNECTIONS")
+    llm_max_attempts: int = Field(default=4, alias="LLM_MAX_ATTEMPTS")
+    llm_backoff_base_s: float = Field(default=0.5, alias="LLM_BACKOFF_BASE_S")
+    llm_backoff_max_s: float = Field(default=20.0, alias="LLM_BACKOFF_MAX_S")
+    # Stream completions and abort as soon as the draft can no longer pass validation.
+    llm_stream: bool = Field(default=False, alias="LLM_STREAM")
+    llm_stream_retries: int = Field(default=1, alias="LLM_STREAM_RETRIES")
+    llm_cache_ttl_s: int = Field(default=7 * 86400, alias="LLM_CACHE_TTL_S")
+    llm_cache_max_entries: int = Field(default=50_000, alias="LLM_CACHE_MAX_ENTRIES")
+    # "online" queues enriched leads on the draft queue; "batch" leaves them to draft_batch.
+    llm_draft_mode: str = Field(default="online", alias="LLM_DRAFT_MODE")
+    llm_batch_dir: str = Field(default=".cache/llm_batches", alias="LLM_BATCH_DIR")
+    llm_batch_max_items: int = Field(default=5000, alias="LLM_BATCH_MAX_ITEMS")
+    llm_batch_poll_interval_s: float = Field(default=30.0, alias="LLM_BATCH_POLL_INTERVAL_S")
+    llm_batch_max_wait_s: float = Field(default=600.0, alias="LLM_BATCH_MAX_WAIT_S")
+    # Leads in a submitted batch stay claimed for the provider's completion window.
+    llm_batch_lease_s: int = Field(default=86_400, alias="LLM_BATCH_LEASE_S")
+    # Token budgets (prompt + completion); 0 means unlimited.
+    llm_daily_token_budget: int = Field(default=0, alias="LLM_DAILY_TOKEN_BUDGET")
+    llm_run_token_budget: int = Field(default=0, alias="LLM_RUN_TOKEN_BUDGET")
+    # "fallback" writes template drafts once a budget is spent; "defer" leaves leads for later.
+    llm_budget_action: str = Field(default="fallback", alias="LLM_BUDGET_ACTION")
+    llm_prompt_cost_per_1k: float = Field(default=0.0025, alias="LLM_PROMPT_COST_PER_1K")
+    llm_completion_cost_per_1k: float = Field(default=0.01, alias="LLM_COMPLETION_COST_PER_1K")
 
     email_from: str = Field(alias="EMAIL_FROM")
     email_display_name: str = Field(alias="EMAIL_DISPLAY_NAME")
@@ -55,13 +80,47 @@ class Settings(BaseSettings):
     scrape_user_agent: str = Field(default="AMISAgentBot/1.0", alias="SCRAPE_USER_AGENT")
     scrape_timeout_s: int = Field(default=20, alias="SCRAPE_TIMEOUT_S")
     scrape_rate_limit_per_host: int = Field(default=1, alias="SCRAPE_RATE_LIMIT_PER_HOST")
+    scrape_rate_limit_burst: int = Field(default=1, alias="SCRAPE_RATE_LIMIT_BURST")
+    scrape_max_connections: int = Field(default=100, alias="SCRAPE_MAX_CONNECTIONS")
+    scrape_max_keepalive_connections: int = Field(default=20, alias="SCRAPE_MAX_KEEPALIVE_CONNECTIONS")
+    scrape_max_connections_per_host: int = Field(default=4, alias="SCRAPE_MAX_CONNECTIONS_PER_HOST")
+    scrape_keepalive_expiry_s: float = Field(default=30.0, alias="SCRAPE_KEEPALIVE_EXPIRY_S")
+    scrape_http2: bool = Field(default=False, alias="SCRAPE_HTTP2")
+    scrape_page_cache_path: str = Field(default=".cache/page_cache.sqlite3", alias="SCRAPE_PAGE_CACHE_PATH")
+    scrape_page_cache_max_bytes: int = Field(default=256 * 1024 * 1024, alias="SCRAPE_PAGE_CACHE_MAX_BYTES")
+    scrape_page_cache_ttl_s: int = Field(default=86400, alias="SCRAPE_PAGE_CACHE_TTL_S")
+    scrape_robots_timeout_s: int = Field(default=10, alias="SCRAPE_ROBOTS_TIMEOUT_S")
+    scrape_robots_ttl_s: int = Field(default=86400, alias="SCRAPE_ROBOTS_TTL_S")
+    scrape_robots_missing_ttl_s: int = Field(default=21600, alias="SCRAPE_ROBOTS_MISSING_TTL_S")
+    scrape_robots_error_ttl_s: int = Field(default=900, alias="SCRAPE_ROBOTS_ERROR_TTL_S")
+    scrape_html_parser: str = Field(default="html.parser", alias="SCRAPE_HTML_PARSER")
     scrape_allowed_domains: str = Field(default="", alias="SCRAPE_ALLOWED_DOMAINS")
     discovery_seed_enabled: bool = Field(default=True, alias="DISCOVERY_SEED_ENABLED")
     discovery_seed_path: str = Field(default="config/discovery_seed.json", alias="DISCOVERY_SEED_PATH")
+    discovery_connector_timeout_s: float = Field(default=60.0, alias="DISCOVERY_CONNECTOR_TIMEOUT_S")
+    discovery_deadline_s: float = Field(default=180.0, alias="DISCOVERY_DEADLINE_S")
+    discovery_upsert_chunk_size: int = Field(default=500, alias="DISCOVERY_UPSERT_CHUNK_SIZE")
+    discovery_page_budget: int = Field(default=20, alias="DISCOVERY_PAGE_BUDGET")
+    discovery_incremental: bool = Field(default=True, alias="DISCOVERY_INCREMENTAL")
+    discovery_snapshot_ttl_s: int = Field(default=7 * 86400, alias="DISCOVERY_SNAPSHOT_TTL_S")
 
     qualify_allowed_sources: str = Field(default="", alias="QUALIFY_ALLOWED_SOURCES")
     qualify_allowed_domains: str = Field(default="", alias="QUALIFY_ALLOWED_DOMAINS")
+    qualify_denied_sources: str = Field(default="", alias="QUALIFY_DENIED_SOURCES")
+    qualify_denied_domains: str = Field(default="", alias="QUALIFY_DENIED_DOMAINS")
+    qualify_source_priors: str = Field(default="", alias="QUALIFY_SOURCE_PRIORS")
+    qualify_chunk_size: int = Field(default=1000, alias="QUALIFY_CHUNK_SIZE")
+    qualify_max_chunks: int = Field(default=0, alias="QUALIFY_MAX_CHUNKS")
+    qualify_near_duplicate_threshold: float = Field(default=0.8, alias="QUALIFY_NEAR_DUPLICATE_THRESHOLD")
+    work_lease_s: int = Field(default=900, alias="WORK_LEASE_S")
+    db_commit_every: int = Field(default=100, alias="DB_COMMIT_EVERY")
+    db_commit_max_age_s: float = Field(default=2.0, alias="DB_COMMIT_MAX_AGE_S")
     enrich_allowed_domains: str = Field(default="", alias="ENRICH_ALLOWED_DOMAINS")
+    enrich_batch_size: int = Field(default=50, alias="ENRICH_BATCH_SIZE")
+    draft_chunk_size: int = Field(default=100, alias="DRAFT_CHUNK_SIZE")
+    insight_cache_ttl_s: float = Field(default=300.0, alias="INSIGHT_CACHE_TTL_S")
+    enrich_concurrency: int = Field(default=10, alias="ENRICH_CONCURRENCY")
+    enrich_lead_timeout_s: float = Field(default=90.0, alias="ENRICH_LEAD_TIMEOUT_S")
 
 
 @lru_cache
@@ -16,6 +16,76 @@ REQUEST_LATENCY = Histogram(
     "HTTP request latency in seconds",
     ["method", "path"],
 )
+DISCOVERY_CONNECTOR_LATENCY = Histogram(
+    "amis_discovery_connector_duration_seconds",
+    "Discovery connector fetch latency in seconds",
+    ["connector", "status"],
+)
+DISCOVERY_CONNECTOR_ITEMS = Counter(
+    "amis_discovery_connector_items_total",
+    "Listings returned by discovery connectors",
+    ["connector"],
+)
+DISCOVERY_PAGE_EVENTS = Counter(
+    "amis_discovery_page_events_total",
+    "Directory page outcomes in incremental discovery (not_modified, unchanged, changed, first_seen)",
+    ["source", "outcome"],
+)
+PAGE_CACHE_EVENTS = Counter(
+    "amis_page_cache_events_total",
+    "Scraping page cache events (hits, misses, revalidated, stored, evicted)",
+    ["event"],
+)
+PAGE_CACHE_BYTES_SAVED = Counter(
+    "amis_page_cache_bytes_saved_total",
+    "Response bytes served from the scraping page cache instead of the network",
+)
+
+LLM_REQUEST_LATENCY = Histogram(
+    "amis_llm_request_duration_seconds",
+    "LLM chat completion latency in seconds, including retries",
+    ["model", "status"],
+)
+LLM_TOKENS = Counter(
+    "amis_llm_tokens_total",
+    "LLM tokens reported by the provider (prompt, completion)",
+    ["model", "kind"],
+)
+LLM_RETRIES = Counter(
+    "amis_llm_retries_total",
+    "LLM request retries by reason (HTTP status or transport error)",
+    ["model", "reason"],
+)
+LLM_STREAM_ABORTS = Counter(
+    "amis_llm_stream_aborts_total",
+    "Streamed completions cancelled early because the output could not pass validation",
+    ["model", "reason"],
+)
+LLM_CACHE_EVENTS = Counter(
+    "amis_llm_cache_events_total",
+    "LLM response cache events (hit, miss, bypass, stored, evicted)",
+    ["model", "event"],
+)
+LLM_CACHE_TOKENS_SAVED = Counter(
+    "amis_llm_cache_tokens_saved_total",
+    "LLM tokens not spent because a cached response was reused",
+    ["model"],
+)
+LLM_DRAFT_TOKENS = Counter(
+    "amis_llm_draft_tokens_total",
+    "LLM tokens charged to draft generation (prompt, completion)",
+    ["model", "persona", "kind"],
+)
+LLM_COST_USD = Counter(
+    "amis_llm_cost_usd_total",
+    "Estimated LLM spend in USD from LLM_PROMPT_COST_PER_1K and LLM_COMPLETION_COST_PER_1K",
+    ["model", "persona"],
+)
+LLM_BUDGET_EXHAUSTED = Counter(
+    "amis_llm_budget_exhausted_total",
+    "Drafts that hit an exhausted token budget (daily, run) by action (fallback, defer)",
+    ["scope", "action"],
+)
 
 
 def setup_metrics(app: FastAPI) -> None:
@@ -1,18 +1,36 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Callable
-from urllib.parse import urlparse
+from collections.abc import Callable, Generator, Iterable, Iterator
+from dataclasses import dataclass, field
+from itertools import islice
+from urllib.parse import urljoin, urlparse
 
+import redis
 from bs4 import BeautifulSoup
 
 from amis_agent.application.services.discovery import BusinessListing
 from amis_agent.core.config import get_settings
-from amis_agent.infrastructure.scraping.http_client import HttpResponse, RateLimiter, ensure_allowed_domain, fetch
+from amis_agent.core.logging import get_logger
+from amis_agent.core.metrics import DISCOVERY_PAGE_EVENTS
+from amis_agent.infrastructure.connectors.snapshots import (
+    PageSnapshot,
+    SnapshotStore,
+    listing_key,
+    page_fingerprint,
+)
+from amis_agent.infrastructure.scraping.http_client import HttpResponse, ensure_allowed_domain, fetch
+from amis_agent.infrastructure.scraping.rate_limit import RateLimiter
 from amis_agent.infrastructure.scraping.robots import RobotsCache
 
 
-Fetcher = Callable[[str, int], HttpResponse]
+logger = get_logger(component="directory_scraper")
+
+# Called as fetcher(url, timeout); incremental mode adds headers=... for conditional GETs.
+Fetcher = Callable[..., HttpResponse]
+
+
+def _default_fetcher(url: str, timeout: int, headers: dict[str, str] | None = None) -> HttpResponse:
+    return fetch(url, timeout_s=timeout, headers=headers)
 
 
 @dataclass(frozen=True)
@@ -23,6 +41,24 @@ class DirectoryScrapeConfig:
     website_selector: str | None
     region: str
     source: str
+    # Pagination: follow the href of next_page_selector, or fill page_url_template's
+    # {page} placeholder (page 1 is base_url). max_pages overrides DISCOVERY_PAGE_BUDGET.
+    next_page_selector: str | None = None
+    page_url_template: str | None = None
+    max_pages: int | None = None
+
+
+@dataclass
+class _PendingPage:
+    url: str
+    fingerprint: str
+    etag: str | None
+    last_modified: str | None
+    next_url: str | None
+    keys: list[str]
+    known: set[str]
+    fresh: int
+    acked: set[str] = field(default_factory=set)
 
 
 class GenericDirectoryConnector:
@@ -32,33 +68,36 @@ class GenericDirectoryConnector:
         fetcher: Fetcher | None = None,
         *,
         check_robots: bool = True,
+        snapshots: SnapshotStore | None = None,
     ):
         self.config = config
-        self.fetcher = fetcher or (lambda url, timeout: fetch(url, timeout_s=timeout))
+        self.fetcher = fetcher or _default_fetcher
         self.rate_limiter = RateLimiter()
-        self.robots = RobotsCache(cache={})
+        self.robots = RobotsCache(cache={}, rate_limiter=self.rate_limiter)
         self.check_robots = check_robots
+        self.snapshots = snapshots
+        self._pending: dict[str, _PendingPage] = {}
 
-    def fetch(self, *, region: str, limit: int) -> list[BusinessListing]:
-        if region != self.config.region:
-            return []
-        ensure_allowed_domain(self.config.base_url)
-        host = urlparse(self.config.base_url).hostname or ""
-        self.rate_limiter.wait(host)
-
-        if self.check_robots:
-            user_agent = get_settings().scrape_user_agent
-            parser = self.robots.get(self.config.base_url, user_agent)
-            if not parser.can_fetch(user_agent, self.config.base_url):
-                return []
+    def _next_url(self, soup: BeautifulSoup, url: str, page: int, parsed: int) -> str | None:
+        next_url = None
+        if self.config.next_page_selector:
+            link = soup.select_one(self.config.next_page_selector)
+            href = link.get("href") if link else None
+            next_url = urljoin(url, href) if href else None
+        elif self.config.page_url_template and parsed:
+            next_url = self.config.page_url_template.format(page=page + 1)
+        # Pagination never leaves the directory's own host.
+        if next_url and urlparse(next_url).hostname != urlparse(self.config.base_url).hostname:
+            return None
+        return next_url
 
-        resp = self.fetcher(self.config.base_url, get_settings().scrape_timeout_s)
-        if resp.status_code != 200:
-            return []
-
-        soup = BeautifulSoup(resp.text, "html.parser")
+    def _parse_page(
+        self, html: str, url: str, page: int
+    ) -> tuple[list[BusinessListing], str | None]:
+        soup = BeautifulSoup(html, "html.parser")
         listings = []
-        for item in soup.select(self.config.listing_selector)[:limit]:
+        items = soup.select(self.config.listing_selector)
+        for item in items:
             name_el = item.select_one(self.config.name_selector)
             if not name_el:
                 continue
@@ -79,5 +118,148 @@ class GenericDirectoryConnector:
                     website_url=website_url,
                 )
             )
-        return listings
+        return listings, self._next_url(soup, url, page, len(items))
+
+    def _load_snapshot(self, url: str) -> PageSnapshot | None:
+        if self.snapshots is None:
+            return None
+        try:
+            return self.snapshots.get(self.config.source, url)
+        except redis.RedisError as exc:
+            logger.warning("discovery_snapshot_unavailable", source=self.config.source, error=str(exc))
+            return None
+
+    def _save_snapshot(self, url: str, snapshot: PageSnapshot) -> None:
+        if self.snapshots is None:
+            return
+        try:
+            self.snapshots.set(
+                self.config.source, url, snapshot, get_settings().discovery_snapshot_ttl_s
+            )
+        except redis.RedisError as exc:
+            logger.warning("discovery_snapshot_unavailable", source=self.config.source, error=str(exc))
+
+    def _record(self, outcome: str, **fields) -> None:
+        DISCOVERY_PAGE_EVENTS.labels(self.config.source, outcome).inc()
+        logger.info("discovery_page", source=self.config.source, outcome=outcome, **fields)
+
+    def _request(self, url: str, snapshot: PageSnapshot | None) -> HttpResponse:
+        timeout = get_settings().scrape_timeout_s
+        headers: dict[str, str] = {}
+        if snapshot and snapshot.etag:
+            headers["If-None-Match"] = snapshot.etag
+        if snapshot and snapshot.last_modified:
+            headers["If-Modified-Since"] = snapshot.last_modified
+        if headers:
+            return self.fetcher(url, timeout, headers=headers)
+        return self.fetcher(url, timeout)
 
+    def _save_page(self, page: _PendingPage) -> None:
+        seen = page.known | page.acked
+        self._save_snapshot(
+            page.url,
+            PageSnapshot(
+                fingerprint=page.fingerprint,
+                etag=page.etag,
+                last_modified=page.last_modified,
+                listing_keys=[key for key in page.keys if key in seen],
+                truncated=len(page.acked) < page.fresh,
+                next_url=page.next_url,
+            ),
+        )
+
+    def ack(self, listings: Iterable[BusinessListing]) -> None:
+        # Listings only count as seen once the caller has persisted them, so a chunk
+        # that failed to save or was dropped at a deadline is emitted again next run.
+        touched: dict[str, _PendingPage] = {}
+        for listing in listings:
+            key = listing_key(listing)
+            page = self._pending.pop(key, None)
+            if page is not None:
+                page.acked.add(key)
+                touched[page.url] = page
+        for page in touched.values():
+            self._save_page(page)
+
+    def _incremental_page(
+        self, url: str, page: int, resp: HttpResponse, snapshot: PageSnapshot | None
+    ) -> Generator[BusinessListing, None, str | None]:
+        fingerprint = page_fingerprint(resp.text)
+        if snapshot and snapshot.fingerprint == fingerprint and not snapshot.truncated:
+            self._record("unchanged")
+            return snapshot.next_url
+
+        listings, next_url = self._parse_page(resp.text, url, page)
+        known = set(snapshot.listing_keys) if snapshot else set()
+        keyed = [(listing_key(listing), listing) for listing in listings]
+        fresh = [(key, listing) for key, listing in keyed if key not in known]
+        pending = _PendingPage(
+            url=url,
+            fingerprint=fingerprint,
+            etag=getattr(resp, "etag", None),
+            last_modified=getattr(resp, "last_modified", None),
+            next_url=next_url,
+            keys=sorted({key for key, _ in keyed}),
+            known=known,
+            fresh=len(fresh),
+        )
+        emitted = 0
+        try:
+            for key, listing in fresh:
+                self._pending[key] = pending
+                emitted += 1
+                yield listing
+        finally:
+            self._record(
+                "changed" if snapshot else "first_seen", parsed=len(listings), emitted=emitted
+            )
+        if not fresh:
+            # Nothing to persist, so the new fingerprint can be stored right away.
+            self._save_page(pending)
+        return next_url
+
+    def iter_listings(
+        self, *, region: str, page_budget: int | None = None
+    ) -> Iterator[BusinessListing]:
+        if region != self.config.region:
+            return
+        ensure_allowed_domain(self.config.base_url)
+        settings = get_settings()
+        host = urlparse(self.config.base_url).hostname or ""
+        budget = page_budget or self.config.max_pages or settings.discovery_page_budget
+        url: str | None = self.config.base_url
+        visited: set[str] = set()
+
+        for page in range(1, budget + 1):
+            if url is None or url in visited:
+                return
+            visited.add(url)
+
+            if self.check_robots:
+                parser = self.robots.get(url, settings.scrape_user_agent)
+                if not parser.can_fetch(settings.scrape_user_agent, url):
+                    return
+
+            self.rate_limiter.wait(host)
+
+            snapshot = self._load_snapshot(url)
+            resp = self._request(url, snapshot)
+            if resp.status_code == 304 and snapshot is not None:
+                self._record("not_modified")
+                url = snapshot.next_url
+                continue
+            if resp.status_code != 200:
+                return
+            if self.snapshots is None:
+                listings, url = self._parse_page(resp.text, url, page)
+                yield from listings
+            else:
+                url = yield from self._incremental_page(url, page, resp, snapshot)
+
+    def fetch(self, *, region: str, limit: int) -> list[BusinessListing]:
+        # In incremental mode the caller must ack() the listings once they are persisted.
+        stream = self.iter_listings(region=region)
+        try:
+            return list(islice(stream, limit))
+        finally:
+            stream.close()
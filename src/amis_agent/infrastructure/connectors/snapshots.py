@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Protocol
+
+from amis_agent.application.services.discovery import BusinessListing
+from amis_agent.infrastructure.queue.redis import get_redis_client
+
+
+@dataclass(frozen=True)
+class PageSnapshot:
+    fingerprint: str
+    etag: str | None = None
+    last_modified: str | None = None
+    listing_keys: list[str] = field(default_factory=list)
+    # Set when the page held more new listings than the run's limit, so the next run
+    # must parse it again even if the body is byte-identical.
+    truncated: bool = False
+    next_url: str | None = None
+
+
+class SnapshotStore(Protocol):
+    def get(self, source: str, url: str) -> PageSnapshot | None:  # pragma: no cover
+        ...
+
+    def set(
+        self, source: str, url: str, snapshot: PageSnapshot, ttl_s: int
+    ) -> None:  # pragma: no cover
+        ...
+
+
+class RedisSnapshotStore:
+    def __init__(self, prefix: str = "discovery_snapshot"):
+        self.prefix = prefix
+        self.redis = get_redis_client()
+
+    def _key(self, source: str, url: str) -> str:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return f"{self.prefix}:{source}:{digest}"
+
+    def get(self, source: str, url: str) -> PageSnapshot | None:
+        value = self.redis.get(self._key(source, url))
+        if not value:
+            return None
+        return PageSnapshot(**json.loads(value))
+
+    def set(self, source: str, url: str, snapshot: PageSnapshot, ttl_s: int) -> None:
+        self.redis.set(self._key(source, url), json.dumps(asdict(snapshot)), ex=ttl_s)
+
+
+def page_fingerprint(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def listing_key(listing: BusinessListing) -> str:
+    raw = "\x1f".join(
+        [listing.name.strip().lower(), listing.website_url or "", str(listing.has_website)]
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
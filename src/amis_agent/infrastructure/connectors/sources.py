@@ -2,9 +2,15 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+from amis_agent.core.config import get_settings
 from amis_agent.infrastructure.connectors.directory_scraper import DirectoryScrapeConfig, GenericDirectoryConnector
+from amis_agent.infrastructure.connectors.snapshots import RedisSnapshotStore
 from amis_agent.infrastructure.connectors.static_seed import build_seed_connector
 
+# Standard rel=next pager links plus WordPress' "next page-numbers" anchors; a source
+# whose pages carry neither simply stops after its first page.
+DEFAULT_NEXT_PAGE_SELECTOR = "a[rel='next'], a.next.page-numbers"
+
 
 @dataclass(frozen=True)
 class SourceConfig:
@@ -14,6 +20,7 @@ class SourceConfig:
 
 def build_connectors() -> list[SourceConfig]:
     sources: list[SourceConfig] = []
+    snapshots = RedisSnapshotStore() if get_settings().discovery_incremental else None
 
     seed_connector = build_seed_connector()
     if seed_connector.seeds:
@@ -37,6 +44,7 @@ def build_connectors() -> list[SourceConfig]:
                     source="i_need_a_plumber",
                 ),
                 check_robots=False,
+                snapshots=snapshots,
             ),
         )
     )
@@ -52,7 +60,9 @@ def build_connectors() -> list[SourceConfig]:
                     website_selector="a[href^='http']",
                     region="US",
                     source="chamber_nyc",
-                )
+                    next_page_selector=DEFAULT_NEXT_PAGE_SELECTOR,
+                ),
+                snapshots=snapshots,
             ),
         )
     )
@@ -68,7 +78,9 @@ def build_connectors() -> list[SourceConfig]:
                     website_selector=None,
                     region="US",
                     source="localdirectory_contractors",
-                )
+                    next_page_selector=DEFAULT_NEXT_PAGE_SELECTOR,
+                ),
+                snapshots=snapshots,
             ),
         )
     )
@@ -84,7 +96,9 @@ def build_connectors() -> list[SourceConfig]:
                     website_selector=None,
                     region="US",
                     source="zipleaf_us",
-                )
+                    next_page_selector=DEFAULT_NEXT_PAGE_SELECTOR,
+                ),
+                snapshots=snapshots,
             ),
         )
     )
@@ -100,7 +114,9 @@ def build_connectors() -> list[SourceConfig]:
                     website_selector=None,
                     region="UK",
                     source="zipleaf_uk",
-                )
+                    next_page_selector=DEFAULT_NEXT_PAGE_SELECTOR,
+                ),
+                snapshots=snapshots,
             ),
         )
     )
@@ -3,9 +3,11 @@ from __future__ import annotations
 import json
 from typing import Any
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from amis_agent.infrastructure.db.models import AuditLogModel
+from amis_agent.infrastructure.db.unit_of_work import save
 
 
 async def log_audit(
@@ -23,6 +25,20 @@ async def log_audit(
         details=json.dumps(details or {}),
     )
     session.add(entry)
-    await session.commit()
-    await session.refresh(entry)
+    await save(session, entry)
     return entry
+
+
+async def bulk_log_audit(
+    session: AsyncSession,
+    *,
+    action: str,
+    source: str | None = None,
+    details: list[dict[str, Any]],
+) -> None:
+    if not details:
+        return
+    stmt = insert(AuditLogModel).values(
+        [{"action": action, "source": source, "details": json.dumps(entry)} for entry in details]
+    )
+    await session.execute(stmt)
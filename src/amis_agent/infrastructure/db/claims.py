@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+import socket
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def claim_ids(
+    session: AsyncSession,
+    model: Any,
+    *criteria: Any,
+    worker_id: str,
+    limit: int,
+    lease_s: int,
+) -> list[int]:
+    # A lease outlives the claiming transaction, so a worker can commit per row while
+    # it works; rows whose holder died become claimable again once the lease expires.
+    # On PostgreSQL the candidate select skips rows another worker is claiming right now;
+    # SQLite renders no FOR UPDATE but serialises writers, so the UPDATE is still atomic.
+    now = datetime.now(timezone.utc)
+    candidates = (
+        select(model.id)
+        .where(*criteria)
+        .where(or_(model.lease_expires_at.is_(None), model.lease_expires_at < now))
+        .order_by(model.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(model)
+        .where(model.id.in_(candidates))
+        .values(claimed_by=worker_id, lease_expires_at=now + timedelta(seconds=lease_s))
+        .returning(model.id)
+        .execution_options(synchronize_session=False)
+    )
+    ids = sorted(row[0] for row in await session.execute(stmt))
+    await session.commit()
+    return ids
+
+
+async def release_claims(
+    session: AsyncSession, model: Any, ids: Iterable[int], *, worker_id: str
+) -> None:
+    ids = list(ids)
+    if not ids:
+        return
+    stmt = (
+        update(model)
+        .where(model.id.in_(ids))
+        .where(model.claimed_by == worker_id)
+        .values(claimed_by=None, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    await session.execute(stmt)
+    await session.commit()
@@ -1,9 +1,37 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from amis_agent.infrastructure.db.dialect import upsert_insert
 from amis_agent.infrastructure.db.models import CompanyModel
+from amis_agent.infrastructure.db.unit_of_work import save
+
+
+@dataclass(frozen=True)
+class CompanyUpsert:
+    name: str
+    region: str | None
+    website_status: str | None
+    website_url: str | None
+    source: str | None
+
+    @property
+    def key(self) -> tuple[str, str | None, str | None]:
+        return (self.name, self.region, self.source)
+
+
+@dataclass(frozen=True)
+class BulkUpsertResult:
+    inserted: int
+    updated: int
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated
 
 
 async def upsert_company(
@@ -25,7 +53,7 @@ async def upsert_company(
     if existing:
         existing.website_status = website_status or existing.website_status
         existing.website_url = website_url or existing.website_url
-        await session.commit()
+        await save(session, existing)
         return existing
 
     company = CompanyModel(
@@ -36,7 +64,116 @@ async def upsert_company(
         source=source,
     )
     session.add(company)
-    await session.commit()
-    await session.refresh(company)
+    await save(session, company)
     return company
 
+
+def _dedupe(rows: Iterable[CompanyUpsert]) -> list[CompanyUpsert]:
+    merged: dict[tuple, CompanyUpsert] = {}
+    for row in rows:
+        prev = merged.get(row.key)
+        if prev is not None:
+            row = CompanyUpsert(
+                name=row.name,
+                region=row.region,
+                website_status=row.website_status or prev.website_status,
+                website_url=row.website_url or prev.website_url,
+                source=row.source,
+            )
+        merged[row.key] = row
+    return list(merged.values())
+
+
+def _values(row: CompanyUpsert) -> dict:
+    return {
+        "name": row.name,
+        "region": row.region,
+        "website_status": row.website_status,
+        "website_url": row.website_url,
+        "source": row.source,
+    }
+
+
+async def _existing_by_key(
+    session: AsyncSession, chunk: list[CompanyUpsert]
+) -> dict[tuple, tuple[int, str | None, str | None]]:
+    stmt = select(
+        CompanyModel.id,
+        CompanyModel.name,
+        CompanyModel.region,
+        CompanyModel.source,
+        CompanyModel.website_status,
+        CompanyModel.website_url,
+    ).where(CompanyModel.name.in_({row.name for row in chunk}))
+    existing: dict[tuple, tuple[int, str | None, str | None]] = {}
+    for company_id, name, region, source, status, url in await session.execute(stmt):
+        existing.setdefault((name, region, source), (company_id, status, url))
+    return existing
+
+
+async def bulk_upsert_companies(
+    session: AsyncSession,
+    rows: Iterable[CompanyUpsert],
+    *,
+    chunk_size: int = 500,
+) -> BulkUpsertResult:
+    rows = _dedupe(rows)
+    inserted = updated = 0
+    for start in range(0, len(rows), max(chunk_size, 1)):
+        chunk = rows[start : start + chunk_size]
+        existing = await _existing_by_key(session, chunk)
+        # NULLs never collide in a unique index, so only fully keyed rows can rely on
+        # ON CONFLICT; rows missing region/source are matched against the pre-select.
+        keyed = [row for row in chunk if row.region is not None and row.source is not None]
+        partial = [row for row in chunk if row.region is None or row.source is None]
+        inserted += sum(1 for row in chunk if row.key not in existing)
+        updated += sum(1 for row in chunk if row.key in existing)
+
+        if keyed:
+            stmt = upsert_insert(session, CompanyModel).values([_values(row) for row in keyed])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["name", "region", "source"],
+                set_={
+                    "website_status": func.coalesce(
+                        stmt.excluded.website_status, CompanyModel.website_status
+                    ),
+                    "website_url": func.coalesce(stmt.excluded.website_url, CompanyModel.website_url),
+                },
+            )
+            await session.execute(stmt)
+
+        new_partial = [_values(row) for row in partial if row.key not in existing]
+        if new_partial:
+            await session.execute(insert(CompanyModel), new_partial)
+        changed_partial = []
+        for row in partial:
+            if row.key not in existing:
+                continue
+            company_id, status, url = existing[row.key]
+            changed_partial.append(
+                {
+                    "id": company_id,
+                    "website_status": row.website_status or status,
+                    "website_url": row.website_url or url,
+                }
+            )
+        if changed_partial:
+            await session.execute(update(CompanyModel), changed_partial)
+    await session.commit()
+    return BulkUpsertResult(inserted=inserted, updated=updated)
+
+
+async def set_about_snippet(session: AsyncSession, company_id: int, snippet: str) -> None:
+    await session.execute(
+        update(CompanyModel).where(CompanyModel.id == company_id).values(about_snippet=snippet)
+    )
+    await save(session)
+
+
+async def bulk_set_website_domains(session: AsyncSession, domains: dict[int, str]) -> None:
+    if not domains:
+        return
+    await session.execute(
+        update(CompanyModel),
+        [{"id": company_id, "website_domain": domain} for company_id, domain in domains.items()],
+    )
@@ -4,6 +4,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from amis_agent.infrastructure.db.models import ContactModel
+from amis_agent.infrastructure.db.unit_of_work import save
 
 
 async def upsert_contact(
@@ -23,7 +24,7 @@ async def upsert_contact(
             existing.source_url = source_url
         if confidence > existing.confidence:
             existing.confidence = confidence
-        await session.commit()
+        await save(session, existing)
         return existing
 
     contact = ContactModel(
@@ -33,8 +34,7 @@ async def upsert_contact(
         confidence=confidence,
     )
     session.add(contact)
-    await session.commit()
-    await session.refresh(contact)
+    await save(session, contact)
     return contact
 
 
@@ -1,31 +1,137 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from dataclasses import dataclass
+
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from amis_agent.infrastructure.db.models import CompanyModel, LeadModel
+from amis_agent.infrastructure.db.claims import claim_ids
+from amis_agent.infrastructure.db.dialect import upsert_insert
+from amis_agent.infrastructure.db.models import CompanyModel, ContactModel, LeadModel
+from amis_agent.infrastructure.db.unit_of_work import save
+
+
+@dataclass(frozen=True)
+class NewLead:
+    company_id: int
+    region: str | None
+    contact_email: str | None = None
+    contact_status: str = "pending"
+    status: str = "new"
+    dedupe_key: str | None = None
+
+
+@dataclass(frozen=True)
+class EnrichmentCompany:
+    id: int
+    region: str | None
+    website_url: str | None
+    about_snippet: str | None
+
+
+@dataclass(frozen=True)
+class EnrichmentCandidate:
+    lead: LeadModel
+    company: EnrichmentCompany | None
+
+
+async def claim_leads_for_enrichment(
+    session: AsyncSession, *, worker_id: str, limit: int = 50, lease_s: int = 900
+) -> list[EnrichmentCandidate]:
+    ids = await claim_ids(
+        session,
+        LeadModel,
+        LeadModel.status == "new",
+        LeadModel.contact_status == "pending",
+        worker_id=worker_id,
+        limit=limit,
+        lease_s=lease_s,
+    )
+    if not ids:
+        return []
+    # Only the company columns enrichment reads, not whole CompanyModel rows.
+    stmt = (
+        select(
+            LeadModel,
+            CompanyModel.id,
+            CompanyModel.region,
+            CompanyModel.website_url,
+            CompanyModel.about_snippet,
+        )
+        .outerjoin(CompanyModel, LeadModel.company_id == CompanyModel.id)
+        .where(LeadModel.id.in_(ids))
+        .order_by(LeadModel.id)
+    )
+    return [
+        EnrichmentCandidate(
+            lead=lead,
+            company=EnrichmentCompany(company_id, region, url, about) if company_id else None,
+        )
+        for lead, company_id, region, url, about in await session.execute(stmt)
+    ]
+
+
+@dataclass(frozen=True)
+class DraftCandidate:
+    lead: LeadModel
+    company: CompanyModel
+    contact: ContactModel | None
 
 
-async def fetch_leads_for_enrichment(session: AsyncSession, limit: int = 50) -> list[LeadModel]:
+async def fetch_draft_candidates(
+    session: AsyncSession,
+    *,
+    after_id: int = 0,
+    limit: int = 100,
+    lead_ids: list[int] | None = None,
+) -> list[DraftCandidate]:
     stmt = (
-        select(LeadModel)
-        .where(LeadModel.status == "new")
-        .where(LeadModel.contact_status == "pending")
+        select(LeadModel, CompanyModel, ContactModel)
+        .join(CompanyModel, LeadModel.company_id == CompanyModel.id)
+        .outerjoin(ContactModel, LeadModel.contact_id == ContactModel.id)
+        .where(LeadModel.status == "enriched")
+        .where(LeadModel.contact_status.in_(["found", "missing_email"]))
+        .where(LeadModel.id > after_id)
+        .order_by(LeadModel.id)
         .limit(limit)
     )
-    return list((await session.execute(stmt)).scalars().all())
+    if lead_ids is not None:
+        stmt = stmt.where(LeadModel.id.in_(lead_ids))
+    return [
+        DraftCandidate(lead=lead, company=company, contact=contact)
+        for lead, company, contact in await session.execute(stmt)
+    ]
 
 
-async def fetch_existing_lead_keys(session: AsyncSession) -> set[tuple[str, str]]:
-    stmt = select(CompanyModel.name, CompanyModel.website_domain).join(
-        LeadModel, LeadModel.company_id == CompanyModel.id
+async def claim_draft_candidates(
+    session: AsyncSession,
+    *,
+    worker_id: str,
+    after_id: int = 0,
+    limit: int = 100,
+    lease_s: int = 900,
+    lead_ids: list[int] | None = None,
+) -> list[DraftCandidate]:
+    criteria = [
+        LeadModel.status == "enriched",
+        LeadModel.contact_status.in_(["found", "missing_email"]),
+        LeadModel.id > after_id,
+    ]
+    if lead_ids is not None:
+        criteria.append(LeadModel.id.in_(lead_ids))
+    ids = await claim_ids(
+        session, LeadModel, *criteria, worker_id=worker_id, limit=limit, lease_s=lease_s
     )
-    rows = (await session.execute(stmt)).all()
-    keys = set()
-    for name, domain in rows:
-        if name and domain:
-            keys.add((" ".join(name.strip().lower().split()), domain.lower()))
-    return keys
+    if not ids:
+        return []
+    return await fetch_draft_candidates(session, limit=len(ids), lead_ids=ids)
+
+
+async def fetch_leads(session: AsyncSession, lead_ids: list[int]) -> dict[int, LeadModel]:
+    if not lead_ids:
+        return {}
+    stmt = select(LeadModel).where(LeadModel.id.in_(lead_ids))
+    return {lead.id: lead for lead in (await session.execute(stmt)).scalars()}
 
 
 async def create_lead(
@@ -47,11 +153,49 @@ async def create_lead(
         contact_id=contact_id,
     )
     session.add(lead)
-    await session.commit()
-    await session.refresh(lead)
+    await save(session, lead)
     return lead
 
 
+async def bulk_create_leads(session: AsyncSession, leads: list[NewLead]) -> int:
+    if not leads:
+        return 0
+    # Leads whose dedupe_key already exists are skipped by the unique index itself,
+    # so no key set has to be loaded up front.
+    stmt = (
+        upsert_insert(session, LeadModel)
+        .values(
+            [
+                {
+                    "company_id": lead.company_id,
+                    "region": lead.region,
+                    "contact_email": lead.contact_email,
+                    "contact_status": lead.contact_status,
+                    "status": lead.status,
+                    "opt_in": False,
+                    "dedupe_key": lead.dedupe_key,
+                }
+                for lead in leads
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=["dedupe_key"])
+        .returning(LeadModel.id)
+    )
+    return len((await session.execute(stmt)).all())
+
+
+async def bulk_set_lead_status(session: AsyncSession, lead_ids: list[int], status: str) -> None:
+    if not lead_ids:
+        return
+    stmt = (
+        update(LeadModel)
+        .where(LeadModel.id.in_(lead_ids))
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+    await session.execute(stmt)
+
+
 async def update_lead(
     session: AsyncSession,
     lead: LeadModel,
@@ -69,6 +213,5 @@ async def update_lead(
         lead.status = status
     if contact_id is not None:
         lead.contact_id = contact_id
-    await session.commit()
-    await session.refresh(lead)
+    await save(session, lead)
     return lead
@@ -1,18 +1,54 @@
 from __future__ import annotations
 
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from amis_agent.infrastructure.db.models import IndustryInsightModel, ReplyPatternModel
 
 
-async def get_industry_insight(
-    session: AsyncSession, industry: str | None
-) -> IndustryInsightModel | None:
-    if not industry:
-        return None
-    stmt = select(IndustryInsightModel).where(IndustryInsightModel.industry == industry)
-    return (await session.execute(stmt)).scalar_one_or_none()
+@dataclass(frozen=True)
+class IndustryInsight:
+    industry: str
+    preferred_persona: str | None
+    preferred_subject_variant: int | None
+    notes: str | None
+
+
+async def fetch_industry_insights(session: AsyncSession) -> dict[str, IndustryInsight]:
+    stmt = select(
+        IndustryInsightModel.industry,
+        IndustryInsightModel.preferred_persona,
+        IndustryInsightModel.preferred_subject_variant,
+        IndustryInsightModel.notes,
+    )
+    return {row[0]: IndustryInsight(*row) for row in await session.execute(stmt)}
+
+
+class IndustryInsightCache:
+    def __init__(self, ttl_s: float, *, clock: Callable[[], float] = time.monotonic):
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._insights: dict[str, IndustryInsight] = {}
+        self._loaded_at: float | None = None
+        self.loads = 0
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or self._clock() - self._loaded_at >= self.ttl_s
+
+    async def refresh(self, session: AsyncSession, *, force: bool = False) -> None:
+        # The table holds one row per industry, so a full snapshot is cheaper than a
+        # query per lead and lets misses be answered from memory too.
+        if force or self.is_stale():
+            self._insights = await fetch_industry_insights(session)
+            self._loaded_at = self._clock()
+            self.loads += 1
+
+    def get(self, industry: str | None) -> IndustryInsight | None:
+        return self._insights.get(industry) if industry else None
 
 
 async def upsert_reply_pattern(
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, JSON, String, Text, UniqueConstraint, func
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, JSON, LargeBinary, String, Text, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from amis_agent.infrastructure.db.base import Base
@@ -11,6 +11,9 @@ from amis_agent.infrastructure.db.base import Base
 
 class CompanyModel(Base):
     __tablename__ = "companies"
+    __table_args__ = (
+        UniqueConstraint("name", "region", "source", name="uq_companies_name_region_source"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
@@ -42,6 +45,9 @@ class LeadModel(Base):
     verification_status: Mapped[Optional[str]] = mapped_column(String(64))
     opt_in: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     contact_id: Mapped[Optional[int]] = mapped_column(ForeignKey("contacts.id"), index=True)
+    dedupe_key: Mapped[Optional[str]] = mapped_column(String(512), unique=True, index=True)
+    claimed_by: Mapped[Optional[str]] = mapped_column(String(128))
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     company: Mapped[CompanyModel] = relationship(back_populates="leads")
@@ -61,6 +67,8 @@ class OutreachModel(Base):
     language: Mapped[Optional[str]] = mapped_column(String(32))
     status: Mapped[str] = mapped_column(String(32), nullable=False, default="queued")
     sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    claimed_by: Mapped[Optional[str]] = mapped_column(String(128))
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     lead: Mapped[LeadModel] = relationship(back_populates="outreach")
@@ -113,6 +121,14 @@ class CompanyQualificationModel(Base):
     company: Mapped[CompanyModel] = relationship(back_populates="qualification")
 
 
+class CompanySignatureModel(Base):
+    __tablename__ = "company_signatures"
+
+    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id"), primary_key=True)
+    signatures: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
 class ContactModel(Base):
     __tablename__ = "contacts"
     __table_args__ = (UniqueConstraint("company_id", "email", name="uq_contacts_company_email"),)
@@ -152,6 +168,8 @@ class OutboxModel(Base):
     approved_by_human: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     approved_by: Mapped[Optional[str]] = mapped_column(String(255))
     approved_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    claimed_by: Mapped[Optional[str]] = mapped_column(String(128))
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     lead: Mapped[LeadModel] = relationship(back_populates="outbox")
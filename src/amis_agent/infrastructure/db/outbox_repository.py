@@ -1,9 +1,31 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from dataclasses import dataclass
+
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from amis_agent.infrastructure.db.models import OutboxModel
+from amis_agent.infrastructure.db.claims import claim_ids
+from amis_agent.infrastructure.db.models import CompanyModel, ContactModel, LeadModel, OutboxModel
+from amis_agent.infrastructure.db.unit_of_work import save
+
+
+@dataclass(frozen=True)
+class OutboxDelivery:
+    draft: OutboxModel
+    lead: LeadModel | None
+    company: CompanyModel | None
+    contact: ContactModel | None
+
+
+def _delivery_select():
+    # Outer joins keep drafts whose lead or company is gone, so callers can report them.
+    return (
+        select(OutboxModel, LeadModel, CompanyModel, ContactModel)
+        .outerjoin(LeadModel, OutboxModel.lead_id == LeadModel.id)
+        .outerjoin(CompanyModel, LeadModel.company_id == CompanyModel.id)
+        .outerjoin(ContactModel, LeadModel.contact_id == ContactModel.id)
+    )
 
 
 async def create_draft(
@@ -35,8 +57,7 @@ async def create_draft(
         status="draft",
     )
     session.add(draft)
-    await session.commit()
-    await session.refresh(draft)
+    await save(session, draft)
     return draft
 
 
@@ -49,6 +70,23 @@ async def fetch_existing_draft(session: AsyncSession, *, lead_id: int) -> Outbox
     return (await session.execute(stmt)).scalar_one_or_none()
 
 
+async def fetch_existing_drafts(
+    session: AsyncSession, lead_ids: list[int]
+) -> dict[int, OutboxModel]:
+    if not lead_ids:
+        return {}
+    stmt = (
+        select(OutboxModel)
+        .where(OutboxModel.lead_id.in_(lead_ids))
+        .where(OutboxModel.status.in_(["draft", "ready_for_review"]))
+        .order_by(OutboxModel.id)
+    )
+    drafts: dict[int, OutboxModel] = {}
+    for draft in (await session.execute(stmt)).scalars():
+        drafts.setdefault(draft.lead_id, draft)
+    return drafts
+
+
 async def create_llm_draft(
     session: AsyncSession,
     *,
@@ -90,23 +128,45 @@ async def create_llm_draft(
         status=status,
     )
     session.add(draft)
-    await session.commit()
-    await session.refresh(draft)
+    await save(session, draft)
     return draft
 
 
-async def fetch_approved(session: AsyncSession, limit: int = 10) -> list[OutboxModel]:
-    stmt = (
-        select(OutboxModel)
-        .where(OutboxModel.status == "approved")
-        .where(OutboxModel.approved_by_human.is_(True))
-        .limit(limit)
+async def bulk_create_llm_drafts(session: AsyncSession, drafts: list[dict]) -> None:
+    # One multi-row INSERT per chunk; each dict holds create_llm_draft's arguments.
+    if not drafts:
+        return
+    await session.execute(insert(OutboxModel).values(drafts))
+
+
+async def fetch_deliveries(session: AsyncSession, outbox_ids: list[int]) -> list[OutboxDelivery]:
+    if not outbox_ids:
+        return []
+    stmt = _delivery_select().where(OutboxModel.id.in_(outbox_ids)).order_by(OutboxModel.id)
+    return [OutboxDelivery(*row) for row in (await session.execute(stmt)).all()]
+
+
+async def fetch_delivery(session: AsyncSession, outbox_id: int) -> OutboxDelivery | None:
+    row = (await session.execute(_delivery_select().where(OutboxModel.id == outbox_id))).first()
+    return OutboxDelivery(*row) if row else None
+
+
+async def claim_approved(
+    session: AsyncSession, *, worker_id: str, limit: int = 10, lease_s: int = 900
+) -> list[OutboxDelivery]:
+    ids = await claim_ids(
+        session,
+        OutboxModel,
+        OutboxModel.status == "approved",
+        OutboxModel.approved_by_human.is_(True),
+        worker_id=worker_id,
+        limit=limit,
+        lease_s=lease_s,
     )
-    return list((await session.execute(stmt)).scalars().all())
+    return await fetch_deliveries(session, ids)
 
 
 async def mark_sent(session: AsyncSession, draft: OutboxModel) -> OutboxModel:
     draft.status = "sent"
-    await session.commit()
-    await session.refresh(draft)
+    await save(session, draft)
     return draft
@@ -7,17 +7,15 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from amis_agent.application.services.outreach_processor import OutreachItem, OutreachResult
+from amis_agent.infrastructure.db.claims import claim_ids
 from amis_agent.infrastructure.db.models import LeadModel, OutreachModel
 
 
-async def fetch_queued_outreach(session: AsyncSession, limit: int = 10) -> list[OutreachItem]:
-    stmt = (
-        select(OutreachModel, LeadModel)
-        .join(LeadModel, OutreachModel.lead_id == LeadModel.id)
-        .where(OutreachModel.status == "queued")
-        .limit(limit)
-    )
-    rows = (await session.execute(stmt)).all()
+def _queued_outreach_select():
+    return select(OutreachModel, LeadModel).join(LeadModel, OutreachModel.lead_id == LeadModel.id)
+
+
+def _to_items(rows) -> list[OutreachItem]:
     items = []
     for outreach, lead in rows:
         items.append(
@@ -33,6 +31,23 @@ async def fetch_queued_outreach(session: AsyncSession, limit: int = 10) -> list[
     return items
 
 
+async def claim_queued_outreach(
+    session: AsyncSession, *, worker_id: str, limit: int = 10, lease_s: int = 900
+) -> list[OutreachItem]:
+    ids = await claim_ids(
+        session,
+        OutreachModel,
+        OutreachModel.status == "queued",
+        worker_id=worker_id,
+        limit=limit,
+        lease_s=lease_s,
+    )
+    if not ids:
+        return []
+    stmt = _queued_outreach_select().where(OutreachModel.id.in_(ids)).order_by(OutreachModel.id)
+    return _to_items((await session.execute(stmt)).all())
+
+
 async def apply_results(session: AsyncSession, results: Iterable[OutreachResult]) -> None:
     for result in results:
         stmt = select(OutreachModel).where(OutreachModel.id == result.outreach_id)
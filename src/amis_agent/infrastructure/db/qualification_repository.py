@@ -1,21 +1,62 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from amis_agent.infrastructure.db.dialect import upsert_insert
 from amis_agent.infrastructure.db.models import CompanyModel, CompanyQualificationModel
+from amis_agent.infrastructure.db.unit_of_work import save
+
 
+@dataclass(frozen=True)
+class QualificationRow:
+    company_id: int
+    decision: str
+    score: int
+    reason: str | None
 
-async def fetch_unqualified_companies(session: AsyncSession, limit: int = 100) -> list[CompanyModel]:
+
+async def fetch_unqualified_companies(
+    session: AsyncSession, limit: int = 100, *, after_id: int | None = None
+) -> list[CompanyModel]:
     stmt = (
         select(CompanyModel)
         .outerjoin(CompanyQualificationModel, CompanyQualificationModel.company_id == CompanyModel.id)
         .where(CompanyQualificationModel.id.is_(None))
+        .order_by(CompanyModel.id)
         .limit(limit)
+        # Each chunk is qualified inside this transaction, so row locks are enough for
+        # concurrent workers to split the backlog; SQLite ignores the clause.
+        .with_for_update(of=CompanyModel, skip_locked=True)
     )
+    if after_id is not None:
+        stmt = stmt.where(CompanyModel.id > after_id)
     return list((await session.execute(stmt)).scalars().all())
 
 
+async def bulk_upsert_qualifications(session: AsyncSession, rows: list[QualificationRow]) -> None:
+    if not rows:
+        return
+    stmt = upsert_insert(session, CompanyQualificationModel).values(
+        [
+            {"company_id": r.company_id, "decision": r.decision, "score": r.score, "reason": r.reason}
+            for r in rows
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["company_id"],
+        set_={
+            "decision": stmt.excluded.decision,
+            "score": stmt.excluded.score,
+            "reason": stmt.excluded.reason,
+            "decided_at": func.now(),
+        },
+    )
+    await session.execute(stmt)
+
+
 async def upsert_qualification(
     session: AsyncSession,
     *,
@@ -30,7 +71,7 @@ async def upsert_qualification(
         existing.decision = decision
         existing.score = score
         existing.reason = reason
-        await session.commit()
+        await save(session, existing)
         return existing
 
     entry = CompanyQualificationModel(
@@ -40,6 +81,5 @@ async def upsert_qualification(
         reason=reason,
     )
     session.add(entry)
-    await session.commit()
-    await session.refresh(entry)
+    await save(session, entry)
     return entry
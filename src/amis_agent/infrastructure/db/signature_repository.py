@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from amis_agent.application.services.near_duplicates import (
+    NearDuplicateIndex,
+    pack_signatures,
+    unpack_signatures,
+)
+from amis_agent.infrastructure.db.dialect import upsert_insert
+from amis_agent.infrastructure.db.models import CompanyModel, CompanySignatureModel, LeadModel
+
+
+async def bulk_insert_signatures(session: AsyncSession, signatures: dict[int, bytes]) -> None:
+    if not signatures:
+        return
+    stmt = upsert_insert(session, CompanySignatureModel).values(
+        [{"company_id": company_id, "signatures": raw} for company_id, raw in signatures.items()]
+    )
+    await session.execute(stmt.on_conflict_do_nothing(index_elements=["company_id"]))
+
+
+async def fetch_lead_company_regions(
+    session: AsyncSession, company_ids: set[int]
+) -> dict[int, str | None]:
+    if not company_ids:
+        return {}
+    stmt = (
+        select(CompanyModel.id, CompanyModel.region)
+        .where(CompanyModel.id.in_(company_ids))
+        .where(select(LeadModel.id).where(LeadModel.company_id == CompanyModel.id).exists())
+    )
+    return dict((await session.execute(stmt)).all())
+
+
+async def _sign_missing_companies(
+    session_factory: async_sessionmaker[AsyncSession],
+    index: NearDuplicateIndex,
+    *,
+    after_id: int,
+    chunk_size: int,
+) -> None:
+    while True:
+        async with session_factory() as session:
+            stmt = (
+                select(
+                    CompanyModel.id,
+                    CompanyModel.name,
+                    CompanyModel.website_url,
+                    CompanyModel.website_domain,
+                )
+                .outerjoin(CompanySignatureModel, CompanySignatureModel.company_id == CompanyModel.id)
+                .where(CompanyModel.id > after_id, CompanySignatureModel.company_id.is_(None))
+                .order_by(CompanyModel.id)
+                .limit(chunk_size)
+            )
+            rows = (await session.execute(stmt)).all()
+            if not rows:
+                return
+            await bulk_insert_signatures(
+                session,
+                {
+                    company_id: pack_signatures(
+                        index.signatures_for(name, website_domain or website_url)
+                    )
+                    for company_id, name, website_url, website_domain in rows
+                },
+            )
+            await session.commit()
+            after_id = rows[-1][0]
+
+
+async def sync_near_duplicate_index(
+    session_factory: async_sessionmaker[AsyncSession],
+    index: NearDuplicateIndex,
+    *,
+    chunk_size: int = 5000,
+) -> int:
+    # Companies are only read to sign the ones added since they were last signed; the
+    # buckets are then built from company_signatures alone, above index.last_company_id.
+    await _sign_missing_companies(
+        session_factory, index, after_id=index.last_company_id, chunk_size=chunk_size
+    )
+    added = 0
+    while True:
+        async with session_factory() as session:
+            stmt = (
+                select(CompanySignatureModel.company_id, CompanySignatureModel.signatures)
+                .where(CompanySignatureModel.company_id > index.last_company_id)
+                .order_by(CompanySignatureModel.company_id)
+                .limit(chunk_size)
+            )
+            rows = (await session.execute(stmt)).all()
+        if not rows:
+            return added
+        for company_id, raw in rows:
+            index.add(company_id, unpack_signatures(raw, index.hasher.num_perm))
+            index.last_company_id = max(index.last_company_id, company_id)
+        added += len(rows)
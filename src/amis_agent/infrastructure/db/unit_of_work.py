@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+
+_UNIT_OF_WORK_KEY = "amis_unit_of_work"
+
+
+class UnitOfWork:
+    def __init__(self, session: AsyncSession, commit_every: int, max_age_s: float | None = None):
+        self.session = session
+        self.commit_every = max(commit_every, 1)
+        self.max_age_s = max_age_s
+        self.pending = 0
+        self.commits = 0
+        self._opened_at: float | None = None
+
+    async def checkpoint(self) -> None:
+        # A unit of work is one chunk of rows; max_age_s keeps a slow chunk from
+        # holding its transaction (and SQLite's write lock) open indefinitely.
+        self.pending += 1
+        if self._opened_at is None:
+            self._opened_at = time.monotonic()
+        if self.pending >= self.commit_every or (
+            self.max_age_s is not None and time.monotonic() - self._opened_at >= self.max_age_s
+        ):
+            await self.commit()
+
+    async def commit(self) -> None:
+        await self.session.commit()
+        self.pending = 0
+        self.commits += 1
+        self._opened_at = None
+
+
+def in_unit_of_work(session: AsyncSession) -> bool:
+    return _UNIT_OF_WORK_KEY in session.info
+
+
+@asynccontextmanager
+async def unit_of_work(
+    session: AsyncSession, *, commit_every: int = 100, max_age_s: float | None = None
+) -> AsyncIterator[UnitOfWork]:
+    # Repositories only flush while this is active; the caller commits at chunk
+    # boundaries via checkpoint(), and whatever is left is committed on exit.
+    outer = session.info.get(_UNIT_OF_WORK_KEY)
+    if outer is not None:
+        yield outer
+        return
+    uow = UnitOfWork(session, commit_every, max_age_s)
+    session.info[_UNIT_OF_WORK_KEY] = uow
+    try:
+        yield uow
+        await uow.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+    finally:
+        session.info.pop(_UNIT_OF_WORK_KEY, None)
+
+
+async def save(session: AsyncSession, *instances: object) -> None:
+    inserted = [instance in session.new for instance in instances]
+    if in_unit_of_work(session):
+        # Updates ride along with the next autoflush or commit; new rows are flushed
+        # right away because callers usually need their primary keys.
+        if any(instance in session.new for instance in instances):
+            await session.flush()
+    else:
+        await session.commit()
+    for instance, was_new in zip(instances, inserted):
+        await load_server_defaults(session, instance, inserted=was_new)
+
+
+async def load_server_defaults(
+    session: AsyncSession, instance: object, *, inserted: bool = False
+) -> None:
+    # Server defaults normally come back through INSERT ... RETURNING, and columns left
+    # out of the INSERT without a server default are NULL. The database is only asked
+    # again for expired attributes or a server default the dialect could not return.
+    # Rows that were not inserted by this save may be partially loaded or deferred, so
+    # only their expired attributes are touched.
+    state = inspect(instance)
+    columns = state.mapper.column_attrs
+    missing: list[str] = []
+    for key in state.unloaded:
+        if key not in columns:
+            continue
+        column = columns[key].columns[0]
+        if key in state.expired_attributes:
+            missing.append(key)
+        elif not inserted:
+            continue
+        elif column.server_default is not None:
+            missing.append(key)
+        elif not column.primary_key:
+            set_committed_value(instance, key, None)
+    if missing:
+        await session.refresh(instance, attribute_names=missing)
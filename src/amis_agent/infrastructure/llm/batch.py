@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from amis_agent.core.config import get_settings
+
+
+TERMINAL_BATCH_STATES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+@dataclass(frozen=True)
+class BatchStatus:
+    id: str
+    status: str
+    output_file_id: str | None = None
+    error_file_id: str | None = None
+    request_counts: dict = field(default_factory=dict)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_BATCH_STATES
+
+
+def _batch_status(data: dict) -> BatchStatus:
+    return BatchStatus(
+        id=data["id"],
+        status=data.get("status", "unknown"),
+        output_file_id=data.get("output_file_id"),
+        error_file_id=data.get("error_file_id"),
+        request_counts=data.get("request_counts") or {},
+    )
+
+
+class LLMBatchClient:
+    # Speaks the OpenAI-style batch API: upload a JSONL file, create a batch over it,
+    # poll the batch, then download its output and error files.
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        api_key: str,
+        timeout_s: float,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"), headers=headers, timeout=timeout_s, transport=transport
+        )
+
+    async def upload_file(self, path: Path) -> str:
+        with path.open("rb") as handle:
+            resp = await self._client.post(
+                "/v1/files",
+                data={"purpose": "batch"},
+                files={"file": (path.name, handle, "application/jsonl")},
+            )
+        resp.raise_for_status()
+        return resp.json()["id"]
+
+    async def create_batch(
+        self,
+        input_file_id: str,
+        *,
+        endpoint: str = "/v1/chat/completions",
+        completion_window: str = "24h",
+        metadata: dict | None = None,
+    ) -> BatchStatus:
+        payload = {
+            "input_file_id": input_file_id,
+            "endpoint": endpoint,
+            "completion_window": completion_window,
+        }
+        if metadata:
+            payload["metadata"] = metadata
+        resp = await self._client.post("/v1/batches", json=payload)
+        resp.raise_for_status()
+        return _batch_status(resp.json())
+
+    async def get_batch(self, batch_id: str) -> BatchStatus:
+        resp = await self._client.get(f"/v1/batches/{batch_id}")
+        resp.raise_for_status()
+        return _batch_status(resp.json())
+
+    async def download_file(self, file_id: str) -> str:
+        resp = await self._client.get(f"/v1/files/{file_id}/content")
+        resp.raise_for_status()
+        return resp.text
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def build_llm_batch_client() -> LLMBatchClient:
+    settings = get_settings()
+    return LLMBatchClient(
+        base_url=settings.llm_base_url,
+        api_key=settings.llm_api_key,
+        timeout_s=settings.llm_timeout,
+    )
@@ -1,10 +1,30 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import json
+import os
+import random
 import time
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
 import httpx
 
+from amis_agent.core.config import get_settings
+from amis_agent.core.logging import get_logger
+from amis_agent.core.metrics import (
+    LLM_REQUEST_LATENCY,
+    LLM_RETRIES,
+    LLM_STREAM_ABORTS,
+    LLM_TOKENS,
+)
+
+
+logger = get_logger(component="llm_client")
+
 
 @dataclass(frozen=True)
 class LLMResponse:
@@ -46,3 +66,319 @@ class LLMClient:
         usage = data.get("usage")
         model_name = data.get("model")
         return LLMResponse(content=content, model=model_name, usage=usage, latency_ms=latency_ms)
+
+
+StreamCheck = Callable[[str], str | None]
+
+
+class LLMStreamAborted(RuntimeError):
+    def __init__(self, reason: str, content: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.content = content
+        self.usage: dict | None = None
+
+
+class LLMRetryableError(RuntimeError):
+    def __init__(self, reason: str, retry_after_s: float | None = None) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+def _decode_json(raw: str) -> dict:
+    # A truncated or garbled body is treated like a dropped connection: retried, and
+    # surfaced as LLMRetryableError once the attempts run out.
+    try:
+        data = json.loads(raw)
+    except ValueError as exc:
+        raise LLMRetryableError("invalid_json") from exc
+    if not isinstance(data, dict):
+        raise LLMRetryableError("invalid_json")
+    return data
+
+
+def parse_retry_after(value: str | None, *, now: datetime | None = None) -> float | None:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - (now or datetime.now(timezone.utc))).total_seconds(), 0.0)
+
+
+class AsyncLLMClient:
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        api_key: str,
+        timeout_s: float,
+        max_concurrency: int = 8,
+        max_connections: int = 20,
+        max_attempts: int = 4,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 20.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout_s = timeout_s
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        )
+        self._transport = transport
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._pid = os.getpid()
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+    async def _bind(self) -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        # Connections and the semaphore belong to one event loop (and one process, since
+        # RQ forks per job); rebuild both when either changes.
+        loop = asyncio.get_running_loop()
+        stale = self._client is None or self._client.is_closed or self._loop is not loop
+        forked = os.getpid() != self._pid
+        if stale or forked:
+            old = self._client
+            if old is not None and not old.is_closed and not forked:
+                # The pool was opened on a loop that has since finished; close what still
+                # can be so its sockets are not left to the garbage collector.
+                with contextlib.suppress(Exception):
+                    await old.aclose()
+            self._pid = os.getpid()
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout_s, limits=self.limits, transport=self._transport
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client, self._slots
+
+    def _backoff(self, attempt: int, retry_after_s: float | None) -> float:
+        # Full jitter, but never earlier than the server asked for.
+        delay = self._rng.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2**attempt))
+        if retry_after_s is not None:
+            delay = max(delay, retry_after_s)
+        return delay
+
+    async def _post_once(
+        self, client: httpx.AsyncClient, url: str, headers: dict, payload: dict
+    ) -> dict:
+        try:
+            resp = await client.post(url, headers=headers, json=payload)
+        except (httpx.TimeoutException, httpx.TransportError) as exc:
+            raise LLMRetryableError(type(exc).__name__.lower()) from exc
+        if resp.status_code == 429 or resp.status_code >= 500:
+            raise LLMRetryableError(
+                str(resp.status_code), parse_retry_after(resp.headers.get("Retry-After"))
+            )
+        resp.raise_for_status()
+        return _decode_json(resp.text)
+
+    async def _stream_once(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        headers: dict,
+        payload: dict,
+        check: StreamCheck | None,
+    ) -> dict:
+        chunks: list[str] = []
+        data: dict = {"model": None, "usage": None}
+        try:
+            async with client.stream("POST", url, headers=headers, json=payload) as resp:
+                if resp.status_code == 429 or resp.status_code >= 500:
+                    raise LLMRetryableError(
+                        str(resp.status_code), parse_retry_after(resp.headers.get("Retry-After"))
+                    )
+                if resp.status_code >= 400:
+                    await resp.aread()
+                    resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    raw = line[5:].strip()
+                    if raw == "[DONE]":
+                        break
+                    event = _decode_json(raw)
+                    data["model"] = event.get("model") or data["model"]
+                    data["usage"] = event.get("usage") or data["usage"]
+                    for choice in event.get("choices") or []:
+                        delta = (choice.get("delta") or {}).get("content")
+                        if not delta:
+                            continue
+                        chunks.append(delta)
+                        reason = check(delta) if check is not None else None
+                        if reason is not None:
+                            # Leaving the block closes the connection, which stops generation.
+                            raise LLMStreamAborted(reason, "".join(chunks))
+        except (httpx.TimeoutException, httpx.TransportError) as exc:
+            raise LLMRetryableError(type(exc).__name__.lower()) from exc
+        data["content"] = "".join(chunks)
+        return data
+
+    async def _send(self, model: str, send: Callable[[httpx.AsyncClient], Awaitable[dict]]) -> dict:
+        client, slots = await self._bind()
+        start = time.perf_counter()
+        status = "error"
+        attempt = 0
+        try:
+            while True:
+                # A slot is held only while a request is in flight, never while backing off.
+                async with slots:
+                    try:
+                        data = await send(client)
+                        break
+                    except LLMRetryableError as exc:
+                        attempt += 1
+                        if attempt >= self.max_attempts:
+                            raise
+                        if (exc.retry_after_s or 0) > self.backoff_max_s:
+                            # Waiting that long would stall the whole job; the lead is
+                            # retried by a later run instead.
+                            raise
+                        reason = exc.reason
+                        delay = self._backoff(attempt - 1, exc.retry_after_s)
+                LLM_RETRIES.labels(model, reason).inc()
+                logger.info("llm_retry", model=model, reason=reason, delay_s=round(delay, 2))
+                await self._sleep(delay)
+            status = "ok"
+        except LLMStreamAborted:
+            status = "aborted"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            LLM_REQUEST_LATENCY.labels(model, status).observe(elapsed)
+        data["latency_ms"] = int(elapsed * 1000)
+        return data
+
+    def _request(
+        self, model: str, messages: list[dict], max_tokens: int, temperature: float
+    ) -> tuple[str, dict, dict]:
+        url = f"{self.base_url}/v1/chat/completions"
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        return url, headers, payload
+
+    def _count_tokens(self, model: str, usage: dict | None) -> None:
+        if usage:
+            LLM_TOKENS.labels(model, "prompt").inc(usage.get("prompt_tokens") or 0)
+            LLM_TOKENS.labels(model, "completion").inc(usage.get("completion_tokens") or 0)
+
+    async def create_chat_completion(
+        self,
+        *,
+        model: str,
+        messages: list[dict],
+        max_tokens: int,
+        temperature: float = 0.4,
+    ) -> LLMResponse:
+        url, headers, payload = self._request(model, messages, max_tokens, temperature)
+        data = await self._send(
+            model, lambda client: self._post_once(client, url, headers, payload)
+        )
+        usage = data.get("usage")
+        self._count_tokens(model, usage)
+        return LLMResponse(
+            content=data["choices"][0]["message"]["content"],
+            model=data.get("model"),
+            usage=usage,
+            latency_ms=data["latency_ms"],
+        )
+
+    async def stream_chat_completion(
+        self,
+        *,
+        model: str,
+        messages: list[dict],
+        max_tokens: int,
+        temperature: float = 0.4,
+        check_factory: Callable[[], StreamCheck] | None = None,
+    ) -> LLMResponse:
+        # check_factory builds a fresh check per attempt, since a retried stream starts
+        # over; a check returning a reason aborts the stream with LLMStreamAborted.
+        url, headers, payload = self._request(model, messages, max_tokens, temperature)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        try:
+            data = await self._send(
+                model,
+                lambda client: self._stream_once(
+                    client, url, headers, payload, check_factory() if check_factory else None
+                ),
+            )
+        except LLMStreamAborted as exc:
+            # The provider never reports usage for a cut stream; estimate ~4 chars/token.
+            exc.usage = {
+                "prompt_tokens": len(json.dumps(messages)) // 4,
+                "completion_tokens": len(exc.content) // 4,
+                "estimated": True,
+            }
+            LLM_STREAM_ABORTS.labels(model, exc.reason).inc()
+            self._count_tokens(model, exc.usage)
+            raise
+        usage = data.get("usage")
+        self._count_tokens(model, usage)
+        return LLMResponse(
+            content=data["content"],
+            model=data.get("model"),
+            usage=usage,
+            latency_ms=data["latency_ms"],
+        )
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        self._loop = None
+        if client is not None:
+            await client.aclose()
+
+
+_async_client: AsyncLLMClient | None = None
+
+
+def get_async_llm_client() -> AsyncLLMClient:
+    global _async_client
+    if _async_client is None:
+        settings = get_settings()
+        _async_client = AsyncLLMClient(
+            base_url=settings.llm_base_url,
+            api_key=settings.llm_api_key,
+            timeout_s=settings.llm_timeout,
+            max_concurrency=settings.llm_max_concurrency,
+            max_connections=settings.llm_max_connections,
+            max_attempts=settings.llm_max_attempts,
+            backoff_base_s=settings.llm_backoff_base_s,
+            backoff_max_s=settings.llm_backoff_max_s,
+        )
+    return _async_client
+
+
+async def close_async_llm_client() -> None:
+    if _async_client is not None:
+        await _async_client.aclose()
+
+
+def set_async_llm_client(client: AsyncLLMClient | None) -> None:
+    global _async_client
+    _async_client = client
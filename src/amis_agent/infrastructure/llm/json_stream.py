@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+_WHITESPACE = " \t\r\n"
+
+
+class JSONObjectStream:
+    # Incremental parser for one top-level JSON object fed in arbitrary chunks. Each
+    # top-level field is decoded as soon as its value is complete, and the string
+    # value currently being streamed can be inspected before it is closed. Text
+    # before the first "{" (a code fence, say) is skipped.
+    def __init__(self) -> None:
+        self.fields: dict[str, Any] = {}
+        self.done = False
+        self._started = False
+        self._state = "before_key"
+        self._key: list[str] = []
+        self._current_key: str | None = None
+        self._value: list[str] = []
+        self._kind = ""
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> list[tuple[str, Any]]:
+        completed: list[tuple[str, Any]] = []
+        for ch in text:
+            if self.done:
+                break
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                continue
+            field = self._step(ch)
+            if field is not None:
+                completed.append(field)
+        return completed
+
+    def partial_string(self) -> tuple[str | None, str | None]:
+        if self._state != "value" or self._kind != "string":
+            return None, None
+        raw = "".join(self._value[1:])
+        # Drop a trailing escape sequence that has not fully arrived yet.
+        for cut in range(0, 7):
+            try:
+                return self._current_key, json.loads(f'"{raw[: len(raw) - cut]}"')
+            except ValueError:
+                continue
+        return self._current_key, None
+
+    def _step(self, ch: str) -> tuple[str, Any] | None:
+        state = self._state
+        if state == "before_key":
+            if ch == '"':
+                self._key = []
+                self._state = "key"
+            elif ch == "}":
+                self.done = True
+            elif ch not in _WHITESPACE and ch != ",":
+                raise ValueError(f"unexpected_character:{ch}")
+        elif state == "key":
+            if self._escape:
+                self._key.append(ch)
+                self._escape = False
+            elif ch == "\\":
+                self._key.append(ch)
+                self._escape = True
+            elif ch == '"':
+                self._current_key = json.loads('"' + "".join(self._key) + '"')
+                self._state = "colon"
+            else:
+                self._key.append(ch)
+        elif state == "colon":
+            if ch == ":":
+                self._state = "value_start"
+            elif ch not in _WHITESPACE:
+                raise ValueError(f"unexpected_character:{ch}")
+        elif state == "value_start":
+            if ch in _WHITESPACE:
+                return None
+            self._value = [ch]
+            self._state = "value"
+            if ch == '"':
+                self._kind = "string"
+            elif ch in "{[":
+                self._kind = "container"
+                self._depth = 1
+                self._in_string = False
+            else:
+                self._kind = "scalar"
+        elif state == "value":
+            return self._value_char(ch)
+        elif state == "after_value":
+            if ch == ",":
+                self._state = "before_key"
+            elif ch == "}":
+                self.done = True
+            elif ch not in _WHITESPACE:
+                raise ValueError(f"unexpected_character:{ch}")
+        return None
+
+    def _value_char(self, ch: str) -> tuple[str, Any] | None:
+        kind = self._kind
+        if kind == "scalar":
+            if ch in _WHITESPACE or ch in ",}":
+                field = self._complete()
+                if ch == ",":
+                    self._state = "before_key"
+                elif ch == "}":
+                    self.done = True
+                return field
+            self._value.append(ch)
+            return None
+        self._value.append(ch)
+        if kind == "string":
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                return self._complete()
+            return None
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+        elif ch == '"':
+            self._in_string = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                return self._complete()
+        return None
+
+    def _complete(self) -> tuple[str, Any]:
+        value = json.loads("".join(self._value))
+        key = self._current_key or ""
+        self.fields[key] = value
+        self._value = []
+        self._kind = ""
+        if self._state == "value":
+            self._state = "after_value"
+        return key, value
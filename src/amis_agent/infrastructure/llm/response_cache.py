@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Protocol
+
+import redis
+from redis import asyncio as redis_asyncio
+
+from amis_agent.core.config import get_settings
+from amis_agent.core.logging import get_logger
+from amis_agent.infrastructure.queue.redis import get_async_redis_client, get_redis_client
+
+
+logger = get_logger(component="llm_response_cache")
+
+# Store one response and record it in an insertion-ordered index. Expired index
+# members are dropped, then the oldest entries until the index fits max_entries.
+# Returns how many live entries were evicted for space.
+CACHE_PUT_LUA = """
+local ttl = tonumber(ARGV[2])
+local max_entries = tonumber(ARGV[3])
+local now = tonumber(redis.call('TIME')[1])
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ttl)
+redis.call('ZADD', KEYS[2], now, KEYS[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - ttl)
+local overflow = redis.call('ZCARD', KEYS[2]) - max_entries
+if overflow <= 0 then
+  return 0
+end
+local victims = redis.call('ZRANGE', KEYS[2], 0, overflow - 1)
+for _, victim in ipairs(victims) do
+  redis.call('DEL', victim)
+end
+redis.call('ZREMRANGEBYRANK', KEYS[2], 0, overflow - 1)
+return #victims
+"""
+
+
+@dataclass(frozen=True)
+class CachedLLMResponse:
+    output: dict
+    model: str
+    usage: dict | None = None
+
+    def total_tokens(self) -> int:
+        usage = self.usage or {}
+        total = usage.get("total_tokens")
+        if total is None:
+            total = (usage.get("prompt_tokens") or 0) + (usage.get("completion_tokens") or 0)
+        return int(total)
+
+
+class LLMResponseCache(Protocol):
+    def get(self, key: str) -> CachedLLMResponse | None:  # pragma: no cover
+        ...
+
+    def put(self, key: str, entry: CachedLLMResponse) -> int:  # pragma: no cover
+        ...
+
+    async def aget(self, key: str) -> CachedLLMResponse | None:  # pragma: no cover
+        ...
+
+    async def aput(self, key: str, entry: CachedLLMResponse) -> int:  # pragma: no cover
+        ...
+
+
+def _dump(entry: CachedLLMResponse) -> str:
+    return json.dumps(
+        {"output": entry.output, "model": entry.model, "usage": entry.usage}, sort_keys=True
+    )
+
+
+def _load(value: str | None) -> CachedLLMResponse | None:
+    if not value:
+        return None
+    try:
+        return CachedLLMResponse(**json.loads(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class RedisLLMResponseCache:
+    def __init__(
+        self,
+        *,
+        ttl_s: int,
+        max_entries: int,
+        prefix: str = "llm_response",
+        retry_after_s: float = 30.0,
+    ):
+        self.ttl_s = ttl_s
+        self.max_entries = max(max_entries, 1)
+        self.prefix = prefix
+        self.retry_after_s = retry_after_s
+        self.redis = get_redis_client()
+        self._script = self.redis.register_script(CACHE_PUT_LUA)
+        self._async_redis: redis_asyncio.Redis | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+        self._unavailable_until = 0.0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _index_key(self) -> str:
+        return f"{self.prefix}:index"
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _failed(self, exc: Exception) -> None:
+        # A cache outage must never fail a draft; skip Redis for a while instead of
+        # paying a connection error on every call.
+        logger.warning("llm_cache_unavailable", error=str(exc))
+        self._unavailable_until = time.monotonic() + self.retry_after_s
+
+    def _async_client(self) -> redis_asyncio.Redis:
+        loop = asyncio.get_running_loop()
+        if self._async_redis is None or self._async_loop is not loop:
+            self._async_redis = get_async_redis_client()
+            self._async_loop = loop
+        return self._async_redis
+
+    def get(self, key: str) -> CachedLLMResponse | None:
+        if not self._available():
+            return None
+        try:
+            return _load(self.redis.get(self._key(key)))
+        except redis.RedisError as exc:
+            self._failed(exc)
+            return None
+
+    def put(self, key: str, entry: CachedLLMResponse) -> int:
+        if not self._available():
+            return 0
+        try:
+            return int(
+                self._script(
+                    keys=[self._key(key), self._index_key()],
+                    args=[_dump(entry), self.ttl_s, self.max_entries],
+                )
+            )
+        except redis.RedisError as exc:
+            self._failed(exc)
+            return 0
+
+    async def aget(self, key: str) -> CachedLLMResponse | None:
+        if not self._available():
+            return None
+        try:
+            return _load(await self._async_client().get(self._key(key)))
+        except redis.RedisError as exc:
+            self._failed(exc)
+            return None
+
+    async def aput(self, key: str, entry: CachedLLMResponse) -> int:
+        if not self._available():
+            return 0
+        try:
+            script = self._async_client().register_script(CACHE_PUT_LUA)
+            return int(
+                await script(
+                    keys=[self._key(key), self._index_key()],
+                    args=[_dump(entry), self.ttl_s, self.max_entries],
+                )
+            )
+        except redis.RedisError as exc:
+            self._failed(exc)
+            return 0
+
+
+_llm_response_cache: RedisLLMResponseCache | None = None
+
+
+def get_llm_response_cache() -> LLMResponseCache | None:
+    global _llm_response_cache
+    settings = get_settings()
+    if settings.llm_cache_ttl_s <= 0 or settings.llm_cache_max_entries <= 0:
+        return None
+    if _llm_response_cache is None:
+        _llm_response_cache = RedisLLMResponseCache(
+            ttl_s=settings.llm_cache_ttl_s, max_entries=settings.llm_cache_max_entries
+        )
+    return _llm_response_cache
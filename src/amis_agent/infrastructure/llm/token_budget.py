@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Protocol
+
+import redis
+from redis import asyncio as redis_asyncio
+
+from amis_agent.core.config import get_settings
+from amis_agent.core.logging import get_logger
+from amis_agent.core.metrics import LLM_BUDGET_EXHAUSTED, LLM_COST_USD, LLM_DRAFT_TOKENS
+from amis_agent.infrastructure.queue.redis import get_async_redis_client
+
+
+logger = get_logger(component="llm_token_budget")
+
+_DAY_TTL_S = 35 * 86400
+_RUN_TTL_S = 7 * 86400
+
+
+class TokenBudgetExceeded(RuntimeError):
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class TokenLedgerStore(Protocol):
+    async def add(
+        self, key: str, fields: dict[str, int], ttl_s: int
+    ) -> dict[str, int]:  # pragma: no cover
+        ...
+
+    async def read(self, key: str) -> dict[str, int]:  # pragma: no cover
+        ...
+
+
+class LocalTokenLedgerStore:
+    def __init__(self) -> None:
+        self._hashes: dict[str, dict[str, int]] = {}
+
+    async def add(self, key: str, fields: dict[str, int], ttl_s: int) -> dict[str, int]:
+        counters = self._hashes.setdefault(key, {})
+        for name, amount in fields.items():
+            counters[name] = counters.get(name, 0) + amount
+        return dict(counters)
+
+    async def read(self, key: str) -> dict[str, int]:
+        return dict(self._hashes.get(key, {}))
+
+
+class RedisTokenLedgerStore:
+    def __init__(self) -> None:
+        self._redis: redis_asyncio.Redis | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _client(self) -> redis_asyncio.Redis:
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._loop is not loop:
+            self._redis = get_async_redis_client()
+            self._loop = loop
+        return self._redis
+
+    async def add(self, key: str, fields: dict[str, int], ttl_s: int) -> dict[str, int]:
+        pipe = self._client().pipeline(transaction=True)
+        for name, amount in fields.items():
+            pipe.hincrby(key, name, amount)
+        pipe.expire(key, ttl_s)
+        pipe.hgetall(key)
+        counters = (await pipe.execute())[-1]
+        return {name: int(value) for name, value in counters.items()}
+
+    async def read(self, key: str) -> dict[str, int]:
+        return {name: int(value) for name, value in (await self._client().hgetall(key)).items()}
+
+
+def _spent(counters: dict[str, int]) -> int:
+    # Reserved tokens belong to calls in flight, so they count against a budget too.
+    return counters.get("prompt", 0) + counters.get("completion", 0) + counters.get("reserved", 0)
+
+
+def _tokens(usage: dict | None) -> tuple[int, int]:
+    usage = usage or {}
+    prompt = int(usage.get("prompt_tokens") or 0)
+    completion = int(usage.get("completion_tokens") or 0)
+    if not prompt and not completion:
+        # Providers that only report a total are counted as prompt tokens.
+        prompt = int(usage.get("total_tokens") or 0)
+    return prompt, completion
+
+
+class TokenLedger:
+    # Counters live in one Redis hash per UTC day and one per run, with fields broken
+    # down by model and persona, so every worker charges the same budget.
+    def __init__(
+        self,
+        *,
+        daily_budget: int = 0,
+        run_budget: int = 0,
+        prompt_cost_per_1k: float = 0.0,
+        completion_cost_per_1k: float = 0.0,
+        store: TokenLedgerStore | None = None,
+        prefix: str = "llm_tokens",
+        now: Callable[[], datetime] | None = None,
+        retry_after_s: float = 30.0,
+    ) -> None:
+        self.daily_budget = daily_budget
+        self.run_budget = run_budget
+        self.prompt_cost_per_1k = prompt_cost_per_1k
+        self.completion_cost_per_1k = completion_cost_per_1k
+        self.store = store or RedisTokenLedgerStore()
+        self.prefix = prefix
+        self._now = now or (lambda: datetime.now(timezone.utc))
+        self.retry_after_s = retry_after_s
+        self._fallback: LocalTokenLedgerStore | None = None
+        self._unavailable_until = 0.0
+
+    def _day(self) -> str:
+        return self._now().date().isoformat()
+
+    def _day_key(self, day: str) -> str:
+        return f"{self.prefix}:day:{day}"
+
+    def _run_key(self, run_id: str) -> str:
+        return f"{self.prefix}:run:{run_id}"
+
+    def _store(self) -> TokenLedgerStore:
+        if self._fallback is not None and time.monotonic() < self._unavailable_until:
+            return self._fallback
+        return self.store
+
+    def _fallback_store(self, exc: Exception) -> LocalTokenLedgerStore:
+        # Budgets degrade to per-process counters rather than failing drafts, and Redis
+        # is tried again after a while so a long-lived process does not stay local.
+        logger.warning("llm_token_ledger_fallback_local", error=str(exc))
+        self._unavailable_until = time.monotonic() + self.retry_after_s
+        if self._fallback is None:
+            self._fallback = LocalTokenLedgerStore()
+        return self._fallback
+
+    async def _read(self, key: str) -> dict[str, int]:
+        try:
+            return await self._store().read(key)
+        except redis.RedisError as exc:
+            return await self._fallback_store(exc).read(key)
+
+    async def _add(self, key: str, fields: dict[str, int], ttl_s: int) -> dict[str, int]:
+        try:
+            return await self._store().add(key, fields, ttl_s)
+        except redis.RedisError as exc:
+            return await self._fallback_store(exc).add(key, fields, ttl_s)
+
+    def cost_usd(self, prompt: int, completion: int) -> float:
+        return (
+            prompt * self.prompt_cost_per_1k + completion * self.completion_cost_per_1k
+        ) / 1000
+
+    async def exhausted(self, run_id: str) -> str | None:
+        if self.daily_budget > 0:
+            if _spent(await self._read(self._day_key(self._day()))) >= self.daily_budget:
+                return "daily_token_budget_exhausted"
+        if self.run_budget > 0:
+            if _spent(await self._read(self._run_key(run_id))) >= self.run_budget:
+                return "run_token_budget_exhausted"
+        return None
+
+    def _refuse(self, reason: str | None, action: str) -> str | None:
+        if reason is None:
+            return None
+        LLM_BUDGET_EXHAUSTED.labels(reason.split("_", 1)[0], action).inc()
+        if action == "defer":
+            raise TokenBudgetExceeded(reason)
+        return reason
+
+    async def check(self, run_id: str, *, action: str) -> str | None:
+        return self._refuse(await self.exhausted(run_id), action)
+
+    async def _hold(self, run_id: str, tokens: int) -> tuple[dict[str, int], dict[str, int]]:
+        fields = {"reserved": tokens}
+        day = await self._add(self._day_key(self._day()), fields, _DAY_TTL_S)
+        run = await self._add(self._run_key(run_id), fields, _RUN_TTL_S)
+        return day, run
+
+    async def reserve(self, run_id: str, tokens: int, *, action: str) -> str | None:
+        # The estimate is added first (HINCRBY) and the budget compared after, so every
+        # concurrent caller sees the others' reservations: a call only goes ahead if the
+        # budget was not already spent or reserved, and a budget is overshot by at most
+        # one call's tokens. A granted reservation must be handed back with release().
+        if self.daily_budget <= 0 and self.run_budget <= 0:
+            return None
+        day, run = await self._hold(run_id, tokens)
+        reason = None
+        if self.daily_budget > 0 and _spent(day) - tokens >= self.daily_budget:
+            reason = "daily_token_budget_exhausted"
+        elif self.run_budget > 0 and _spent(run) - tokens >= self.run_budget:
+            reason = "run_token_budget_exhausted"
+        if reason is not None:
+            await self.release(run_id, tokens)
+        return self._refuse(reason, action)
+
+    async def release(self, run_id: str, tokens: int) -> None:
+        if self.daily_budget <= 0 and self.run_budget <= 0:
+            return
+        await self._hold(run_id, -tokens)
+
+    async def record(
+        self, usage: dict | None, *, model: str, persona: str | None, run_id: str
+    ) -> None:
+        prompt, completion = _tokens(usage)
+        if not prompt and not completion:
+            return
+        persona = persona or "unknown"
+        fields = {
+            "prompt": prompt,
+            "completion": completion,
+            f"model:{model}:prompt": prompt,
+            f"model:{model}:completion": completion,
+            f"persona:{persona}:prompt": prompt,
+            f"persona:{persona}:completion": completion,
+        }
+        await self._add(self._day_key(self._day()), fields, _DAY_TTL_S)
+        await self._add(self._run_key(run_id), fields, _RUN_TTL_S)
+        LLM_DRAFT_TOKENS.labels(model, persona, "prompt").inc(prompt)
+        LLM_DRAFT_TOKENS.labels(model, persona, "completion").inc(completion)
+        LLM_COST_USD.labels(model, persona).inc(self.cost_usd(prompt, completion))
+
+    def _breakdown(self, counters: dict[str, int], kind: str) -> dict[str, dict[str, int]]:
+        found: dict[str, dict[str, int]] = {}
+        for name, value in counters.items():
+            scope, _, rest = name.partition(":")
+            label, _, token_kind = rest.rpartition(":")
+            if scope == kind and label:
+                found.setdefault(label, {"prompt": 0, "completion": 0})[token_kind] = value
+        return found
+
+    async def summary(self, *, day: str | None = None, run_id: str | None = None) -> dict:
+        day = day or self._day()
+        key = self._run_key(run_id) if run_id else self._day_key(day)
+        counters = await self._read(key)
+        prompt, completion = counters.get("prompt", 0), counters.get("completion", 0)
+        budget = self.run_budget if run_id else self.daily_budget
+        summary = {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "cost_usd": round(self.cost_usd(prompt, completion), 4),
+            "budget": budget or None,
+            "remaining": max(budget - prompt - completion, 0) if budget else None,
+            "by_model": self._breakdown(counters, "model"),
+            "by_persona": self._breakdown(counters, "persona"),
+        }
+        if run_id:
+            summary["run_id"] = run_id
+        else:
+            summary["day"] = day
+        return summary
+
+
+_token_ledger: TokenLedger | None = None
+
+
+def get_token_ledger() -> TokenLedger:
+    global _token_ledger
+    if _token_ledger is None:
+        settings = get_settings()
+        _token_ledger = TokenLedger(
+            daily_budget=settings.llm_daily_token_budget,
+            run_budget=settings.llm_run_token_budget,
+            prompt_cost_per_1k=settings.llm_prompt_cost_per_1k,
+            completion_cost_per_1k=settings.llm_completion_cost_per_1k,
+        )
+    return _token_ledger
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import redis
+from redis import asyncio as redis_asyncio
 
 from amis_agent.core.config import get_settings
 
 
-settings = get_settings()
-
-
 def get_redis_client() -> redis.Redis:
-    return redis.Redis.from_url(settings.redis_url, decode_responses=True)
+    return redis.Redis.from_url(get_settings().redis_url, decode_responses=True)
+
 
+def get_async_redis_client() -> redis_asyncio.Redis:
+    return redis_asyncio.Redis.from_url(get_settings().redis_url, decode_responses=True)
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
-import time
+import asyncio
+import atexit
+import importlib.util
+import os
+import threading
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
 from dataclasses import dataclass
 from urllib.parse import urlparse
 
@@ -8,6 +14,10 @@ import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from amis_agent.core.config import get_settings
+from amis_agent.core.logging import get_logger
+
+
+logger = get_logger(component="http_client")
 
 
 @dataclass(frozen=True)
@@ -15,29 +25,195 @@ class HttpResponse:
     url: str
     status_code: int
     text: str
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class HttpClientPool:
+    def __init__(
+        self,
+        *,
+        user_agent: str,
+        timeout_s: float,
+        max_connections: int,
+        max_keepalive_connections: int,
+        max_connections_per_host: int,
+        keepalive_expiry_s: float,
+        http2: bool = False,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("http2_unavailable", reason="h2 package not installed")
+            http2 = False
+        self.user_agent = user_agent
+        self.timeout_s = timeout_s
+        self.http2 = http2
+        self.max_connections_per_host = max(max_connections_per_host, 1)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_s,
+        )
+        self._transport = transport
+        self._async_transport = async_transport
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._client: httpx.Client | None = None
+        self._async_client: httpx.AsyncClient | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._async_host_slots: dict[str, asyncio.Semaphore] = {}
+
+    def _check_fork(self) -> None:
+        # RQ forks a work horse per job; sockets inherited from the parent must not be reused.
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._client = None
+            self._async_client = None
+            self._async_loop = None
+            self._host_slots = {}
+            self._async_host_slots = {}
+
+    def client(self) -> httpx.Client:
+        with self._lock:
+            self._check_fork()
+            if self._client is None or self._client.is_closed:
+                self._client = httpx.Client(
+                    timeout=self.timeout_s,
+                    headers={"User-Agent": self.user_agent},
+                    limits=self.limits,
+                    http2=self.http2,
+                    transport=self._transport,
+                )
+            return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._check_fork()
+            # Async connections are bound to the loop that opened them.
+            stale = self._async_client is None or self._async_client.is_closed
+            if stale or self._async_loop is not loop:
+                self._async_client = httpx.AsyncClient(
+                    timeout=self.timeout_s,
+                    headers={"User-Agent": self.user_agent},
+                    limits=self.limits,
+                    http2=self.http2,
+                    transport=self._async_transport,
+                )
+                self._async_loop = loop
+                self._async_host_slots = {}
+            return self._async_client
+
+    @contextmanager
+    def host_slot(self, host: str) -> Iterator[None]:
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_connections_per_host)
+                self._host_slots[host] = slot
+        with slot:
+            yield
+
+    @asynccontextmanager
+    async def async_host_slot(self, host: str) -> AsyncIterator[None]:
+        slot = self._async_host_slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(self.max_connections_per_host)
+            self._async_host_slots[host] = slot
+        async with slot:
+            yield
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        client = self._async_client
+        self._async_client = None
+        self._async_loop = None
+        if client is not None:
+            await client.aclose()
+        self.close()
+
+
+_pool: HttpClientPool | None = None
+_pool_lock = threading.Lock()
+
 
+def get_http_pool() -> HttpClientPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            settings = get_settings()
+            _pool = HttpClientPool(
+                user_agent=settings.scrape_user_agent,
+                timeout_s=settings.scrape_timeout_s,
+                max_connections=settings.scrape_max_connections,
+                max_keepalive_connections=settings.scrape_max_keepalive_connections,
+                max_connections_per_host=settings.scrape_max_connections_per_host,
+                keepalive_expiry_s=settings.scrape_keepalive_expiry_s,
+                http2=settings.scrape_http2,
+            )
+        return _pool
 
-class RateLimiter:
-    def __init__(self):
-        self._last_by_host: dict[str, float] = {}
-        self._min_interval = 1.0 / max(get_settings().scrape_rate_limit_per_host, 1)
 
-    def wait(self, host: str) -> None:
-        now = time.time()
-        last = self._last_by_host.get(host)
-        if last is not None:
-            delta = now - last
-            if delta < self._min_interval:
-                time.sleep(self._min_interval - delta)
-        self._last_by_host[host] = time.time()
+def set_http_pool(pool: HttpClientPool | None) -> None:
+    global _pool
+    with _pool_lock:
+        _pool = pool
+
+
+def close_http_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+async def aclose_http_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        await pool.aclose()
+
+
+atexit.register(close_http_pool)
+
+
+def _to_response(url: str, resp: httpx.Response) -> HttpResponse:
+    return HttpResponse(
+        url=url,
+        status_code=resp.status_code,
+        text=resp.text,
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified"),
+    )
 
 
 @retry(wait=wait_exponential(min=1, max=8), stop=stop_after_attempt(3), reraise=True)
-def fetch(url: str, *, timeout_s: int) -> HttpResponse:
-    headers = {"User-Agent": get_settings().scrape_user_agent}
-    with httpx.Client(timeout=timeout_s, headers=headers) as client:
-        resp = client.get(url)
-        return HttpResponse(url=url, status_code=resp.status_code, text=resp.text)
+def fetch(url: str, *, timeout_s: int, headers: dict[str, str] | None = None) -> HttpResponse:
+    pool = get_http_pool()
+    host = urlparse(url).hostname or ""
+    with pool.host_slot(host):
+        resp = pool.client().get(url, timeout=timeout_s, headers=headers)
+    return _to_response(url, resp)
+
+
+@retry(wait=wait_exponential(min=1, max=8), stop=stop_after_attempt(3), reraise=True)
+async def fetch_async(
+    url: str, *, timeout_s: int, headers: dict[str, str] | None = None
+) -> HttpResponse:
+    pool = get_http_pool()
+    host = urlparse(url).hostname or ""
+    async with pool.async_host_slot(host):
+        resp = await pool.async_client().get(url, timeout=timeout_s, headers=headers)
+    return _to_response(url, resp)
 
 
 def ensure_allowed_domain(url: str) -> None:
@@ -47,4 +223,3 @@ def ensure_allowed_domain(url: str) -> None:
     host = urlparse(url).hostname or ""
     if not any(host == d or host.endswith(f".{d}") for d in allowed):
         raise ValueError("domain_not_allowed")
-
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from amis_agent.core.config import get_settings
+from amis_agent.core.logging import get_logger
+from amis_agent.core.metrics import PAGE_CACHE_BYTES_SAVED, PAGE_CACHE_EVENTS
+from amis_agent.infrastructure.scraping.http_client import HttpResponse, fetch, fetch_async
+
+
+logger = get_logger(component="page_cache")
+
+ConditionalFetcher = Callable[..., HttpResponse]
+AsyncConditionalFetcher = Callable[..., Awaitable[HttpResponse]]
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    url: str
+    body: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+
+@dataclass
+class PageCacheStats:
+    hits: int = 0
+    misses: int = 0
+    revalidated: int = 0
+    stored: int = 0
+    evicted: int = 0
+    bytes_saved: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "stored": self.stored,
+            "evicted": self.evicted,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+class PageCache:
+    def __init__(self, path: str, *, max_bytes: int, ttl_s: float) -> None:
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.stats = PageCacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "fetched_at REAL NOT NULL, last_access REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_last_access ON pages (last_access)")
+
+    def get(self, url: str) -> CachedPage | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+        body, etag, last_modified, fetched_at = row
+        return CachedPage(
+            url=url, body=body, etag=etag, last_modified=last_modified, fetched_at=fetched_at
+        )
+
+    def is_fresh(self, page: CachedPage, now: float | None = None) -> bool:
+        return ((now or time.time()) - page.fetched_at) < self.ttl_s
+
+    def get_fresh(self, url: str) -> str | None:
+        cached = self.get(url)
+        if cached is None or not self.is_fresh(cached):
+            return None
+        self._record("hits", len(cached.body.encode("utf-8")))
+        return cached.body
+
+    def put(self, url: str, body: str, *, etag: str | None, last_modified: str | None) -> None:
+        now = time.time()
+        size = len(body.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO pages (url, body, etag, last_modified, fetched_at, last_access, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET body = excluded.body, etag = excluded.etag, "
+                "last_modified = excluded.last_modified, fetched_at = excluded.fetched_at, "
+                "last_access = excluded.last_access, size = excluded.size",
+                (url, body, etag, last_modified, now, now, size),
+            )
+            self._evict()
+        self._record("stored")
+
+    def touch(self, url: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url)
+            )
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0])
+
+    def _evict(self) -> None:
+        total = int(self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0])
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for url, size in self._conn.execute(
+            "SELECT url, size FROM pages ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+        self.stats.evicted += evicted
+        PAGE_CACHE_EVENTS.labels("evicted").inc(evicted)
+
+    def _record(self, event: str, saved_bytes: int = 0) -> None:
+        setattr(self.stats, event, getattr(self.stats, event) + 1)
+        PAGE_CACHE_EVENTS.labels(event).inc()
+        if saved_bytes:
+            self.stats.bytes_saved += saved_bytes
+            PAGE_CACHE_BYTES_SAVED.inc(saved_bytes)
+
+    def _cached_response(self, cached: CachedPage) -> HttpResponse:
+        return HttpResponse(
+            url=cached.url,
+            status_code=200,
+            text=cached.body,
+            etag=cached.etag,
+            last_modified=cached.last_modified,
+        )
+
+    def _validators(self, cached: CachedPage | None) -> dict[str, str] | None:
+        headers: dict[str, str] = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        return headers or None
+
+    def _store_response(self, url: str, cached: CachedPage | None, resp: HttpResponse) -> HttpResponse:
+        if resp.status_code == 304 and cached:
+            self.touch(url)
+            self._record("revalidated", len(cached.body.encode("utf-8")))
+            return self._cached_response(cached)
+        self._record("misses")
+        if resp.status_code == 200:
+            self.put(url, resp.text, etag=resp.etag, last_modified=resp.last_modified)
+        return resp
+
+    def fetch(
+        self,
+        url: str,
+        *,
+        timeout_s: int,
+        fetcher: ConditionalFetcher = fetch,
+    ) -> HttpResponse:
+        cached = self.get(url)
+        if cached and self.is_fresh(cached):
+            self._record("hits", len(cached.body.encode("utf-8")))
+            return self._cached_response(cached)
+        resp = fetcher(url, timeout_s=timeout_s, headers=self._validators(cached))
+        return self._store_response(url, cached, resp)
+
+    async def fetch_async(
+        self,
+        url: str,
+        *,
+        timeout_s: int,
+        fetcher: AsyncConditionalFetcher = fetch_async,
+    ) -> HttpResponse:
+        cached = self.get(url)
+        if cached and self.is_fresh(cached):
+            self._record("hits", len(cached.body.encode("utf-8")))
+            return self._cached_response(cached)
+        resp = await fetcher(url, timeout_s=timeout_s, headers=self._validators(cached))
+        return self._store_response(url, cached, resp)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_page_cache: PageCache | None = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache | None:
+    global _page_cache
+    settings = get_settings()
+    if not settings.scrape_page_cache_path:
+        return None
+    with _page_cache_lock:
+        if _page_cache is None:
+            try:
+                _page_cache = PageCache(
+                    settings.scrape_page_cache_path,
+                    max_bytes=settings.scrape_page_cache_max_bytes,
+                    ttl_s=settings.scrape_page_cache_ttl_s,
+                )
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("page_cache_unavailable", error=str(exc))
+                return None
+        return _page_cache
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Protocol
+
+import redis
+from redis import asyncio as redis_asyncio
+
+from amis_agent.core.config import get_settings
+from amis_agent.core.logging import get_logger
+from amis_agent.infrastructure.queue.redis import get_async_redis_client, get_redis_client
+
+
+logger = get_logger(component="scrape_rate_limit")
+
+# Reserve one token from the host bucket and return how long the caller must wait
+# before using it. Tokens may go negative so concurrent callers queue up in order
+# without polling. Uses the server clock so every worker shares one timeline.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+local wait = 0
+if tokens < 0 then
+  wait = -tokens / rate
+end
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst / rate + wait) * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class TokenBucketStore(Protocol):
+    def reserve(self, host: str, *, rate_per_s: float, burst: int) -> float:  # pragma: no cover
+        ...
+
+    async def areserve(
+        self, host: str, *, rate_per_s: float, burst: int
+    ) -> float:  # pragma: no cover
+        ...
+
+
+class LocalTokenBucketStore:
+    def __init__(self) -> None:
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, host: str, *, rate_per_s: float, burst: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(host, (float(burst), now))
+            tokens = min(float(burst), tokens + max(0.0, now - ts) * rate_per_s) - 1
+            self._buckets[host] = (tokens, now)
+        return -tokens / rate_per_s if tokens < 0 else 0.0
+
+    async def areserve(self, host: str, *, rate_per_s: float, burst: int) -> float:
+        return self.reserve(host, rate_per_s=rate_per_s, burst=burst)
+
+
+class RedisTokenBucketStore:
+    def __init__(self, prefix: str = "scrape_bucket"):
+        self.prefix = prefix
+        self.redis = get_redis_client()
+        self._script = self.redis.register_script(TOKEN_BUCKET_LUA)
+        self._async_redis: redis_asyncio.Redis | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+
+    def _key(self, host: str) -> str:
+        return f"{self.prefix}:{host}"
+
+    def reserve(self, host: str, *, rate_per_s: float, burst: int) -> float:
+        return float(self._script(keys=[self._key(host)], args=[rate_per_s, burst]))
+
+    async def areserve(self, host: str, *, rate_per_s: float, burst: int) -> float:
+        loop = asyncio.get_running_loop()
+        if self._async_redis is None or self._async_loop is not loop:
+            self._async_redis = get_async_redis_client()
+            self._async_loop = loop
+        script = self._async_redis.register_script(TOKEN_BUCKET_LUA)
+        return float(await script(keys=[self._key(host)], args=[rate_per_s, burst]))
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        store: TokenBucketStore | None = None,
+        *,
+        rate_per_s: float | None = None,
+        burst: int | None = None,
+    ):
+        settings = get_settings()
+        self.store = store or RedisTokenBucketStore()
+        self.rate_per_s = rate_per_s or float(max(settings.scrape_rate_limit_per_host, 1))
+        self.burst = max(burst or settings.scrape_rate_limit_burst, 1)
+        self._fallback: LocalTokenBucketStore | None = None
+        self._host_rates: dict[str, float] = {}
+
+    def set_host_interval(self, host: str, interval_s: float) -> None:
+        if interval_s <= 0:
+            return
+        self._host_rates[host] = min(self.rate_per_s, 1.0 / interval_s)
+
+    def rate_for(self, host: str) -> float:
+        return self._host_rates.get(host, self.rate_per_s)
+
+    def _fallback_store(self, exc: Exception) -> LocalTokenBucketStore:
+        if self._fallback is None:
+            logger.warning("scrape_rate_limit_fallback_local", error=str(exc))
+            self._fallback = LocalTokenBucketStore()
+        return self._fallback
+
+    def reserve(self, host: str) -> float:
+        rate = self.rate_for(host)
+        try:
+            return self.store.reserve(host, rate_per_s=rate, burst=self.burst)
+        except redis.RedisError as exc:
+            return self._fallback_store(exc).reserve(host, rate_per_s=rate, burst=self.burst)
+
+    def wait(self, host: str) -> None:
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self, host: str) -> None:
+        rate = self.rate_for(host)
+        try:
+            delay = await self.store.areserve(host, rate_per_s=rate, burst=self.burst)
+        except redis.RedisError as exc:
+            delay = self._fallback_store(exc).reserve(host, rate_per_s=rate, burst=self.burst)
+        if delay > 0:
+            await asyncio.sleep(delay)
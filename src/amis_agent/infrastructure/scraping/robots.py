@@ -1,32 +1,123 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+from dataclasses import dataclass, field
 from typing import Protocol
 from urllib.parse import urljoin, urlparse
 from urllib.robotparser import RobotFileParser
 
+import redis
+from tenacity import stop_after_attempt
+
+from amis_agent.core.config import get_settings
+from amis_agent.core.logging import get_logger
+from amis_agent.infrastructure.queue.redis import get_redis_client
 from amis_agent.infrastructure.scraping.http_client import fetch
+from amis_agent.infrastructure.scraping.rate_limit import RateLimiter
+
+
+logger = get_logger(component="robots")
+
+
+class RobotsStore(Protocol):
+    def get(self, host: str) -> dict | None:  # pragma: no cover
+        ...
+
+    def set(self, host: str, entry: dict, ttl_s: int) -> None:  # pragma: no cover
+        ...
+
+
+class RedisRobotsStore:
+    def __init__(self, prefix: str = "robots"):
+        self.prefix = prefix
+        self.redis = get_redis_client()
+
+    def _key(self, host: str) -> str:
+        return f"{self.prefix}:{host}"
+
+    def get(self, host: str) -> dict | None:
+        value = self.redis.get(self._key(host))
+        if not value:
+            return None
+        return json.loads(value)
+
+    def set(self, host: str, entry: dict, ttl_s: int) -> None:
+        self.redis.set(self._key(host), json.dumps(entry), ex=ttl_s)
+
+
+def _download(robots_url: str) -> dict:
+    # One attempt only: a dead host should cost one timeout, not the retrying fetch's ~30s.
+    single_fetch = fetch.retry_with(stop=stop_after_attempt(1))
+    try:
+        resp = single_fetch(robots_url, timeout_s=get_settings().scrape_robots_timeout_s)
+    except Exception as exc:  # noqa: BLE001
+        return {"status": "error", "code": None, "body": "", "error": str(exc)}
+    if resp.status_code == 200:
+        return {"status": "ok", "code": 200, "body": resp.text}
+    if 400 <= resp.status_code < 500:
+        return {"status": "missing", "code": resp.status_code, "body": ""}
+    return {"status": "error", "code": resp.status_code, "body": ""}
+
+
+def build_parser(robots_url: str, entry: dict) -> RobotFileParser:
+    parser = RobotFileParser()
+    parser.set_url(robots_url)
+    status = entry.get("status")
+    if status == "ok":
+        parser.parse(entry.get("body", "").splitlines())
+    elif status == "missing" and entry.get("code") in (401, 403):
+        parser.disallow_all = True
+    elif status == "missing":
+        parser.allow_all = True
+    # "error" leaves the parser unread, so can_fetch() refuses until the entry expires.
+    return parser
 
 
 @dataclass
 class RobotsCache:
     cache: dict[str, RobotFileParser]
+    store: RobotsStore | None = field(default_factory=RedisRobotsStore)
+    rate_limiter: RateLimiter | None = None
+
+    def _ttl_for(self, status: str) -> int:
+        settings = get_settings()
+        if status == "ok":
+            return settings.scrape_robots_ttl_s
+        if status == "missing":
+            return settings.scrape_robots_missing_ttl_s
+        return settings.scrape_robots_error_ttl_s
+
+    def _load_entry(self, host: str, robots_url: str) -> dict:
+        if self.store is not None:
+            try:
+                entry = self.store.get(host)
+            except redis.RedisError as exc:
+                logger.warning("robots_store_unavailable", error=str(exc))
+                entry = None
+            if entry is not None:
+                return entry
+        entry = _download(robots_url)
+        if self.store is not None:
+            try:
+                self.store.set(host, entry, self._ttl_for(entry["status"]))
+            except redis.RedisError as exc:
+                logger.warning("robots_store_unavailable", error=str(exc))
+        return entry
+
+    def _apply_crawl_delay(self, host: str, parser: RobotFileParser, user_agent: str) -> None:
+        if self.rate_limiter is None:
+            return
+        delay = parser.crawl_delay(user_agent)
+        if delay:
+            hostname = urlparse(f"//{host}").hostname or host
+            self.rate_limiter.set_host_interval(hostname, float(delay))
 
     def get(self, base_url: str, user_agent: str) -> RobotFileParser:
         host = urlparse(base_url).netloc
-        if host in self.cache:
-            return self.cache[host]
-        robots_url = urljoin(base_url, "/robots.txt")
-        parser = RobotFileParser()
-        parser.set_url(robots_url)
-        try:
-            resp = fetch(robots_url, timeout_s=10)
-            if resp.status_code == 200:
-                parser.parse(resp.text.splitlines())
-            else:
-                parser.disallow_all = False
-        except Exception:  # noqa: BLE001
-            parser.disallow_all = False
-        self.cache[host] = parser
+        parser = self.cache.get(host)
+        if parser is None:
+            robots_url = urljoin(base_url, "/robots.txt")
+            parser = build_parser(robots_url, self._load_entry(host, robots_url))
+            self.cache[host] = parser
+        self._apply_crawl_delay(host, parser, user_agent)
         return parser
-
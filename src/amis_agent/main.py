@@ -9,6 +9,7 @@ from amis_agent.api.routes.health import router as health_router
 from amis_agent.core.config import get_settings
 from amis_agent.core.logging import configure_logging, get_logger
 from amis_agent.core.metrics import setup_metrics
+from amis_agent.infrastructure.scraping.http_client import aclose_http_pool
 
 
 def create_app() -> FastAPI:
@@ -20,6 +21,7 @@ def create_app() -> FastAPI:
     async def lifespan(_: FastAPI):
         logger.info("startup", environment=settings.environment)
         yield
+        await aclose_http_pool()
         logger.info("shutdown")
 
     app = FastAPI(title="AMIS Digital Me Agent", version="0.1.0", lifespan=lifespan)
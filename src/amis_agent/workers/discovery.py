@@ -1,11 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from dataclasses import dataclass
+from collections.abc import Callable, Iterator
+from itertools import islice
+from typing import Protocol
 
-from amis_agent.application.services.discovery import BusinessListing, discover_businesses
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from amis_agent.application.services.discovery import (
+    BusinessListing,
+    ConnectorStats,
+    discover_businesses_async,
+    run_in_daemon_thread,
+)
+from amis_agent.core.config import get_settings
 from amis_agent.core.logging import get_logger
+from amis_agent.core.metrics import DISCOVERY_CONNECTOR_ITEMS, DISCOVERY_CONNECTOR_LATENCY
 from amis_agent.infrastructure.connectors.sources import build_connectors
-from amis_agent.infrastructure.db.company_repository import upsert_company
+from amis_agent.infrastructure.db.company_repository import (
+    BulkUpsertResult,
+    CompanyUpsert,
+    bulk_upsert_companies,
+)
 from amis_agent.infrastructure.db.session import SessionLocal
 
 
@@ -18,6 +36,19 @@ class DiscoveryResult:
     inserted: int
 
 
+class StreamingConnector(Protocol):
+    def iter_listings(
+        self, *, region: str, page_budget: int | None = None
+    ) -> Iterator[BusinessListing]:  # pragma: no cover
+        ...
+
+
+def _acker(connector: object) -> Callable[[list[BusinessListing]], None] | None:
+    # Incremental connectors only mark listings as seen once they are acked, which
+    # happens after the chunk holding them has been committed.
+    return getattr(connector, "ack", None)
+
+
 def map_listing_to_status(listing: BusinessListing) -> tuple[str | None, str | None]:
     if listing.has_website is True:
         return "has_website", listing.website_url
@@ -26,33 +57,157 @@ def map_listing_to_status(listing: BusinessListing) -> tuple[str | None, str | N
     return None, listing.website_url
 
 
-def run() -> None:
-    connectors = build_connectors()
-    listings = discover_businesses(
-        [c.connector for c in connectors], region="US", limit=50
+def listing_to_upsert(listing: BusinessListing) -> CompanyUpsert:
+    status, website_url = map_listing_to_status(listing)
+    return CompanyUpsert(
+        name=listing.name,
+        region=listing.region,
+        website_status=status,
+        website_url=website_url,
+        source=listing.source,
     )
 
-    inserted = 0
-    if listings:
-        async def _persist() -> int:
-            count = 0
-            async with SessionLocal() as session:
-                for listing in listings:
-                    status, website_url = map_listing_to_status(listing)
-                    await upsert_company(
-                        session,
-                        name=listing.name,
-                        region=listing.region,
-                        website_status=status,
-                        website_url=website_url,
-                        source=listing.source,
+
+def _chunks(listings: Iterator[BusinessListing], size: int) -> Iterator[list[BusinessListing]]:
+    try:
+        while chunk := list(islice(listings, size)):
+            yield chunk
+    finally:
+        close = getattr(listings, "close", None)
+        if close is not None:
+            close()
+
+
+async def stream_source(
+    name: str,
+    connector: StreamingConnector,
+    *,
+    region: str,
+    chunk_size: int,
+    page_budget: int | None = None,
+    connector_timeout_s: float | None = None,
+    deadline: float | None = None,
+    session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+) -> tuple[BulkUpsertResult, ConnectorStats]:
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    status, error = "ok", None
+    items = inserted = updated = 0
+    hung = False
+    # The connector blocks on HTTP and rate limiting, so each chunk is pulled in a
+    # daemon thread (see discover_businesses_async); only one chunk is ever held in
+    # memory. A pull that outlives its timeout is abandoned, never joined.
+    chunks = _chunks(connector.iter_listings(region=region, page_budget=page_budget), chunk_size)
+    ack = _acker(connector)
+    try:
+        async with session_factory() as session:
+            while True:
+                timeout, reason = connector_timeout_s, "connector_timeout"
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        status, error = "timeout", "deadline_exceeded"
+                        break
+                    if timeout is None or remaining < timeout:
+                        timeout, reason = remaining, "deadline_exceeded"
+                try:
+                    chunk = await asyncio.wait_for(
+                        run_in_daemon_thread(loop, name, lambda: next(chunks, None)), timeout
                     )
-                    count += 1
-            return count
+                except asyncio.TimeoutError:
+                    status, error, hung = "timeout", reason, True
+                    break
+                if chunk is None:
+                    break
+                result = await bulk_upsert_companies(
+                    session,
+                    [listing_to_upsert(listing) for listing in chunk],
+                    chunk_size=chunk_size,
+                )
+                if ack is not None:
+                    await asyncio.to_thread(ack, chunk)
+                items += len(chunk)
+                inserted += result.inserted
+                updated += result.updated
+    except Exception as exc:  # noqa: BLE001
+        status, error = "error", str(exc)
+    finally:
+        # A hung pull still owns the generator, so it cannot be closed from here.
+        if not hung:
+            await run_in_daemon_thread(loop, name, chunks.close)
 
-        import asyncio
+    stat = ConnectorStats(
+        name=name,
+        status=status,
+        items=items,
+        latency_ms=int((time.perf_counter() - start) * 1000),
+        error=error,
+    )
+    DISCOVERY_CONNECTOR_LATENCY.labels(name, status).observe(stat.latency_ms / 1000)
+    DISCOVERY_CONNECTOR_ITEMS.labels(name).inc(items)
+    if status != "ok":
+        logger.warning("discovery_stream_failed", connector=name, status=status, error=error)
+    return BulkUpsertResult(inserted=inserted, updated=updated), stat
 
-        inserted = asyncio.run(_persist())
 
-    logger.info("discovery_job_finished", total=len(listings), inserted=inserted)
+def run() -> None:
+    settings = get_settings()
+    connectors = build_connectors()
+    streaming = [c for c in connectors if hasattr(c.connector, "iter_listings")]
+    batch = [c for c in connectors if not hasattr(c.connector, "iter_listings")]
 
+    async def _run() -> tuple[int, BulkUpsertResult, list[ConnectorStats]]:
+        deadline = time.monotonic() + settings.discovery_deadline_s
+        report = await discover_businesses_async(
+            {c.name: c.connector for c in batch},
+            region="US",
+            limit=50,
+            connector_timeout_s=settings.discovery_connector_timeout_s,
+            deadline_s=settings.discovery_deadline_s,
+        )
+        inserted = updated = 0
+        if report.listings:
+            async with SessionLocal() as session:
+                result = await bulk_upsert_companies(
+                    session,
+                    (listing_to_upsert(listing) for listing in report.listings),
+                    chunk_size=settings.discovery_upsert_chunk_size,
+                )
+            inserted, updated = result.inserted, result.updated
+            for c in batch:
+                if (ack := _acker(c.connector)) is not None:
+                    await asyncio.to_thread(ack, report.listings)
+        streamed = await asyncio.gather(
+            *(
+                stream_source(
+                    c.name,
+                    c.connector,
+                    region="US",
+                    chunk_size=settings.discovery_upsert_chunk_size,
+                    connector_timeout_s=settings.discovery_connector_timeout_s,
+                    deadline=deadline,
+                )
+                for c in streaming
+            )
+        )
+        stats = list(report.stats)
+        total = len(report.listings)
+        for result, stat in streamed:
+            inserted += result.inserted
+            updated += result.updated
+            total += stat.items
+            stats.append(stat)
+        return total, BulkUpsertResult(inserted=inserted, updated=updated), stats
+
+    total, result, stats = asyncio.run(_run())
+
+    logger.info(
+        "discovery_job_finished",
+        total=total,
+        inserted=result.inserted,
+        updated=result.updated,
+        connectors={
+            stat.name: {"status": stat.status, "items": stat.items, "latency_ms": stat.latency_ms}
+            for stat in stats
+        },
+    )
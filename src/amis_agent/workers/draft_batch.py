@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+
+from amis_agent.application.services.batch_drafting import (
+    BatchManifest,
+    BatchManifestStore,
+    ingest_draft_batch,
+    submit_draft_batch,
+    wait_for_batch,
+)
+from amis_agent.application.services.lead_pipeline import assert_transition
+from amis_agent.application.services.llm_email_writer import LLMEmailInput, LLMEmailWriter
+from amis_agent.core.config import get_settings
+from amis_agent.core.logging import get_logger
+from amis_agent.infrastructure.db.claims import release_claims
+from amis_agent.infrastructure.db.lead_repository import (
+    bulk_set_lead_status,
+    claim_draft_candidates,
+)
+from amis_agent.infrastructure.db.models import LeadModel
+from amis_agent.infrastructure.db.outbox_repository import fetch_existing_drafts
+from amis_agent.infrastructure.db.session import SessionLocal
+from amis_agent.infrastructure.llm.batch import LLMBatchClient, build_llm_batch_client
+from amis_agent.infrastructure.llm.token_budget import TokenBudgetExceeded, get_token_ledger
+from amis_agent.workers.drafting import build_draft_inputs, build_insight_cache
+
+
+logger = get_logger(worker="draft_batch")
+
+
+async def collect_batch_inputs(
+    session,
+    *,
+    max_items: int,
+    exclude: set[int],
+    worker_id: str,
+    lease_s: int,
+    chunk_size: int = 500,
+) -> list[LLMEmailInput]:
+    # Candidates are claimed like the online sweep's, so the two never draft the same
+    # lead; the returned leads stay claimed until their batch is ingested.
+    insights = build_insight_cache()
+    inputs: list[LLMEmailInput] = []
+    after_id = 0
+    while len(inputs) < max_items:
+        candidates = await claim_draft_candidates(
+            session,
+            worker_id=worker_id,
+            after_id=after_id,
+            limit=min(chunk_size, max_items - len(inputs)),
+            lease_s=lease_s,
+        )
+        if not candidates:
+            break
+        after_id = candidates[-1].lead.id
+        ids = [c.lead.id for c in candidates]
+        existing = await fetch_existing_drafts(session, ids)
+        # Same as online drafting: a lead that already has a draft just moves on.
+        done = [c for c in candidates if c.lead.id in existing and c.lead.id not in exclude]
+        for candidate in done:
+            assert_transition(candidate.lead.status, "ready_for_review")
+        await bulk_set_lead_status(session, [c.lead.id for c in done], "ready_for_review")
+        pending = [c for c in candidates if c.lead.id not in existing and c.lead.id not in exclude]
+        kept = {c.lead.id for c in pending}
+        await release_claims(
+            session, LeadModel, [i for i in ids if i not in kept], worker_id=worker_id
+        )
+        await insights.refresh(session)
+        inputs.extend(build_draft_inputs(pending, insights))
+    return inputs
+
+
+async def resume_batch(
+    session, client: LLMBatchClient, store: BatchManifestStore, manifest: BatchManifest
+) -> BatchManifest:
+    settings = get_settings()
+    batch = await wait_for_batch(
+        client,
+        manifest.batch_id,
+        poll_interval_s=settings.llm_batch_poll_interval_s,
+        max_wait_s=settings.llm_batch_max_wait_s,
+    )
+    if not batch.finished:
+        manifest.status = batch.status
+        store.save(manifest)
+        logger.info("draft_batch_pending", batch_id=batch.id, status=batch.status)
+        return manifest
+    return await ingest_draft_batch(
+        session,
+        client,
+        store,
+        manifest,
+        batch,
+        commit_every=settings.db_commit_every,
+        ledger=get_token_ledger(),
+    )
+
+
+async def run_async(
+    batch_id: str | None = None,
+    *,
+    client: LLMBatchClient | None = None,
+    session_factory=SessionLocal,
+) -> list[BatchManifest]:
+    settings = get_settings()
+    store = BatchManifestStore(settings.llm_batch_dir)
+    owns_client = client is None
+    client = client or build_llm_batch_client()
+    try:
+        async with session_factory() as session:
+            if batch_id is not None:
+                manifest = store.load(batch_id)
+                if manifest is None:
+                    logger.warning("draft_batch_manifest_missing", batch_id=batch_id)
+                    return []
+                return [await resume_batch(session, client, store, manifest)]
+
+            manifests = [
+                await resume_batch(session, client, store, manifest)
+                for manifest in store.open_batches()
+            ]
+            in_flight = {
+                lead_id
+                for manifest in manifests
+                if manifest.ingested_at is None
+                for lead_id in manifest.lead_ids
+            }
+            writer = LLMEmailWriter()
+            try:
+                # Batches only ever defer: nothing is drafted until the budget allows.
+                await writer.budget.check(writer.run_id, action="defer")
+            except TokenBudgetExceeded as exc:
+                logger.info("draft_batch_deferred", reason=exc.reason)
+                return manifests
+            worker_id = f"draft_batch:{writer.run_id}"
+            inputs = await collect_batch_inputs(
+                session,
+                max_items=settings.llm_batch_max_items,
+                exclude=in_flight,
+                worker_id=worker_id,
+                lease_s=settings.llm_batch_lease_s,
+            )
+            try:
+                submitted = await submit_draft_batch(
+                    client, store, inputs, writer=writer, worker_id=worker_id
+                )
+            except BaseException:
+                await session.rollback()
+                await release_claims(
+                    session, LeadModel, [data.lead.id for data in inputs], worker_id=worker_id
+                )
+                raise
+            if submitted is not None:
+                manifests.append(submitted)
+            return manifests
+    finally:
+        if owns_client:
+            await client.aclose()
+
+
+def run(batch_id: str | None = None) -> None:
+    manifests = asyncio.run(run_async(batch_id))
+    logger.info(
+        "draft_batch_job_finished",
+        batches=[(m.batch_id, m.status, m.ingested_at is not None) for m in manifests],
+    )
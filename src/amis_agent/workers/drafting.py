@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+
+from amis_agent.application.services.llm_email_writer import (
+    LLMEmailInput,
+    LLMEmailWriter,
+    write_outbox_drafts,
+)
+from amis_agent.application.services.templates import (
+    DEFAULT_TONE,
+    TONE_BY_PERSONA,
+    VALUE_PROPS,
+    pick_persona,
+)
+from amis_agent.core.config import get_settings
+from amis_agent.core.logging import get_logger
+from amis_agent.infrastructure.db.claims import default_worker_id, release_claims
+from amis_agent.infrastructure.db.lead_repository import DraftCandidate, claim_draft_candidates
+from amis_agent.infrastructure.db.models import LeadModel
+from amis_agent.infrastructure.db.memory_repository import IndustryInsightCache
+from amis_agent.infrastructure.db.session import SessionLocal
+from amis_agent.infrastructure.llm.client import close_async_llm_client
+
+
+logger = get_logger(worker="drafting")
+
+
+def build_insight_cache() -> IndustryInsightCache:
+    # RQ forks a fresh process per job, so the snapshot lives for one job: it is loaded
+    # once per job and the TTL only bounds how stale it gets during a long one.
+    return IndustryInsightCache(get_settings().insight_cache_ttl_s)
+
+
+def build_draft_inputs(
+    candidates: list[DraftCandidate], insights: IndustryInsightCache
+) -> list[LLMEmailInput]:
+    inputs = []
+    for candidate in candidates:
+        company = candidate.company
+        insight = insights.get(company.industry)
+        persona = (
+            insight.preferred_persona
+            if insight and insight.preferred_persona
+            else pick_persona(company.industry)
+        )
+        inputs.append(
+            LLMEmailInput(
+                lead=candidate.lead,
+                company=company,
+                contact=candidate.contact,
+                snippets={"about": company.about_snippet, "contact": None},
+                value_props=VALUE_PROPS,
+                persona=persona,
+                tone=TONE_BY_PERSONA.get(persona, DEFAULT_TONE),
+            )
+        )
+    return inputs
+
+
+async def generate_drafts(
+    session_factory=SessionLocal,
+    *,
+    lead_ids: list[int] | None = None,
+    chunk_size: int = 100,
+    insights: IndustryInsightCache | None = None,
+    writer: LLMEmailWriter | None = None,
+    bypass_cache: bool = False,
+    worker_id: str | None = None,
+    lease_s: int = 900,
+) -> int:
+    insights = insights or build_insight_cache()
+    writer = writer or LLMEmailWriter()
+    worker_id = worker_id or default_worker_id()
+    generated = 0
+    after_id = 0
+    # Keyset pages keep only one chunk of leads in memory. Each page is claimed, so the
+    # sweep and the id-scoped jobs never pay for the same lead twice, and is read in its
+    # own short session; the writer opens its own to persist, so the LLM calls in
+    # between never hold a connection.
+    while True:
+        async with session_factory() as session:
+            candidates = await claim_draft_candidates(
+                session,
+                worker_id=worker_id,
+                after_id=after_id,
+                limit=chunk_size,
+                lease_s=lease_s,
+                lead_ids=lead_ids,
+            )
+            if not candidates:
+                return generated
+            await insights.refresh(session)
+        after_id = candidates[-1].lead.id
+        try:
+            inputs = build_draft_inputs(candidates, insights)
+            drafts = await write_outbox_drafts(
+                session_factory, inputs, writer=writer, bypass_cache=bypass_cache
+            )
+        finally:
+            async with session_factory() as session:
+                await release_claims(
+                    session, LeadModel, [c.lead.id for c in candidates], worker_id=worker_id
+                )
+        generated += sum(draft is not None for draft in drafts)
+        if None in drafts:
+            # The token budget is spent; the remaining leads wait for the next run.
+            return generated
+
+
+async def run_async(
+    lead_ids: list[int] | None = None,
+    *,
+    bypass_cache: bool = False,
+    budget_action: str | None = None,
+    session_factory=SessionLocal,
+    writer: LLMEmailWriter | None = None,
+) -> int:
+    settings = get_settings()
+    if lead_ids is None and settings.llm_draft_mode == "batch":
+        # The sweep belongs to draft_batch then; explicit lead ids (a regenerate) still run.
+        return 0
+    try:
+        return await generate_drafts(
+            session_factory,
+            lead_ids=lead_ids,
+            chunk_size=settings.draft_chunk_size,
+            writer=writer or LLMEmailWriter(budget_action=budget_action),
+            bypass_cache=bypass_cache,
+            lease_s=settings.work_lease_s,
+        )
+    finally:
+        # The shared client's pool belongs to this job's event loop.
+        await close_async_llm_client()
+
+
+def run(
+    lead_ids: list[int] | None = None,
+    bypass_cache: bool = False,
+    budget_action: str | None = None,
+) -> None:
+    drafts = asyncio.run(
+        run_async(lead_ids, bypass_cache=bypass_cache, budget_action=budget_action)
+    )
+    logger.info(
+        "drafting_job_finished",
+        drafts=drafts,
+        leads=len(lead_ids) if lead_ids is not None else None,
+    )
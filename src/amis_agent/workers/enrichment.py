@@ -1,149 +1,216 @@
 from __future__ import annotations
 
 import asyncio
-
-from sqlalchemy import select
-
-from amis_agent.application.services.llm_email_writer import write_outbox_draft
-from amis_agent.application.services.templates import pick_persona
-from amis_agent.application.services.enrichment import EmailEnricher
-from amis_agent.application.services.lead_pipeline import assert_transition
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from amis_agent.application.services.enrichment import (
+    DomainAllowlist,
+    EmailEnricher,
+    EnrichmentResult,
+)
+from amis_agent.application.services.jobs import enqueue_drafting
 from amis_agent.core.config import get_settings
 from amis_agent.core.logging import get_logger
+from amis_agent.infrastructure.db.claims import default_worker_id, release_claims
+from amis_agent.infrastructure.db.company_repository import set_about_snippet
 from amis_agent.infrastructure.db.contact_repository import upsert_contact
-from amis_agent.infrastructure.db.lead_repository import create_lead, fetch_leads_for_enrichment, update_lead
-from amis_agent.infrastructure.db.models import CompanyModel, ContactModel, LeadModel
-from amis_agent.infrastructure.db.memory_repository import get_industry_insight
+from amis_agent.infrastructure.db.lead_repository import (
+    EnrichmentCompany,
+    claim_leads_for_enrichment,
+    create_lead,
+    update_lead,
+)
+from amis_agent.infrastructure.db.models import LeadModel
 from amis_agent.infrastructure.db.session import SessionLocal
-from urllib.parse import urlparse
+from amis_agent.infrastructure.db.unit_of_work import unit_of_work
 
 
 logger = get_logger(worker="enrichment")
 
 
-def run() -> None:
-    asyncio.run(run_async())
-
-
-async def run_async() -> None:
-    settings = get_settings()
-    enricher = EmailEnricher()
-    async with SessionLocal() as session:
-        leads = await fetch_leads_for_enrichment(session)
-        processed = 0
-        for lead in leads:
-            company = (
-                await session.execute(select(CompanyModel).where(CompanyModel.id == lead.company_id))
-            ).scalar_one_or_none()
-            if not company or not company.website_url:
-                await update_lead(session, lead, contact_status="missing_email", status="enriched")
-                processed += 1
-                continue
-            allowed_domains = {
-                d.strip().lower()
-                for d in settings.enrich_allowed_domains.split(",")
-                if d.strip()
-            }
-            if allowed_domains:
-                host = urlparse(company.website_url).hostname or ""
-                if not any(host == d or host.endswith(f".{d}") for d in allowed_domains):
-                    await update_lead(session, lead, contact_status="missing_email", status="enriched")
-                    processed += 1
-                    continue
-
-            result = enricher.enrich(
-                website_url=company.website_url,
-                user_agent=settings.scrape_user_agent,
-                timeout_s=settings.scrape_timeout_s,
-            )
-            if result.personalization_line and company.about_snippet != result.personalization_line:
-                company.about_snippet = result.personalization_line
-                await session.commit()
-
-            if not result.emails:
-                await update_lead(session, lead, contact_status="missing_email", status="enriched")
-                processed += 1
-                continue
-
-            primary = result.emails[0]
-            contact = await upsert_contact(
-                session,
-                company_id=company.id,
-                email=primary.email,
-                source_url=primary.source_url,
-                confidence=primary.confidence,
-            )
-            await update_lead(
-                session,
-                lead,
-                contact_email=primary.email,
-                contact_status="found",
-                status="enriched",
-                contact_id=contact.id,
-            )
-
-            for extra in result.emails[1:]:
-                contact_extra = await upsert_contact(
-                    session,
-                    company_id=company.id,
-                    email=extra.email,
-                    source_url=extra.source_url,
-                    confidence=extra.confidence,
-                )
-                await create_lead(
-                    session,
-                    company_id=company.id,
-                    region=company.region,
-                    contact_email=extra.email,
-                    contact_status="found",
-                    status="enriched",
-                    contact_id=contact_extra.id,
+@dataclass(frozen=True)
+class EnrichmentJob:
+    lead: LeadModel
+    company: EnrichmentCompany
+
+
+async def enrich_concurrently(
+    enricher: EmailEnricher,
+    jobs: list[EnrichmentJob],
+    *,
+    user_agent: str,
+    timeout_s: int,
+    concurrency: int,
+    lead_timeout_s: float,
+) -> AsyncIterator[tuple[EnrichmentJob, EnrichmentResult | None]]:
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    # A lead that timed out or failed comes back with None rather than an empty result,
+    # so a transient error is retried instead of being recorded as missing_email.
+    async def _enrich(job: EnrichmentJob) -> tuple[EnrichmentJob, EnrichmentResult | None]:
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(
+                    enricher.enrich_async(
+                        website_url=job.company.website_url,
+                        user_agent=user_agent,
+                        timeout_s=timeout_s,
+                    ),
+                    timeout=lead_timeout_s,
                 )
+            except asyncio.TimeoutError:
+                logger.warning("enrichment_lead_timeout", lead_id=job.lead.id)
+                result = None
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("enrichment_lead_failed", lead_id=job.lead.id, error=str(exc))
+                result = None
+            return job, result
+
+    tasks = [asyncio.ensure_future(_enrich(job)) for job in jobs]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _apply_enrichment(
+    session, lead: LeadModel, company: EnrichmentCompany, result: EnrichmentResult
+) -> list[int]:
+    if result.personalization_line and company.about_snippet != result.personalization_line:
+        await set_about_snippet(session, company.id, result.personalization_line)
+
+    if not result.emails:
+        await update_lead(session, lead, contact_status="missing_email", status="enriched")
+        return [lead.id]
+
+    primary = result.emails[0]
+    contact = await upsert_contact(
+        session,
+        company_id=company.id,
+        email=primary.email,
+        source_url=primary.source_url,
+        confidence=primary.confidence,
+    )
+    await update_lead(
+        session,
+        lead,
+        contact_email=primary.email,
+        contact_status="found",
+        status="enriched",
+        contact_id=contact.id,
+    )
 
-            processed += 1
+    enriched = [lead.id]
+    for extra in result.emails[1:]:
+        contact_extra = await upsert_contact(
+            session,
+            company_id=company.id,
+            email=extra.email,
+            source_url=extra.source_url,
+            confidence=extra.confidence,
+        )
+        extra_lead = await create_lead(
+            session,
+            company_id=company.id,
+            region=company.region,
+            contact_email=extra.email,
+            contact_status="found",
+            status="enriched",
+            contact_id=contact_extra.id,
+        )
+        enriched.append(extra_lead.id)
+    return enriched
 
-        await _generate_drafts(session)
-        logger.info("enrichment_job_finished", processed=processed, drafts="generated")
 
+def run() -> None:
+    asyncio.run(run_async())
 
-async def _generate_drafts(session) -> None:
-    stmt = (
-        select(LeadModel, CompanyModel, ContactModel)
-        .join(CompanyModel, LeadModel.company_id == CompanyModel.id)
-        .outerjoin(ContactModel, LeadModel.contact_id == ContactModel.id)
-        .where(LeadModel.status == "enriched")
-        .where(LeadModel.contact_status.in_(["found", "missing_email"]))
-    )
-    rows = (await session.execute(stmt)).all()
-    for lead, company, contact in rows:
-        insight = await get_industry_insight(session, company.industry)
-        persona = insight.preferred_persona if insight and insight.preferred_persona else pick_persona(
-            company.industry
-        )
-        snippets = {
-            "about": company.about_snippet,
-            "contact": None,
-        }
-        value_props = [
-            "automation of repetitive tasks",
-            "faster response times",
-            "reduced operational overhead",
-        ]
-        tone_by_persona = {
-            "Founder": "formal, concise, founder-to-founder",
-            "CTO": "formal, technical, concise",
-            "Ops": "formal, operations-focused, concise",
-        }
-        await write_outbox_draft(
+
+async def run_async(
+    *, session_factory=SessionLocal, enricher: EmailEnricher | None = None
+) -> None:
+    settings = get_settings()
+    enricher = enricher or EmailEnricher()
+    allowlist = DomainAllowlist.from_csv(settings.enrich_allowed_domains)
+    worker_id = default_worker_id()
+    async with session_factory() as session:
+        candidates = await claim_leads_for_enrichment(
             session,
-            lead=lead,
-            company=company,
-            contact=contact,
-            snippets=snippets,
-            value_props=value_props,
-            persona=persona,
-            tone=tone_by_persona.get(persona, "formal, concise"),
-            status="ready_for_review",
+            worker_id=worker_id,
+            limit=settings.enrich_batch_size,
+            lease_s=settings.work_lease_s,
         )
-        assert_transition(lead.status, "ready_for_review")
-        await update_lead(session, lead, status="ready_for_review")
+        claimed = [c.lead.id for c in candidates]
+        processed = failed = 0
+        enriched: list[int] = []
+        try:
+            async with unit_of_work(
+                session,
+                commit_every=settings.db_commit_every,
+                max_age_s=settings.db_commit_max_age_s,
+            ) as uow:
+                jobs: list[EnrichmentJob] = []
+                for candidate in candidates:
+                    lead, company = candidate.lead, candidate.company
+                    if not company or not company.website_url:
+                        await update_lead(
+                            session, lead, contact_status="missing_email", status="enriched"
+                        )
+                        enriched.append(lead.id)
+                        processed += 1
+                        await uow.checkpoint()
+                        continue
+                    if not allowlist.allows(company.website_url):
+                        await update_lead(
+                            session, lead, contact_status="missing_email", status="enriched"
+                        )
+                        enriched.append(lead.id)
+                        processed += 1
+                        await uow.checkpoint()
+                        continue
+                    jobs.append(EnrichmentJob(lead=lead, company=company))
+
+                # Fetching fans out across leads; this loop is the only writer on the session.
+                async for job, result in enrich_concurrently(
+                    enricher,
+                    jobs,
+                    user_agent=settings.scrape_user_agent,
+                    timeout_s=settings.scrape_timeout_s,
+                    concurrency=settings.enrich_concurrency,
+                    lead_timeout_s=settings.enrich_lead_timeout_s,
+                ):
+                    if result is None:
+                        # The lead stays new; its claim is released below for the next run.
+                        failed += 1
+                        continue
+                    enriched.extend(
+                        await _apply_enrichment(session, job.lead, job.company, result)
+                    )
+                    processed += 1
+                    await uow.checkpoint()
+        except BaseException:
+            # A failed flush leaves the session unusable until it is rolled back, and
+            # the claims below must still be released.
+            await session.rollback()
+            raise
+        finally:
+            await release_claims(session, LeadModel, claimed, worker_id=worker_id)
+
+    # Drafting is its own stage: this job only hands the enriched lead ids to the draft
+    # queue, so enrichment never waits on (or holds a connection through) LLM calls.
+    draft_jobs = []
+    if settings.llm_draft_mode != "batch":
+        chunk_size = max(settings.draft_chunk_size, 1)
+        for start in range(0, len(enriched), chunk_size):
+            draft_jobs.append(enqueue_drafting(lead_ids=enriched[start : start + chunk_size]))
+    logger.info(
+        "enrichment_job_finished",
+        processed=processed,
+        failed=failed,
+        enriched=len(enriched),
+        draft_jobs=len(draft_jobs),
+        page_cache=enricher.page_cache.stats.as_dict() if enricher.page_cache else None,
+    )
@@ -3,8 +3,11 @@ from __future__ import annotations
 import asyncio
 
 from amis_agent.application.services.outreach_processor import process_outreach_items
+from amis_agent.core.config import get_settings
 from amis_agent.core.logging import get_logger
-from amis_agent.infrastructure.db.outreach_repository import apply_results, fetch_queued_outreach
+from amis_agent.infrastructure.db.claims import default_worker_id, release_claims
+from amis_agent.infrastructure.db.models import OutreachModel
+from amis_agent.infrastructure.db.outreach_repository import apply_results, claim_queued_outreach
 from amis_agent.infrastructure.db.session import SessionLocal
 from amis_agent.infrastructure.db.suppression_repository import fetch_suppressed_emails
 from amis_agent.infrastructure.email.gmail_sender import from_settings
@@ -26,20 +29,32 @@ def run() -> None:
     asyncio.run(run_async())
 
 
-async def run_async() -> None:
-    sender = from_settings()
+async def run_async(*, session_factory=SessionLocal, sender=None) -> None:
+    sender = sender or from_settings()
     limiter = RateLimiter()
-    async with SessionLocal() as session:
-        items = await fetch_queued_outreach(session)
-        emails = [i.to_email for i in items if i.to_email]
-        suppressed = await fetch_suppressed_emails(session, emails)
-        store = InMemorySuppressionStore(suppressed)
-        results = process_outreach_items(
-            items,
-            sender=sender,
-            suppression_store=store,
-            limit_store=limiter,
+    worker_id = default_worker_id()
+    async with session_factory() as session:
+        items = await claim_queued_outreach(
+            session, worker_id=worker_id, lease_s=get_settings().work_lease_s
         )
-        await apply_results(session, results)
+        claimed = [i.outreach_id for i in items]
+        try:
+            emails = [i.to_email for i in items if i.to_email]
+            suppressed = await fetch_suppressed_emails(session, emails)
+            store = InMemorySuppressionStore(suppressed)
+            results = process_outreach_items(
+                items,
+                sender=sender,
+                suppression_store=store,
+                limit_store=limiter,
+            )
+            await apply_results(session, results)
+        except BaseException:
+            # A failed flush leaves the session unusable until it is rolled back, and
+            # the claims below must still be released.
+            await session.rollback()
+            raise
+        finally:
+            await release_claims(session, OutreachModel, claimed, worker_id=worker_id)
     logger.info("outreach_job_finished", processed=len(items))
 
@@ -1,88 +1,215 @@
 from __future__ import annotations
 
-from amis_agent.application.services.qualification import (
-    extract_domain,
-    qualify_company,
-    should_dedupe,
+import asyncio
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from amis_agent.application.services.lead_scoring import (
+    BatchLeadScorer,
+    CompanyColumns,
+    ScoringRules,
+    fast_extract_domain,
 )
+from amis_agent.application.services.near_duplicates import NearDuplicateIndex
+from amis_agent.application.services.qualification import lead_dedupe_key
 from amis_agent.core.config import get_settings
 from amis_agent.core.logging import get_logger
-from amis_agent.infrastructure.db.lead_repository import create_lead, fetch_existing_lead_keys
+from amis_agent.infrastructure.db.company_repository import bulk_set_website_domains
+from amis_agent.infrastructure.db.lead_repository import NewLead, bulk_create_leads
 from amis_agent.infrastructure.db.qualification_repository import (
+    QualificationRow,
+    bulk_upsert_qualifications,
     fetch_unqualified_companies,
-    upsert_qualification,
 )
 from amis_agent.infrastructure.db.session import SessionLocal
+from amis_agent.infrastructure.db.signature_repository import (
+    fetch_lead_company_regions,
+    sync_near_duplicate_index,
+)
 
 
 logger = get_logger(worker="qualification")
 
 
-def run() -> None:
-    logger.info("qualification_job_started")
-    settings = get_settings()
-    allowed_sources = {s.strip() for s in settings.qualify_allowed_sources.split(",") if s.strip()}
-    allowed_sources.update({"seed_static", "demo_seed"})
-    allowed_domains = {
-        d.strip().lower()
-        for d in settings.qualify_allowed_domains.split(",")
-        if d.strip()
-    }
+@dataclass
+class QualificationStats:
+    total: int = 0
+    qualified: int = 0
+    created: int = 0
+    chunks: int = 0
+    near_duplicates: int = 0
 
-    async def _run() -> dict:
-        async with SessionLocal() as session:
-            companies = await fetch_unqualified_companies(session)
-            existing_keys = await fetch_existing_lead_keys(session)
-            qualified = 0
-            created = 0
-            for company in companies:
-                domain = extract_domain(company.website_url)
-                if domain and company.website_domain != domain:
-                    company.website_domain = domain
-                    await session.commit()
-
-                decision = qualify_company(
-                    name=company.name,
-                    website_status=company.website_status,
-                    website_url=company.website_url,
-                    region=company.region,
-                    source=company.source,
-                    allowed_sources=allowed_sources,
-                    allowed_domains=allowed_domains,
+
+async def _drop_near_duplicates(
+    session: AsyncSession, index: NearDuplicateIndex, leads: list[NewLead]
+) -> list[NewLead]:
+    # A company is a near-duplicate only of an older company that already has (or is
+    # about to get) a lead, so a rejected look-alike never blocks a good one. Names must
+    # match, and so must the domains; without a domain the region has to match instead.
+    matches = {
+        lead.company_id: index.query(
+            index.signatures_of(lead.company_id), before_id=lead.company_id
+        )
+        for lead in leads
+    }
+    candidate_ids = {match.company_id for found in matches.values() for match in found}
+    with_leads = await fetch_lead_company_regions(session, candidate_ids)
+    kept: list[NewLead] = []
+    for lead in leads:
+        duplicate_of = next(
+            (
+                m.company_id
+                for m in matches[lead.company_id]
+                if m.company_id in with_leads
+                and (
+                    m.same_domain
+                    or (lead.region is not None and with_leads[m.company_id] == lead.region)
                 )
-                await upsert_qualification(
-                    session,
-                    company_id=company.id,
-                    decision="qualified" if decision.allowed else "rejected",
-                    score=decision.score,
-                    reason=decision.reason,
+            ),
+            None,
+        )
+        if duplicate_of is not None:
+            logger.info(
+                "qualification_near_duplicate", company_id=lead.company_id, duplicate_of=duplicate_of
+            )
+            continue
+        kept.append(lead)
+        with_leads[lead.company_id] = lead.region
+    return kept
+
+
+async def qualify_backlog(
+    session_factory: async_sessionmaker[AsyncSession],
+    *,
+    rules: ScoringRules,
+    chunk_size: int,
+    max_chunks: int = 0,
+    near_duplicates: NearDuplicateIndex | None = None,
+) -> QualificationStats:
+    stats = QualificationStats()
+    scorer = BatchLeadScorer(rules)
+    if near_duplicates is not None:
+        await sync_near_duplicate_index(session_factory, near_duplicates)
+    after_id: int | None = None
+    while not max_chunks or stats.chunks < max_chunks:
+        # One short session per chunk keeps the identity map (and memory) bounded.
+        async with session_factory() as session:
+            companies = await fetch_unqualified_companies(session, chunk_size, after_id=after_id)
+            if not companies:
+                break
+            after_id = companies[-1].id
+
+            batch = scorer.score(
+                CompanyColumns(
+                    names=[c.name for c in companies],
+                    website_statuses=[c.website_status for c in companies],
+                    website_urls=[c.website_url for c in companies],
+                    regions=[c.region for c in companies],
+                    sources=[c.source for c in companies],
                 )
-                if not decision.allowed:
-                    continue
-
-                if should_dedupe(company.name, domain, existing_keys):
-                    continue
-                await create_lead(
-                    session,
-                    company_id=company.id,
-                    region=company.region,
-                    contact_email=None,
-                    contact_status="pending",
-                    status="new",
+            )
+            domains: dict[int, str] = {}
+            decisions: list[QualificationRow] = []
+            leads: list[NewLead] = []
+            for company, allowed, score, reason in zip(
+                companies, batch.allowed, batch.scores, batch.reasons
+            ):
+                domain = fast_extract_domain(company.website_url)
+                if domain and company.website_domain != domain:
+                    domains[company.id] = domain
+                decisions.append(
+                    QualificationRow(
+                        company_id=company.id,
+                        decision="qualified" if allowed else "rejected",
+                        score=score,
+                        reason=reason,
+                    )
                 )
-                if company.name and domain:
-                    existing_keys.add((" ".join(company.name.strip().lower().split()), domain.lower()))
-                qualified += 1
-                created += 1
-            return {"qualified": qualified, "created": created, "total": len(companies)}
+                if allowed:
+                    leads.append(
+                        NewLead(
+                            company_id=company.id,
+                            region=company.region,
+                            dedupe_key=lead_dedupe_key(company.name, domain),
+                        )
+                    )
+
+            if near_duplicates is not None:
+                kept = await _drop_near_duplicates(session, near_duplicates, leads)
+                stats.near_duplicates += len(leads) - len(kept)
+                leads = kept
+
+            await bulk_set_website_domains(session, domains)
+            await bulk_upsert_qualifications(session, decisions)
+            created = await bulk_create_leads(session, leads)
+            await session.commit()
 
-    import asyncio
+        stats.chunks += 1
+        stats.total += len(companies)
+        stats.qualified += created
+        stats.created += created
+        logger.info(
+            "qualification_chunk_finished",
+            chunk=stats.chunks,
+            companies=len(companies),
+            created=created,
+            last_id=after_id,
+        )
+    return stats
 
-    result = asyncio.run(_run())
+
+def build_near_duplicate_index() -> NearDuplicateIndex | None:
+    # RQ forks a fresh process per job, so every run rebuilds the LSH buckets from the
+    # stored signatures: one read over all companies per run, with only companies
+    # added since the last run signed anew.
+    threshold = get_settings().qualify_near_duplicate_threshold
+    if threshold <= 0:
+        return None
+    return NearDuplicateIndex(threshold=threshold)
+
+
+def _csv(value: str, *, lower: bool = False) -> frozenset[str]:
+    items = (item.strip() for item in value.split(","))
+    return frozenset(item.lower() if lower else item for item in items if item)
+
+
+def build_scoring_rules() -> ScoringRules:
+    settings = get_settings()
+    priors: dict[str, int] = {}
+    for entry in _csv(settings.qualify_source_priors):
+        source, _, points = entry.partition(":")
+        try:
+            priors[source.strip()] = int(points)
+        except ValueError:
+            logger.warning("qualification_invalid_source_prior", entry=entry)
+    return ScoringRules(
+        allowed_sources=_csv(settings.qualify_allowed_sources) | {"seed_static", "demo_seed"},
+        allowed_domains=_csv(settings.qualify_allowed_domains, lower=True),
+        denied_sources=_csv(settings.qualify_denied_sources),
+        denied_domains=_csv(settings.qualify_denied_domains, lower=True),
+        source_priors=priors,
+    )
+
+
+def run() -> None:
+    logger.info("qualification_job_started")
+    settings = get_settings()
+
+    stats = asyncio.run(
+        qualify_backlog(
+            SessionLocal,
+            rules=build_scoring_rules(),
+            chunk_size=settings.qualify_chunk_size,
+            max_chunks=settings.qualify_max_chunks,
+            near_duplicates=build_near_duplicate_index(),
+        )
+    )
     logger.info(
         "qualification_job_finished",
-        total=result["total"],
-        qualified=result["qualified"],
-        created=result["created"],
+        total=stats.total,
+        qualified=stats.qualified,
+        created=stats.created,
+        chunks=stats.chunks,
+        near_duplicates=stats.near_duplicates,
     )
-
@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 
 from amis_agent.application.services.jobs import DEFAULT_JOBS
 from amis_agent.application.services.scheduler import CronJob, run_scheduler
+from amis_agent.core.config import get_settings
 from amis_agent.core.logging import get_logger
 from amis_agent.infrastructure.queue.scheduler_store import SchedulerStore
 
@@ -11,19 +12,28 @@ from amis_agent.infrastructure.queue.scheduler_store import SchedulerStore
 logger = get_logger(worker="scheduler")
 
 
-def run() -> None:
-    store = SchedulerStore()
+def cron_jobs() -> list[CronJob]:
     jobs = [
         CronJob("discover", "0 */6 * * *", DEFAULT_JOBS["discover"]),
         CronJob("qualify", "15 */6 * * *", DEFAULT_JOBS["qualify"]),
         CronJob("enrich", "25 */6 * * *", DEFAULT_JOBS["enrich"]),
         CronJob("outreach", "30 */6 * * *", DEFAULT_JOBS["outreach"]),
+        # Sweeps enriched leads whose draft job was lost or deferred by the token budget.
+        CronJob("draft", "45 */6 * * *", DEFAULT_JOBS["draft"]),
     ]
+    if get_settings().llm_draft_mode == "batch":
+        # Enrichment queues no drafts in batch mode; the nightly job submits the backlog
+        # and ingests whatever batches finished since the last run.
+        jobs.append(CronJob("draft_batch", "0 2 * * *", DEFAULT_JOBS["draft_batch"]))
+    return jobs
+
+
+def run() -> None:
+    store = SchedulerStore()
     enqueued = run_scheduler(
-        jobs,
+        cron_jobs(),
         last_run_lookup=store.get_last_run,
         last_run_store=store.set_last_run,
         now=datetime.now(timezone.utc),
     )
     logger.info("scheduler_run", enqueued=enqueued)
-
@@ -20,6 +20,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from amis_agent.api.deps import get_db_session
+from amis_agent.api.routes import admin
 from amis_agent.core.config import get_settings
 from amis_agent.infrastructure.db.base import Base
 from amis_agent.infrastructure.db.models import CompanyModel, LeadModel, OutboxModel
@@ -135,3 +136,57 @@ def test_send_blocked_when_enable_sending_false():
     )
     assert res.status_code == 400
     assert "sending_disabled" in res.json()["detail"]
+
+
+def test_regenerate_outbox_queues_a_draft_job(monkeypatch):
+    get_settings.cache_clear()
+    session_factory = asyncio.run(_init_db())
+    client = _app_with_session(session_factory)
+    enqueued = []
+
+    class FakeJob:
+        id = "job-1"
+
+    def fake_enqueue_drafting(job_id=None, **kwargs):
+        enqueued.append(kwargs)
+        return FakeJob()
+
+    monkeypatch.setattr(admin, "enqueue_drafting", fake_enqueue_drafting)
+
+    async def seed():
+        async with session_factory() as session:
+            company = CompanyModel(name="Acme", website_url="https://acme.test")
+            session.add(company)
+            await session.flush()
+            lead = LeadModel(
+                company_id=company.id, contact_email="a@acme.test", status="ready_for_review"
+            )
+            session.add(lead)
+            await session.flush()
+            outbox = OutboxModel(
+                lead_id=lead.id, subject="Hello", body_text="Hello Acme.", status="draft"
+            )
+            session.add(outbox)
+            await session.commit()
+            return lead.id, outbox.id
+
+    lead_id, outbox_id = asyncio.run(seed())
+    res = client.post(
+        f"/api/outbox/{outbox_id}/regenerate?fresh=true",
+        headers={"X-ADMIN-TOKEN": "test-token"},
+    )
+    assert res.status_code == 200
+    assert res.json() == {"status": "queued", "lead_id": lead_id, "job_id": "job-1"}
+    assert enqueued == [
+        {"lead_ids": [lead_id], "bypass_cache": True, "budget_action": "fallback"}
+    ]
+
+    async def fetch():
+        async with session_factory() as session:
+            lead = await session.get(LeadModel, lead_id)
+            outbox = await session.get(OutboxModel, outbox_id)
+            return lead.status, outbox
+
+    status, outbox = asyncio.run(fetch())
+    assert status == "enriched"
+    assert outbox is None
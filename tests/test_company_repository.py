@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from amis_agent.infrastructure.db.base import Base
+from amis_agent.infrastructure.db.company_repository import CompanyUpsert, bulk_upsert_companies
+from amis_agent.infrastructure.db.models import CompanyModel
+
+
+async def _init_db() -> async_sessionmaker[AsyncSession]:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def _row(name: str, region: str | None = "US", url: str | None = None) -> CompanyUpsert:
+    status = "has_website" if url else None
+    return CompanyUpsert(
+        name=name, region=region, website_status=status, website_url=url, source="osm"
+    )
+
+
+def test_bulk_upsert_companies_inserts_then_updates_in_chunks():
+    async def _run():
+        session_factory = await _init_db()
+        async with session_factory() as session:
+            first = await bulk_upsert_companies(
+                session,
+                [_row("Acme"), _row("Beta", url="https://beta.test"), _row("Acme"), _row("Gamma", None)],
+                chunk_size=2,
+            )
+            second = await bulk_upsert_companies(
+                session,
+                [_row("Acme", url="https://acme.test"), _row("Beta"), _row("Gamma", None), _row("Delta")],
+                chunk_size=3,
+            )
+            companies = {
+                (c.name, c.region): c
+                for c in (await session.execute(select(CompanyModel))).scalars().all()
+            }
+        return first, second, companies
+
+    first, second, companies = asyncio.run(_run())
+
+    assert (first.inserted, first.updated) == (3, 0)
+    assert (second.inserted, second.updated) == (1, 3)
+    assert len(companies) == 4
+    assert companies[("Acme", "US")].website_url == "https://acme.test"
+    assert companies[("Beta", "US")].website_url == "https://beta.test"
+    assert companies[("Beta", "US")].website_status == "has_website"
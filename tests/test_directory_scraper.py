@@ -4,6 +4,8 @@ from dataclasses import dataclass
 
 from amis_agent.core.config import get_settings
 from amis_agent.infrastructure.connectors.directory_scraper import DirectoryScrapeConfig, GenericDirectoryConnector
+from amis_agent.infrastructure.connectors.snapshots import PageSnapshot
+from amis_agent.infrastructure.scraping.rate_limit import LocalTokenBucketStore, RateLimiter
 
 
 @dataclass(frozen=True)
@@ -48,3 +50,163 @@ def test_directory_scraper_parses_listings(monkeypatch):
     assert results[1].name == "Beta LLC"
     assert results[1].has_website is None
 
+
+
+class DictSnapshotStore:
+    def __init__(self):
+        self.entries: dict[tuple[str, str], PageSnapshot] = {}
+
+    def get(self, source: str, url: str) -> PageSnapshot | None:
+        return self.entries.get((source, url))
+
+    def set(self, source: str, url: str, snapshot: PageSnapshot, ttl_s: int) -> None:
+        self.entries[(source, url)] = snapshot
+
+
+def _listing_html(names: list[str]) -> str:
+    return "".join(f"<div class='listing'><span class='name'>{name}</span></div>" for name in names)
+
+
+def test_directory_scraper_incremental_mode_emits_only_new_listings(monkeypatch):
+    pages = [
+        DummyResponse(url="", status_code=200, text=_listing_html(["Alpha", "Beta"])),
+        DummyResponse(url="", status_code=200, text=_listing_html(["Alpha", "Beta"])),
+        DummyResponse(url="", status_code=200, text=_listing_html(["Alpha", "Beta", "Gamma"])),
+        DummyResponse(url="", status_code=304, text=""),
+    ]
+    calls: list[dict | None] = []
+
+    def fetcher(url: str, timeout: int, headers: dict | None = None):
+        calls.append(headers)
+        return pages.pop(0)
+
+    monkeypatch.setenv("SCRAPE_ALLOWED_DOMAINS", "example.com")
+    get_settings.cache_clear()
+    cfg = DirectoryScrapeConfig(
+        base_url="https://example.com/directory",
+        listing_selector=".listing",
+        name_selector=".name",
+        website_selector=None,
+        region="US",
+        source="example_dir",
+    )
+    store = DictSnapshotStore()
+    connector = GenericDirectoryConnector(cfg, fetcher=fetcher, check_robots=False, snapshots=store)
+    connector.rate_limiter = RateLimiter(LocalTokenBucketStore(), rate_per_s=1000, burst=10)
+
+    first = connector.fetch(region="US", limit=10)
+    connector.ack(first)
+    unchanged = connector.fetch(region="US", limit=10)
+    changed = connector.fetch(region="US", limit=10)
+    connector.ack(changed)
+    store.entries[("example_dir", cfg.base_url)] = PageSnapshot(
+        fingerprint="x", etag='"v3"', listing_keys=[]
+    )
+    not_modified = connector.fetch(region="US", limit=10)
+
+    assert [item.name for item in first] == ["Alpha", "Beta"]
+    assert unchanged == []
+    assert [item.name for item in changed] == ["Gamma"]
+    assert not_modified == []
+    assert calls[-1] == {"If-None-Match": '"v3"'}
+
+
+def test_directory_scraper_keeps_listings_dropped_by_a_connector_timeout(monkeypatch):
+    import asyncio
+    import time
+
+    from amis_agent.application.services.discovery import discover_businesses_async
+
+    def fetcher(url: str, timeout: int, headers: dict | None = None):
+        time.sleep(0.1)
+        return DummyResponse(url="", status_code=200, text=_listing_html(["Alpha", "Beta"]))
+
+    monkeypatch.setenv("SCRAPE_ALLOWED_DOMAINS", "example.com")
+    get_settings.cache_clear()
+    cfg = DirectoryScrapeConfig(
+        base_url="https://example.com/directory",
+        listing_selector=".listing",
+        name_selector=".name",
+        website_selector=None,
+        region="US",
+        source="example_dir",
+    )
+    store = DictSnapshotStore()
+    connector = GenericDirectoryConnector(cfg, fetcher=fetcher, check_robots=False, snapshots=store)
+    connector.rate_limiter = RateLimiter(LocalTokenBucketStore(), rate_per_s=1000, burst=10)
+
+    report = asyncio.run(
+        discover_businesses_async(
+            {"example_dir": connector}, region="US", limit=10, connector_timeout_s=0.01
+        )
+    )
+    # Let the abandoned fetch finish in its thread; it must not mark anything as seen.
+    time.sleep(0.2)
+    again = connector.fetch(region="US", limit=10)
+
+    assert report.listings == []
+    assert report.stats[0].status == "timeout"
+    assert [item.name for item in again] == ["Alpha", "Beta"]
+
+
+def test_directory_scraper_iter_listings_follows_pages_within_budget(monkeypatch):
+    pages = {
+        "https://example.com/directory": _listing_html(["Alpha"]) + "<a rel='next' href='?p=2'>next</a>",
+        "https://example.com/directory?p=2": _listing_html(["Beta"]) + "<a rel='next' href='?p=3'>n</a>",
+        "https://example.com/directory?p=3": _listing_html(["Gamma"]),
+    }
+    fetched: list[str] = []
+
+    def fetcher(url: str, timeout: int):
+        fetched.append(url)
+        return DummyResponse(url=url, status_code=200, text=pages[url])
+
+    monkeypatch.setenv("SCRAPE_ALLOWED_DOMAINS", "example.com")
+    get_settings.cache_clear()
+    cfg = DirectoryScrapeConfig(
+        base_url="https://example.com/directory",
+        listing_selector=".listing",
+        name_selector=".name",
+        website_selector=None,
+        region="US",
+        source="example_dir",
+        next_page_selector="a[rel='next']",
+    )
+    connector = GenericDirectoryConnector(cfg, fetcher=fetcher, check_robots=False)
+    connector.rate_limiter = RateLimiter(LocalTokenBucketStore(), rate_per_s=1000, burst=10)
+
+    budgeted = [item.name for item in connector.iter_listings(region="US", page_budget=2)]
+    fetched.clear()
+    everything = [item.name for item in connector.iter_listings(region="US", page_budget=10)]
+    fetched.clear()
+    first_only = connector.fetch(region="US", limit=1)
+
+    assert budgeted == ["Alpha", "Beta"]
+    assert everything == ["Alpha", "Beta", "Gamma"]
+    assert [item.name for item in first_only] == ["Alpha"]
+    assert fetched == ["https://example.com/directory"]
+
+
+def test_directory_scraper_page_url_template_stops_on_empty_page(monkeypatch):
+    def fetcher(url: str, timeout: int):
+        page = int(url.rsplit("=", 1)[1]) if "page=" in url else 1
+        names = [f"Co {page}"] if page <= 3 else []
+        return DummyResponse(url=url, status_code=200, text=_listing_html(names))
+
+    monkeypatch.setenv("SCRAPE_ALLOWED_DOMAINS", "example.com")
+    get_settings.cache_clear()
+    cfg = DirectoryScrapeConfig(
+        base_url="https://example.com/directory",
+        listing_selector=".listing",
+        name_selector=".name",
+        website_selector=None,
+        region="US",
+        source="example_dir",
+        page_url_template="https://example.com/directory?page={page}",
+    )
+    connector = GenericDirectoryConnector(cfg, fetcher=fetcher, check_robots=False)
+    connector.rate_limiter = RateLimiter(LocalTokenBucketStore(), rate_per_s=1000, burst=10)
+
+    names = [item.name for item in connector.iter_listings(region="US", page_budget=50)]
+
+    assert names == ["Co 1", "Co 2", "Co 3"]
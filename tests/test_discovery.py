@@ -1,6 +1,14 @@
 from __future__ import annotations
 
-from amis_agent.application.services.discovery import BusinessListing, discover_businesses
+import asyncio
+import threading
+import time
+
+from amis_agent.application.services.discovery import (
+    BusinessListing,
+    discover_businesses,
+    discover_businesses_async,
+)
 
 
 class DummyConnector:
@@ -25,3 +33,56 @@ def test_discover_businesses_aggregates():
     assert len(results) == 2
     assert {r.source for r in results} == {"a", "b"}
 
+
+
+class SlowConnector:
+    def fetch(self, *, region: str, limit: int):
+        time.sleep(2)
+        return []
+
+
+class BrokenConnector:
+    def fetch(self, *, region: str, limit: int):
+        raise RuntimeError("boom")
+
+
+def test_discover_businesses_async_returns_partial_results():
+    connectors = {"a": DummyConnector("a"), "slow": SlowConnector(), "broken": BrokenConnector()}
+    start = time.perf_counter()
+    report = asyncio.run(
+        discover_businesses_async(connectors, region="US", limit=10, connector_timeout_s=0.2)
+    )
+    assert time.perf_counter() - start < 1.5
+    assert [r.source for r in report.listings] == ["a"]
+    stats = {s.name: s for s in report.stats}
+    assert stats["a"].status == "ok" and stats["a"].items == 1
+    assert stats["slow"].status == "timeout"
+    assert stats["broken"].status == "error"
+
+
+def test_discover_businesses_async_enforces_deadline():
+    connectors = {"slow": SlowConnector(), "a": DummyConnector("a")}
+    report = asyncio.run(
+        discover_businesses_async(connectors, region="US", limit=10, deadline_s=0.2)
+    )
+    assert len(report.listings) == 1
+    assert {s.name: s.status for s in report.stats} == {"slow": "timeout", "a": "ok"}
+
+
+def test_timed_out_connectors_are_left_on_daemon_threads():
+    release = threading.Event()
+
+    class HungConnector:
+        def fetch(self, *, region: str, limit: int):
+            release.wait(5)
+            return []
+
+    report = asyncio.run(
+        discover_businesses_async(
+            {"hung": HungConnector()}, region="US", limit=10, connector_timeout_s=0.1
+        )
+    )
+    hung = [t for t in threading.enumerate() if t.name == "discovery-hung"]
+    release.set()
+    assert report.stats[0].status == "timeout"
+    assert hung and all(thread.daemon for thread in hung)
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from amis_agent.application.services.discovery import BusinessListing
+from amis_agent.core.config import get_settings
+from amis_agent.infrastructure.connectors.directory_scraper import (
+    DirectoryScrapeConfig,
+    GenericDirectoryConnector,
+)
+from amis_agent.infrastructure.connectors.snapshots import PageSnapshot
+from amis_agent.infrastructure.db.base import Base
+from amis_agent.infrastructure.db.models import CompanyModel
+from amis_agent.infrastructure.scraping.http_client import HttpResponse
+from amis_agent.infrastructure.scraping.rate_limit import LocalTokenBucketStore, RateLimiter
+from amis_agent.workers import discovery as discovery_worker
+from amis_agent.workers.discovery import stream_source
+
+
+class PagedConnector:
+    def __init__(self, total: int, fail_after: int | None = None):
+        self.total = total
+        self.fail_after = fail_after
+        self.produced = 0
+        self.closed = False
+
+    def iter_listings(self, *, region: str, page_budget: int | None = None):
+        try:
+            for i in range(self.total):
+                if self.fail_after is not None and i == self.fail_after:
+                    raise RuntimeError("page_failed")
+                self.produced += 1
+                yield BusinessListing(
+                    name=f"Co {i}", source="paged", region=region, has_website=None, website_url=None
+                )
+        finally:
+            self.closed = True
+
+
+async def _init_db() -> async_sessionmaker[AsyncSession]:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _count(session_factory: async_sessionmaker[AsyncSession]) -> int:
+    async with session_factory() as session:
+        return (await session.execute(select(func.count(CompanyModel.id)))).scalar_one()
+
+
+def test_stream_source_persists_listings_in_chunks():
+    async def _run():
+        session_factory = await _init_db()
+        connector = PagedConnector(total=25)
+        result, stat = await stream_source(
+            "paged", connector, region="US", chunk_size=10, session_factory=session_factory
+        )
+        return result, stat, connector, await _count(session_factory)
+
+    result, stat, connector, stored = asyncio.run(_run())
+
+    assert (result.inserted, result.updated) == (25, 0)
+    assert stat.status == "ok"
+    assert stat.items == 25
+    assert stored == 25
+    assert connector.closed is True
+
+
+def test_stream_source_keeps_committed_chunks_when_source_fails():
+    async def _run():
+        session_factory = await _init_db()
+        connector = PagedConnector(total=25, fail_after=15)
+        result, stat = await stream_source(
+            "paged", connector, region="US", chunk_size=10, session_factory=session_factory
+        )
+        return result, stat, await _count(session_factory)
+
+    result, stat, stored = asyncio.run(_run())
+
+    assert stat.status == "error"
+    assert stat.error == "page_failed"
+    assert result.inserted == 10
+    assert stored == 10
+
+
+def test_stream_source_abandons_a_hung_connector_after_its_timeout():
+    release = threading.Event()
+
+    class HungConnector:
+        def iter_listings(self, *, region: str, page_budget: int | None = None):
+            yield BusinessListing(
+                name="Co 0", source="hung", region=region, has_website=None, website_url=None
+            )
+            release.wait(5)
+            yield from ()
+
+    async def _run():
+        session_factory = await _init_db()
+        start = time.perf_counter()
+        result, stat = await stream_source(
+            "hung",
+            HungConnector(),
+            region="US",
+            chunk_size=1,
+            connector_timeout_s=0.2,
+            deadline=time.monotonic() + 5,
+            session_factory=session_factory,
+        )
+        return time.perf_counter() - start, result, stat, await _count(session_factory)
+
+    elapsed, result, stat, stored = asyncio.run(_run())
+    hung = [t for t in threading.enumerate() if t.name == "discovery-hung"]
+    release.set()
+    assert elapsed < 2
+    assert (stat.status, stat.error, stat.items) == ("timeout", "connector_timeout", 1)
+    assert result.inserted == stored == 1
+    assert hung and all(thread.daemon for thread in hung)
+
+
+def test_stream_source_stops_pulling_once_the_deadline_has_passed():
+    async def _run():
+        session_factory = await _init_db()
+        connector = PagedConnector(total=5)
+        _, stat = await stream_source(
+            "paged",
+            connector,
+            region="US",
+            chunk_size=1,
+            deadline=time.monotonic() - 1,
+            session_factory=session_factory,
+        )
+        return stat, connector
+
+    stat, connector = asyncio.run(_run())
+    assert (stat.status, stat.error, stat.items) == ("timeout", "deadline_exceeded", 0)
+    assert connector.produced == 0
+
+
+class DictSnapshotStore:
+    def __init__(self):
+        self.entries: dict[tuple[str, str], PageSnapshot] = {}
+
+    def get(self, source: str, url: str) -> PageSnapshot | None:
+        return self.entries.get((source, url))
+
+    def set(self, source: str, url: str, snapshot: PageSnapshot, ttl_s: int) -> None:
+        self.entries[(source, url)] = snapshot
+
+
+def test_stream_source_re_emits_listings_whose_upsert_failed(monkeypatch):
+    monkeypatch.setenv("SCRAPE_ALLOWED_DOMAINS", "example.com")
+    get_settings.cache_clear()
+    html = "".join(
+        f"<div class='listing'><span class='name'>Co {i}</span></div>" for i in range(5)
+    )
+
+    def fetcher(url: str, timeout: int, headers: dict | None = None):
+        return HttpResponse(url=url, status_code=200, text=html)
+
+    cfg = DirectoryScrapeConfig(
+        base_url="https://example.com/directory",
+        listing_selector=".listing",
+        name_selector=".name",
+        website_selector=None,
+        region="US",
+        source="example_dir",
+    )
+    store = DictSnapshotStore()
+    real_upsert = discovery_worker.bulk_upsert_companies
+    upserts = []
+
+    async def flaky_upsert(session, rows, **kwargs):
+        upserts.append([row.name for row in rows])
+        if len(upserts) == 2:
+            raise RuntimeError("db_down")
+        return await real_upsert(session, rows, **kwargs)
+
+    monkeypatch.setattr(discovery_worker, "bulk_upsert_companies", flaky_upsert)
+
+    async def _run():
+        session_factory = await _init_db()
+        stats = []
+        for _ in range(2):
+            connector = GenericDirectoryConnector(
+                cfg, fetcher=fetcher, check_robots=False, snapshots=store
+            )
+            connector.rate_limiter = RateLimiter(LocalTokenBucketStore(), rate_per_s=1000, burst=10)
+            _, stat = await stream_source(
+                "example_dir", connector, region="US", chunk_size=2, session_factory=session_factory
+            )
+            stats.append(stat)
+        return stats, await _count(session_factory)
+
+    try:
+        (first, second), stored = asyncio.run(_run())
+    finally:
+        get_settings.cache_clear()
+
+    assert first.status == "error" and first.error == "db_down"
+    assert second.status == "ok"
+    # The failed chunk is not remembered as seen, so the next run emits it again.
+    assert upserts == [["Co 0", "Co 1"], ["Co 2", "Co 3"], ["Co 2", "Co 3"], ["Co 4"]]
+    assert stored == 5
+    assert store.entries[("example_dir", cfg.base_url)].truncated is False
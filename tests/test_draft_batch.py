@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+import httpx
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from amis_agent.application.services.batch_drafting import BatchManifestStore
+from amis_agent.core.config import get_settings
+from amis_agent.infrastructure.db.base import Base
+from amis_agent.infrastructure.db.claims import claim_ids
+from amis_agent.infrastructure.db.models import CompanyModel, LeadModel, OutboxModel
+from amis_agent.infrastructure.llm.batch import LLMBatchClient
+from amis_agent.workers import draft_batch
+
+
+_VALID = {
+    "subject_variants": ["One", "Two", "Three"],
+    "chosen_subject": "One",
+    "body_text": "Hello there.",
+    "followup_text": "Following up.",
+    "personalization_fact": "Has a website",
+    "personalization_source_url": "https://acme.example",
+    "confidence": 0.8,
+}
+
+
+class BatchServer:
+    # Stand-in for an OpenAI-style batch endpoint: the batch finishes on the second poll.
+    def __init__(self):
+        self.uploaded: list[dict] = []
+        self.polls = 0
+        self.outputs: dict[str, str] = {}
+
+    def _complete(self) -> None:
+        output, errors = [], []
+        for index, line in enumerate(self.uploaded):
+            custom_id = line["custom_id"]
+            if index == 0:
+                output.append(_line(custom_id, 200, json.dumps(_VALID)))
+            elif index == 1:
+                invalid = {**_VALID, "chosen_subject": "Not a variant"}
+                output.append(_line(custom_id, 200, json.dumps(invalid)))
+            elif index == 2:
+                errors.append({"custom_id": custom_id, "response": {"status_code": 500}})
+            # Anything after that never comes back at all.
+        self.outputs = {
+            "file-out": "\n".join(json.dumps(item) for item in output),
+            "file-err": "\n".join(json.dumps(item) for item in errors),
+        }
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == "POST" and path == "/v1/files":
+            body = request.content.decode("utf-8")
+            start = body.index('{"custom_id"')
+            end = body.rindex("}") + 1
+            self.uploaded = [json.loads(raw) for raw in body[start:end].splitlines() if raw]
+            return httpx.Response(200, json={"id": "file-in"})
+        if request.method == "POST" and path == "/v1/batches":
+            assert json.loads(request.content)["input_file_id"] == "file-in"
+            return httpx.Response(200, json={"id": "batch_1", "status": "validating"})
+        if path == "/v1/batches/batch_1":
+            self.polls += 1
+            if self.polls < 2:
+                return httpx.Response(200, json={"id": "batch_1", "status": "in_progress"})
+            self._complete()
+            return httpx.Response(
+                200,
+                json={
+                    "id": "batch_1",
+                    "status": "completed",
+                    "output_file_id": "file-out",
+                    "error_file_id": "file-err",
+                },
+            )
+        if path.startswith("/v1/files/") and path.endswith("/content"):
+            return httpx.Response(200, text=self.outputs[path.split("/")[3]])
+        return httpx.Response(404)
+
+
+def _line(custom_id: str, status_code: int, content: str) -> dict:
+    return {
+        "custom_id": custom_id,
+        "response": {
+            "status_code": status_code,
+            "body": {
+                "choices": [{"message": {"content": content}}],
+                "usage": {"total_tokens": 50},
+            },
+        },
+        "error": None,
+    }
+
+
+async def _init_db(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        for i in range(4):
+            company = CompanyModel(name=f"Acme {i}", website_url=f"https://acme{i}.example")
+            session.add(company)
+            await session.flush()
+            session.add(
+                LeadModel(
+                    company_id=company.id,
+                    contact_email=f"hi@acme{i}.example",
+                    contact_status="found",
+                    status="enriched",
+                )
+            )
+        await session.commit()
+    return engine, session_factory
+
+
+def test_draft_batch_submits_then_resumes_and_falls_back_per_item(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_BATCH_DIR", str(tmp_path / "batches"))
+    monkeypatch.setenv("LLM_BATCH_MAX_WAIT_S", "0")
+    monkeypatch.setenv("LLM_CACHE_TTL_S", "0")
+    get_settings.cache_clear()
+    server = BatchServer()
+
+    async def _run():
+        engine, session_factory = await _init_db(tmp_path / "db.sqlite3")
+        client = LLMBatchClient(
+            base_url="https://llm.test",
+            api_key="k",
+            timeout_s=5,
+            transport=httpx.MockTransport(server),
+        )
+        kwargs = {"client": client, "session_factory": session_factory}
+        submitted = await draft_batch.run_async(**kwargs)
+        # A later run (or another process) resumes by batch id from the manifest alone.
+        pending = await draft_batch.run_async("batch_1", **kwargs)
+        finished = await draft_batch.run_async("batch_1", **kwargs)
+        again = await draft_batch.run_async(**kwargs)
+        async with session_factory() as session:
+            stmt = select(OutboxModel).order_by(OutboxModel.lead_id)
+            drafts = (await session.execute(stmt)).scalars().all()
+            statuses = (await session.execute(select(LeadModel.status))).scalars().all()
+        await client.aclose()
+        await engine.dispose()
+        return submitted, pending, finished, again, drafts, statuses
+
+    try:
+        submitted, pending, finished, again, drafts, statuses = asyncio.run(_run())
+    finally:
+        get_settings.cache_clear()
+
+    assert [m.batch_id for m in submitted] == ["batch_1"]
+    assert len(server.uploaded) == 4
+    assert pending[0].ingested_at is None and pending[0].status == "in_progress"
+    manifest = finished[0]
+    assert manifest.ingested_at is not None
+    assert (manifest.drafted, manifest.fallbacks, manifest.skipped) == (1, 3, 0)
+    assert manifest.errors == {"validation_failed": 1, "status_500": 1, "missing_from_batch": 1}
+    assert again == []
+    assert BatchManifestStore(tmp_path / "batches").open_batches() == []
+
+    assert [d.subject for d in drafts][0] == "One"
+    assert [d.llm_rationale for d in drafts[1:]] == ["fallback_template"] * 3
+    assert len({d.lead_id for d in drafts}) == 4
+    assert set(statuses) == {"ready_for_review"}
+
+
+def test_draft_batch_claims_its_leads_and_ingests_in_bulk(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_BATCH_DIR", str(tmp_path / "batches"))
+    monkeypatch.setenv("LLM_BATCH_MAX_WAIT_S", "0")
+    monkeypatch.setenv("LLM_CACHE_TTL_S", "0")
+    get_settings.cache_clear()
+    server = BatchServer()
+
+    async def _claims(session_factory):
+        async with session_factory() as session:
+            rows = await session.execute(select(LeadModel.id, LeadModel.claimed_by))
+            return dict(rows.all())
+
+    async def _run():
+        engine, session_factory = await _init_db(tmp_path / "db.sqlite3")
+        client = LLMBatchClient(
+            base_url="https://llm.test",
+            api_key="k",
+            timeout_s=5,
+            transport=httpx.MockTransport(server),
+        )
+        async with session_factory() as session:
+            # The online sweep holds lead 1, so the batch must leave it alone.
+            await claim_ids(
+                session, LeadModel, LeadModel.id == 1, worker_id="sweep", limit=1, lease_s=900
+            )
+        kwargs = {"client": client, "session_factory": session_factory}
+        submitted = await draft_batch.run_async(**kwargs)
+        held = await _claims(session_factory)
+        await draft_batch.run_async("batch_1", **kwargs)
+        inserts: list[str] = []
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: inserts.append(statement)
+            if statement.startswith("INSERT INTO outbox")
+            else None,
+        )
+        await draft_batch.run_async("batch_1", **kwargs)
+        released = await _claims(session_factory)
+        await client.aclose()
+        await engine.dispose()
+        return submitted[0], held, inserts, released
+
+    try:
+        manifest, held, inserts, released = asyncio.run(_run())
+    finally:
+        get_settings.cache_clear()
+
+    assert manifest.lead_ids == [2, 3, 4]
+    assert held[1] == "sweep"
+    assert {held[i] for i in (2, 3, 4)} == {manifest.worker_id}
+    assert len(inserts) == 1
+    assert released == {1: "sweep", 2: None, 3: None, 4: None}
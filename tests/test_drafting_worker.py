@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from amis_agent.application.services.llm_email_writer import LLMEmailWriter
+from amis_agent.infrastructure.db.base import Base
+from amis_agent.infrastructure.db.claims import claim_ids, release_claims
+from amis_agent.infrastructure.db.memory_repository import IndustryInsightCache
+from amis_agent.infrastructure.db.models import (
+    CompanyModel,
+    IndustryInsightModel,
+    LeadModel,
+    OutboxModel,
+)
+from amis_agent.infrastructure.llm.client import LLMResponse, set_async_llm_client
+from amis_agent.workers import drafting
+
+
+_CONTENT = """
+{
+  "subject_variants": ["One", "Two", "Three"],
+  "chosen_subject": "One",
+  "body_text": "Hello there.",
+  "followup_text": "Following up.",
+  "personalization_fact": "Has a website",
+  "personalization_source_url": "https://acme.example",
+  "confidence": 0.8
+}
+"""
+
+
+async def _init_db(url: str, leads: int):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        session.add(IndustryInsightModel(industry="Plumbing", preferred_persona="Ops"))
+        for i in range(leads):
+            company = CompanyModel(name=f"Co {i}", industry="Plumbing" if i % 2 else "Retail")
+            session.add(company)
+            await session.flush()
+            session.add(LeadModel(company_id=company.id, status="enriched", contact_status="found"))
+        await session.commit()
+    return engine, session_factory
+
+
+def test_generate_drafts_pages_leads_and_reads_insights_from_cache(monkeypatch):
+    calls = []
+
+    async def fake_write_outbox_drafts(session_factory, inputs, **kwargs):
+        calls.extend(
+            (data.lead.id, data.persona, data.tone, tuple(data.value_props)) for data in inputs
+        )
+        return [object() for _ in inputs]
+
+    monkeypatch.setattr(drafting, "write_outbox_drafts", fake_write_outbox_drafts)
+
+    async def _run():
+        engine, session_factory = await _init_db("sqlite+aiosqlite:///:memory:", 7)
+        statements: list[str] = []
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+        insights = IndustryInsightCache(ttl_s=300)
+        generated = await drafting.generate_drafts(
+            session_factory, chunk_size=3, insights=insights, writer=object()
+        )
+        await engine.dispose()
+        return generated, insights.loads, statements
+
+    generated, loads, statements = asyncio.run(_run())
+    assert generated == 7
+    assert sorted(call[0] for call in calls) == list(range(1, 8))
+    assert {call[1] for call in calls if call[0] % 2 == 0} == {"Ops"}
+    assert all(call[2] and call[3] for call in calls)
+    assert loads == 1
+    assert sum("FROM industry_insights" in sql for sql in statements) == 1
+    # Three claimed pages are read; the empty claim that ends the scan reads nothing.
+    assert sum("FROM leads JOIN companies" in sql for sql in statements) == 3
+
+
+def test_draft_job_holds_no_connection_during_llm_calls(tmp_path):
+    class PoolCheckingClient:
+        def __init__(self, engine):
+            self.engine = engine
+            self.checked_out: list[int] = []
+
+        async def create_chat_completion(self, *, model, messages, max_tokens, temperature=0.4):
+            self.checked_out.append(self.engine.pool.checkedout())
+            await asyncio.sleep(0)
+            return LLMResponse(
+                content=_CONTENT, model=model, usage={"total_tokens": 5}, latency_ms=5
+            )
+
+    async def _run():
+        engine, session_factory = await _init_db(f"sqlite+aiosqlite:///{tmp_path / 'db'}", 3)
+        client = PoolCheckingClient(engine)
+        writer = LLMEmailWriter(async_client=client)
+        writer.cache = None
+        generated = await drafting.run_async(
+            [1, 3], session_factory=session_factory, writer=writer
+        )
+        async with session_factory() as session:
+            statuses = dict((await session.execute(select(LeadModel.id, LeadModel.status))).all())
+            drafts = (await session.execute(select(OutboxModel.lead_id))).scalars().all()
+        await engine.dispose()
+        return client, generated, statuses, drafts
+
+    client, generated, statuses, drafts = asyncio.run(_run())
+    assert generated == 2
+    assert client.checked_out == [0, 0]
+    assert sorted(drafts) == [1, 3]
+    assert statuses == {1: "ready_for_review", 2: "enriched", 3: "ready_for_review"}
+
+
+def test_generate_drafts_skips_leads_claimed_by_another_worker(monkeypatch):
+    calls = []
+
+    async def fake_write_outbox_drafts(session_factory, inputs, **kwargs):
+        calls.extend(data.lead.id for data in inputs)
+        return [object() for _ in inputs]
+
+    monkeypatch.setattr(drafting, "write_outbox_drafts", fake_write_outbox_drafts)
+
+    async def _run():
+        engine, session_factory = await _init_db("sqlite+aiosqlite:///:memory:", 4)
+        async with session_factory() as session:
+            held = await claim_ids(
+                session,
+                LeadModel,
+                LeadModel.id.in_([1, 2]),
+                worker_id="sweep",
+                limit=10,
+                lease_s=900,
+            )
+        insights = IndustryInsightCache(ttl_s=300)
+        first = await drafting.generate_drafts(
+            session_factory, insights=insights, writer=object(), worker_id="job"
+        )
+        async with session_factory() as session:
+            await release_claims(session, LeadModel, held, worker_id="sweep")
+        second = await drafting.generate_drafts(
+            session_factory, lead_ids=[1], insights=insights, writer=object(), worker_id="job"
+        )
+        async with session_factory() as session:
+            claimed = (await session.execute(select(LeadModel.claimed_by))).scalars().all()
+        await engine.dispose()
+        return first, second, claimed
+
+    first, second, claimed = asyncio.run(_run())
+    assert (first, second) == (2, 1)
+    assert calls == [3, 4, 1]
+    assert claimed == [None] * 4
+
+
+def test_run_async_closes_the_shared_llm_client():
+    class SharedClient:
+        closed = False
+
+        async def aclose(self):
+            self.closed = True
+
+    async def _run():
+        engine, session_factory = await _init_db("sqlite+aiosqlite:///:memory:", 0)
+        generated = await drafting.run_async([], session_factory=session_factory, writer=object())
+        await engine.dispose()
+        return generated
+
+    shared = SharedClient()
+    set_async_llm_client(shared)
+    try:
+        assert asyncio.run(_run()) == 0
+    finally:
+        set_async_llm_client(None)
+    assert shared.closed
@@ -1,8 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import os
 from dataclasses import dataclass
 
-from amis_agent.application.services.enrichment import EmailEnricher
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+from amis_agent.application.services import page_analysis
+from amis_agent.application.services.enrichment import (
+    DomainAllowlist,
+    EmailEnricher,
+    extract_emails_from_html,
+    extract_mailto_emails,
+    extract_personalization_line,
+    find_contact_links,
+)
 
 
 @dataclass(frozen=True)
@@ -26,6 +46,9 @@ class NoOpLimiter:
     def wait(self, host: str) -> None:
         return None
 
+    async def acquire(self, host: str) -> None:
+        return None
+
 
 def test_enrichment_extracts_emails_from_contact_pages():
     homepage = "<a href='/contact'>Contact</a><a href='/about'>About</a>"
@@ -51,3 +74,61 @@ def test_enrichment_extracts_emails_from_contact_pages():
     assert "sales@example.com" in emails
     assert "hello@example.com" in emails
     assert result.personalization_line is not None
+
+
+def test_analyze_page_parses_once_and_matches_helpers(monkeypatch):
+    html = (
+        "<p>We design efficient logistics software for regional carriers.</p>"
+        "<a href='mailto:Hello@Example.com?subject=hi'>Mail</a>"
+        "<a href='/contact-us'>Contact</a><a href='https://other.test/about'>Elsewhere</a>"
+        "<a href='/about'>About</a> Write to sales@example.com"
+    )
+    calls = []
+    real_parse = page_analysis.parse_html
+
+    def counting_parse(markup, parser=None):
+        calls.append(markup)
+        return real_parse(markup, parser)
+
+    monkeypatch.setattr(page_analysis, "parse_html", counting_parse)
+    analysis = page_analysis.analyze_page(html, "https://example.com", contact_link_limit=2)
+
+    assert len(calls) == 1
+    assert set(analysis.mailto_emails) == extract_mailto_emails(html)
+    assert set(analysis.text_emails) == extract_emails_from_html(html)
+    assert analysis.contact_links == find_contact_links(html, "https://example.com", limit=2)
+    assert analysis.contact_links == ["https://example.com/contact-us", "https://example.com/about"]
+    assert analysis.personalization_line == extract_personalization_line(html)
+
+
+def test_enrich_async_matches_sync_enrichment():
+    pages = {
+        "https://example.com": "<a href='/contact'>Contact</a> Our team builds routing software today.",
+        "https://example.com/contact": "<a href='mailto:team@example.com'>Email</a> ops@example.com",
+    }
+
+    def fetcher(url: str, timeout: int):
+        return DummyResponse(url=url, status_code=200, text=pages[url])
+
+    kwargs = {"website_url": "https://example.com", "user_agent": "TestAgent", "timeout_s": 1}
+    sync_result = EmailEnricher(
+        fetcher=fetcher, robots=AllowAllRobots(), rate_limiter=NoOpLimiter()
+    ).enrich(**kwargs)
+    async_result = asyncio.run(
+        EmailEnricher(fetcher=fetcher, robots=AllowAllRobots(), rate_limiter=NoOpLimiter()).enrich_async(
+            **kwargs
+        )
+    )
+    assert async_result == sync_result
+    assert {e.email for e in async_result.emails} == {"team@example.com", "ops@example.com"}
+
+
+def test_domain_allowlist_matches_hosts_and_parent_domains():
+    allowlist = DomainAllowlist.from_csv(" Example.com, .shop.test ,,")
+    assert allowlist.allows("https://example.com/about")
+    assert allowlist.allows("https://www.EXAMPLE.com")
+    assert allowlist.allows("http://a.b.shop.test:8080/x")
+    assert not allowlist.allows("https://badexample.com")
+    assert not allowlist.allows("https://example.com.evil.test")
+    assert not allowlist.allows("not a url")
+    assert DomainAllowlist.from_csv("").allows("https://anything.test")
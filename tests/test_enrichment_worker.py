@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+from sqlalchemy import select
+
+from amis_agent.application.services.enrichment import EmailEvidence, EnrichmentResult
+from amis_agent.core.config import get_settings
+from amis_agent.infrastructure.db.memory_repository import IndustryInsightCache
+from amis_agent.infrastructure.db.models import CompanyModel, LeadModel
+from amis_agent.workers.enrichment import EnrichmentJob, enrich_concurrently
+
+
+class SlowEnricher:
+    def __init__(self, delays: dict[str, float]):
+        self.delays = delays
+        self.active = 0
+        self.peak = 0
+
+    async def enrich_async(self, *, website_url: str, user_agent: str, timeout_s: int):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delays[website_url])
+        finally:
+            self.active -= 1
+        email = EmailEvidence(email=f"hi@{website_url[8:]}", source_url=website_url, confidence=70)
+        return EnrichmentResult([email], None)
+
+
+def _jobs(urls: list[str]) -> list[EnrichmentJob]:
+    return [
+        EnrichmentJob(
+            lead=LeadModel(id=i, company_id=i, status="new", contact_status="pending"),
+            company=CompanyModel(id=i, name=f"Co {i}", website_url=url),
+        )
+        for i, url in enumerate(urls)
+    ]
+
+
+def _collect(enricher, jobs, **kwargs):
+    async def _run():
+        return [item async for item in enrich_concurrently(enricher, jobs, **kwargs)]
+
+    return asyncio.run(_run())
+
+
+def test_enrich_concurrently_bounds_concurrency_and_streams_results():
+    urls = [f"https://site{i}.test" for i in range(6)]
+    enricher = SlowEnricher({url: 0.05 for url in urls})
+    results = _collect(
+        enricher, _jobs(urls), user_agent="ua", timeout_s=1, concurrency=3, lead_timeout_s=1
+    )
+    assert len(results) == 6
+    assert enricher.peak == 3
+    assert all(result.emails for _, result in results)
+
+
+def test_enrich_concurrently_applies_per_lead_deadline():
+    enricher = SlowEnricher({"https://fast.test": 0.01, "https://slow.test": 5})
+    results = _collect(
+        enricher,
+        _jobs(["https://slow.test", "https://fast.test"]),
+        user_agent="ua",
+        timeout_s=1,
+        concurrency=2,
+        lead_timeout_s=0.1,
+    )
+    by_url = {job.company.website_url: result for job, result in results}
+    assert [job.company.website_url for job, _ in results] == ["https://fast.test", "https://slow.test"]
+    assert by_url["https://slow.test"] is None
+    assert by_url["https://fast.test"].emails[0].email == "hi@fast.test"
+
+
+def test_industry_insight_cache_reloads_only_after_ttl():
+    now = [0.0]
+
+    class FakeSession:
+        def __init__(self):
+            self.queries = 0
+
+        async def execute(self, stmt):
+            self.queries += 1
+            return [("Retail", "Founder", None, None)]
+
+    async def _run():
+        cache = IndustryInsightCache(ttl_s=60, clock=lambda: now[0])
+        session = FakeSession()
+        await cache.refresh(session)
+        now[0] = 59
+        await cache.refresh(session)
+        first = cache.get("Retail")
+        now[0] = 61
+        await cache.refresh(session)
+        return session.queries, first, cache.get("Unknown"), cache.get(None)
+
+    queries, first, unknown, missing = asyncio.run(_run())
+    assert queries == 2
+    assert first.preferred_persona == "Founder"
+    assert unknown is None and missing is None
+
+
+def test_failed_lead_stays_new_and_claimable(monkeypatch):
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from amis_agent.infrastructure.db.base import Base
+    from amis_agent.infrastructure.db.lead_repository import claim_leads_for_enrichment
+    from amis_agent.workers import enrichment as enrichment_worker
+
+    class FailingEnricher:
+        page_cache = None
+
+        async def enrich_async(self, *, website_url: str, user_agent: str, timeout_s: int):
+            if "slow" in website_url:
+                await asyncio.sleep(5)
+            raise ConnectionError("reset")
+
+    enqueued = []
+    monkeypatch.setattr(
+        enrichment_worker, "enqueue_drafting", lambda **kwargs: enqueued.append(kwargs)
+    )
+    monkeypatch.setenv("ENRICH_LEAD_TIMEOUT_S", "0.05")
+    get_settings.cache_clear()
+
+    async def _run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(
+            bind=engine, class_=AsyncSession, expire_on_commit=False
+        )
+        async with session_factory() as session:
+            for url in ["https://slow.test", "https://broken.test"]:
+                company = CompanyModel(name=url, website_url=url)
+                session.add(company)
+                await session.flush()
+                session.add(LeadModel(company_id=company.id))
+            await session.commit()
+        await enrichment_worker.run_async(
+            session_factory=session_factory, enricher=FailingEnricher()
+        )
+        async with session_factory() as session:
+            leads = (await session.execute(select(LeadModel))).scalars().all()
+            states = [(lead.status, lead.contact_status, lead.claimed_by) for lead in leads]
+            claimed = await claim_leads_for_enrichment(session, worker_id="next", limit=10)
+        await engine.dispose()
+        return states, claimed
+
+    try:
+        states, claimed = asyncio.run(_run())
+    finally:
+        get_settings.cache_clear()
+    assert states == [("new", "pending", None)] * 2
+    assert len(claimed) == 2
+    assert enqueued == []
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+
+from amis_agent.infrastructure.scraping.http_client import (
+    HttpClientPool,
+    fetch,
+    fetch_async,
+    set_http_pool,
+)
+
+
+def _pool(handler) -> HttpClientPool:
+    return HttpClientPool(
+        user_agent="TestAgent",
+        timeout_s=1,
+        max_connections=10,
+        max_keepalive_connections=5,
+        max_connections_per_host=2,
+        keepalive_expiry_s=5,
+        transport=httpx.MockTransport(handler),
+        async_transport=httpx.MockTransport(handler),
+    )
+
+
+def test_fetch_reuses_shared_client():
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers["User-Agent"])
+        return httpx.Response(200, text=f"ok {request.url.path}")
+
+    pool = _pool(handler)
+    set_http_pool(pool)
+    try:
+        first = fetch("https://example.com/a", timeout_s=1)
+        client = pool.client()
+        second = fetch("https://example.com/b", timeout_s=1)
+        assert pool.client() is client
+    finally:
+        set_http_pool(None)
+        pool.close()
+    assert first.text == "ok /a"
+    assert second.status_code == 200
+    assert seen == ["TestAgent", "TestAgent"]
+
+
+def test_fetch_async_uses_pool():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text="async")
+
+    pool = _pool(handler)
+    set_http_pool(pool)
+
+    async def _run():
+        results = await asyncio.gather(
+            *(fetch_async(f"https://example.com/{i}", timeout_s=1) for i in range(5))
+        )
+        await pool.aclose()
+        return results
+
+    try:
+        results = asyncio.run(_run())
+    finally:
+        set_http_pool(None)
+    assert [r.text for r in results] == ["async"] * 5
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import itertools
+
+from amis_agent.application.services.lead_scoring import (
+    BatchLeadScorer,
+    CompanyColumns,
+    ScoringRules,
+    fast_extract_domain,
+)
+from amis_agent.application.services.qualification import extract_domain, qualify_company
+
+
+TRICKY_URLS = [
+    None,
+    "",
+    "https://www.Example.com/about",
+    "HTTP://EXAMPLE.com:8080",
+    "http://user:pw@Host.com/x",
+    "http://[::1]:80/",
+    " http://padded.com",
+    "http://padded.com ",
+    "http://exa%41mple.com",
+    "http://münchen.de",
+    "http://tab\t.com",
+    "example.com",
+    "//scheme-relative.com/x",
+    "mailto:someone@example.com",
+    "http://",
+    "http://:80",
+    "https://a.com?q=1",
+    "https://a.com#frag",
+]
+
+
+def test_fast_extract_domain_matches_urlparse():
+    for url in TRICKY_URLS:
+        assert fast_extract_domain(url) == extract_domain(url), url
+
+
+def test_batch_scorer_matches_qualify_company():
+    names = [None, "", "   ", "Acme", "  acme  co "]
+    statuses = [None, "no_website", "has_website"]
+    regions = [None, "US"]
+    sources = [None, "seed_static", "zipleaf_us"]
+    rows = list(itertools.product(names, statuses, TRICKY_URLS, regions, sources))
+    columns = CompanyColumns(
+        names=[row[0] for row in rows],
+        website_statuses=[row[1] for row in rows],
+        website_urls=[row[2] for row in rows],
+        regions=[row[3] for row in rows],
+        sources=[row[4] for row in rows],
+    )
+    for allowed_sources, allowed_domains in [
+        (set(), set()),
+        ({"seed_static"}, set()),
+        (set(), {"example.com", "a.com"}),
+    ]:
+        scorer = BatchLeadScorer(
+            ScoringRules(
+                allowed_sources=frozenset(allowed_sources),
+                allowed_domains=frozenset(allowed_domains),
+            )
+        )
+        batch = scorer.score(columns)
+        for i, (name, status, url, region, source) in enumerate(rows):
+            expected = qualify_company(
+                name=name,
+                website_status=status,
+                website_url=url,
+                region=region,
+                source=source,
+                allowed_sources=allowed_sources,
+                allowed_domains=allowed_domains,
+            )
+            assert batch.decision(i) == expected, rows[i]
+
+
+def test_batch_scorer_applies_deny_lists_and_source_priors():
+    scorer = BatchLeadScorer(
+        ScoringRules(
+            denied_domains=frozenset({"spam.test"}),
+            denied_sources=frozenset({"zipleaf_uk"}),
+            source_priors={"seed_static": 5, "zipleaf_us": -30},
+        )
+    )
+    batch = scorer.score(
+        CompanyColumns(
+            names=["A", "B", "C", "D"],
+            website_statuses=["has_website"] * 4,
+            website_urls=["https://spam.test", "https://b.test", "https://c.test", "https://d.test"],
+            regions=["US"] * 4,
+            sources=["seed_static", "zipleaf_uk", "seed_static", "zipleaf_us"],
+        )
+    )
+
+    assert batch.reasons[:2] == ["domain_denied", "source_denied"]
+    assert batch.allowed == [False, False, True, True]
+    assert batch.scores[2:] == [95, 60]
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from amis_agent.infrastructure.llm.client import (
+    AsyncLLMClient,
+    LLMRetryableError,
+    parse_retry_after,
+)
+
+
+def _completion(content: str = "{}") -> dict:
+    return {
+        "model": "test-model",
+        "choices": [{"message": {"content": content}}],
+        "usage": {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10},
+    }
+
+
+def _client(handler, **kwargs) -> tuple[AsyncLLMClient, list[float]]:
+    sleeps: list[float] = []
+
+    async def fake_sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    client = AsyncLLMClient(
+        base_url="https://llm.test",
+        api_key="key",
+        timeout_s=5,
+        transport=httpx.MockTransport(handler),
+        sleep=fake_sleep,
+        **kwargs,
+    )
+    return client, sleeps
+
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _complete(client: AsyncLLMClient, model: str = "test-model"):
+    return client.create_chat_completion(model=model, messages=[], max_tokens=10)
+
+
+def test_retries_429_and_5xx_honouring_retry_after():
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "3"}),
+        httpx.Response(503),
+        httpx.Response(200, json=_completion("ok")),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"] == "Bearer key"
+        return responses.pop(0)
+
+    client, sleeps = _client(handler, backoff_base_s=0.1, backoff_max_s=10)
+    retries_before = _sample("amis_llm_retries_total", model="retry-model", reason="429")
+    tokens_before = _sample("amis_llm_tokens_total", model="retry-model", kind="prompt")
+
+    response = asyncio.run(_complete(client, "retry-model"))
+
+    assert response.content == "ok"
+    assert response.usage["total_tokens"] == 10
+    assert len(sleeps) == 2
+    assert sleeps[0] >= 3
+    assert sleeps[1] <= 0.2
+    retries = _sample("amis_llm_retries_total", model="retry-model", reason="429")
+    assert retries == retries_before + 1
+    assert _sample("amis_llm_tokens_total", model="retry-model", kind="prompt") == tokens_before + 7
+
+
+def test_gives_up_when_retry_after_exceeds_the_backoff_cap():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(429, headers={"Retry-After": "60"})
+
+    client, sleeps = _client(handler, backoff_max_s=10)
+    with pytest.raises(LLMRetryableError) as exc:
+        asyncio.run(_complete(client))
+    assert exc.value.retry_after_s == 60
+    assert len(calls) == 1 and sleeps == []
+
+
+def test_gives_up_after_max_attempts_and_never_retries_client_errors():
+    calls = {"503": 0, "400": 0}
+
+    def unavailable(request: httpx.Request) -> httpx.Response:
+        calls["503"] += 1
+        return httpx.Response(503)
+
+    def bad_request(request: httpx.Request) -> httpx.Response:
+        calls["400"] += 1
+        return httpx.Response(400)
+
+    client, sleeps = _client(unavailable, max_attempts=3)
+    with pytest.raises(LLMRetryableError):
+        asyncio.run(_complete(client))
+    assert calls["503"] == 3 and len(sleeps) == 2
+
+    client, sleeps = _client(bad_request, max_attempts=3)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(_complete(client))
+    assert calls["400"] == 1 and sleeps == []
+
+
+def test_concurrency_is_bounded_and_batches_overlap():
+    state = {"active": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.05)
+        state["active"] -= 1
+        return httpx.Response(200, json=_completion())
+
+    client = AsyncLLMClient(
+        base_url="https://llm.test",
+        api_key="",
+        timeout_s=5,
+        max_concurrency=4,
+        transport=httpx.MockTransport(handler),
+    )
+
+    async def _run():
+        start = time.perf_counter()
+        await asyncio.gather(*(_complete(client) for _ in range(12)))
+        elapsed = time.perf_counter() - start
+        await client.aclose()
+        return elapsed
+
+    elapsed = asyncio.run(_run())
+    assert state["peak"] == 4
+    # 12 calls in 3 waves of 4, far below 12 sequential calls.
+    assert elapsed < 0.05 * 12 * 0.6
+
+
+def test_parse_retry_after_accepts_seconds_and_http_dates():
+    now = datetime(2026, 1, 21, 12, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("7") == 7
+    assert parse_retry_after("Wed, 21 Jan 2026 12:00:05 GMT", now=now) == 5
+    assert parse_retry_after("Wed, 21 Jan 2026 11:59:00 GMT", now=now) == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_rebinding_to_a_new_event_loop_closes_the_old_connection_pool():
+    client, _ = _client(lambda request: httpx.Response(200, json=_completion()))
+
+    asyncio.run(_complete(client))
+    first = client._client
+    asyncio.run(_complete(client))
+
+    assert first is not None and first.is_closed
+    assert client._client is not first and not client._client.is_closed
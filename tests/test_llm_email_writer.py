@@ -75,3 +75,162 @@ def test_llm_email_writer_fallback_on_error():
     assert usage is None
     assert latency is None
     assert error is not None
+
+
+def test_write_outbox_drafts_runs_llm_calls_concurrently_and_skips_existing():
+    import asyncio
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from amis_agent.application.services.llm_email_writer import write_outbox_drafts
+    from amis_agent.infrastructure.db.base import Base
+    from amis_agent.infrastructure.db.models import OutboxModel
+
+    content = """
+    {
+      "subject_variants": ["One", "Two", "Three"],
+      "chosen_subject": "One",
+      "body_text": "Hello there.",
+      "followup_text": "Following up.",
+      "personalization_fact": "Has a website",
+      "personalization_source_url": "https://acme.example",
+      "confidence": 0.8
+    }
+    """
+
+    class SlowAsyncClient:
+        def __init__(self):
+            self.active = 0
+            self.peak = 0
+            self.calls = 0
+
+        async def create_chat_completion(self, *, model, messages, max_tokens, temperature=0.4):
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.02)
+            self.active -= 1
+            return LLMResponse(
+                content=content, model=model, usage={"total_tokens": 5}, latency_ms=20
+            )
+
+    async def _run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(
+            bind=engine, class_=AsyncSession, expire_on_commit=False
+        )
+        async with session_factory() as session:
+            company = CompanyModel(name="Acme Co", website_url="https://acme.example")
+            session.add(company)
+            await session.flush()
+            leads = [
+                LeadModel(company_id=company.id, contact_email=f"{i}@acme.example")
+                for i in range(5)
+            ]
+            session.add_all(leads)
+            await session.flush()
+            session.add(
+                OutboxModel(lead_id=leads[0].id, subject="Old", body_text="Old", status="draft")
+            )
+            await session.commit()
+
+            client = SlowAsyncClient()
+            inputs = [
+                LLMEmailInput(
+                    lead=lead,
+                    company=company,
+                    contact=None,
+                    snippets={"about": None},
+                    value_props=["automation"],
+                    persona="Founder",
+                    tone="concise",
+                )
+                for lead in leads
+            ]
+        drafts = await write_outbox_drafts(
+            session_factory, inputs, writer=LLMEmailWriter(async_client=client)
+        )
+        await engine.dispose()
+        return client, drafts
+
+    client, drafts = asyncio.run(_run())
+    assert client.calls == 4
+    assert client.peak == 4
+    assert [draft.subject for draft in drafts] == ["Old", "One", "One", "One", "One"]
+    assert all(draft.llm_model == "test-model" for draft in drafts[1:])
+
+
+class DictResponseCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        return 0
+
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aput(self, key, entry):
+        return self.put(key, entry)
+
+
+class CountingClient(DummyClient):
+    def __init__(self, content: str):
+        super().__init__(content)
+        self.calls = 0
+
+    def create_chat_completion(self, **kwargs):
+        self.calls += 1
+        return super().create_chat_completion(**kwargs)
+
+
+_VALID_CONTENT = """
+{
+  "subject_variants": ["One", "Two", "Three"],
+  "chosen_subject": "One",
+  "body_text": "Hello there.",
+  "followup_text": "Following up.",
+  "personalization_fact": "Has a website",
+  "personalization_source_url": "https://acme.example",
+  "confidence": 0.8
+}
+"""
+
+
+def test_llm_email_writer_reuses_cached_response_until_bypassed():
+    cache = DictResponseCache()
+    client = CountingClient(_VALID_CONTENT)
+    writer = LLMEmailWriter(client=client, cache=cache)
+
+    first = writer.generate(_make_input())
+    second = writer.generate(_make_input())
+    assert client.calls == 1
+    assert len(cache.entries) == 1
+    assert second[0] == first[0]
+    assert second[1] == first[1]
+    assert second[2] == {"cache_hit": True, "saved_tokens": 10}
+    assert second[3] == 0
+
+    writer.generate(_make_input(), bypass_cache=True)
+    assert client.calls == 2
+    assert len(cache.entries) == 1
+
+
+def test_llm_email_writer_does_not_cache_invalid_output():
+    cache = DictResponseCache()
+    client = CountingClient('{"subject_variants": ["Only one"], "chosen_subject": "Only one", '
+                            '"body_text": "Hi", "followup_text": "Bye"}')
+    writer = LLMEmailWriter(client=client, cache=cache)
+
+    output, _, _, _, error = writer.generate(_make_input())
+    writer.generate(_make_input())
+    assert output.rationale == "fallback_template"
+    assert error == "validation_failed"
+    assert client.calls == 2
+    assert cache.entries == {}
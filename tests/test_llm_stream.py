@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+import httpx
+import pytest
+
+from amis_agent.application.services.llm_email_writer import (
+    LLMEmailInput,
+    LLMEmailWriter,
+    StreamingOutputValidator,
+)
+from amis_agent.infrastructure.db.models import CompanyModel, LeadModel
+from amis_agent.infrastructure.llm.client import AsyncLLMClient, LLMStreamAborted
+from amis_agent.infrastructure.llm.json_stream import JSONObjectStream
+from amis_agent.infrastructure.llm.token_budget import LocalTokenLedgerStore, TokenLedger
+
+
+_VALID = {
+    "subject_variants": ["One", "Two", "Three"],
+    "chosen_subject": "One",
+    "body_text": "Hello there, \"quoted\" and café.",
+    "followup_text": "Following up.",
+    "personalization_fields": {"company_name": "Acme [Co]"},
+    "personalization_fact": "Has a website",
+    "personalization_source_url": "https://acme.example",
+    "confidence": 0.8,
+    "rationale": "ok",
+}
+_TOO_LONG = {**_VALID, "body_text": " ".join(["word"] * 200)}
+
+
+def _pieces(text: str, size: int = 5) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def test_json_object_stream_decodes_fields_as_they_complete():
+    text = "```json\n" + json.dumps(_VALID, indent=2) + "\n```"
+    parser = JSONObjectStream()
+    seen: list[str] = []
+    for piece in _pieces(text, 3):
+        seen.extend(key for key, _ in parser.feed(piece))
+        key, partial = parser.partial_string()
+        if key is not None and partial is not None:
+            assert _VALID[key].startswith(partial)
+    assert parser.done
+    assert parser.fields == _VALID
+    assert seen == list(_VALID)
+
+
+@pytest.mark.parametrize(
+    ("output", "reason"),
+    [
+        (_TOO_LONG, "body_too_long"),
+        ({**_VALID, "body_text": "Hi [First Name], quick question."}, "body_placeholder"),
+        ({**_VALID, "subject_variants": ["One", "Two"]}, "subject_variants"),
+        ({**_VALID, "chosen_subject": "Four"}, "chosen_subject"),
+        ({**_VALID, "personalization_fact": ""}, "personalization_fact"),
+    ],
+)
+def test_streaming_validator_rejects_before_the_stream_ends(output, reason):
+    text = json.dumps(output)
+    validator = StreamingOutputValidator()
+    consumed = 0
+    for piece in _pieces(text):
+        consumed += len(piece)
+        found = validator.feed(piece)
+        if found is not None:
+            break
+    assert found == reason
+    assert consumed < len(text)
+
+
+def test_streaming_validator_accepts_a_valid_output():
+    validator = StreamingOutputValidator()
+    assert all(validator.feed(piece) is None for piece in _pieces(json.dumps(_VALID)))
+
+
+def _sse(content: str, *, usage: bool = True) -> list[bytes]:
+    events = [
+        {"model": "test-model", "choices": [{"delta": {"content": piece}}]}
+        for piece in _pieces(content, 8)
+    ]
+    if usage:
+        final = {"prompt_tokens": 9, "completion_tokens": 4}
+        events.append({"model": "test-model", "choices": [], "usage": final})
+    lines = [f"data: {json.dumps(event)}\n\n".encode() for event in events]
+    return lines + [b"data: [DONE]\n\n"]
+
+
+class StreamServer:
+    def __init__(self, bodies: list[str]):
+        self.bodies = bodies
+        self.requests: list[dict] = []
+        self.sent: list[int] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(json.loads(request.content))
+        events = _sse(self.bodies[len(self.requests) - 1])
+        index = len(self.sent)
+        self.sent.append(0)
+
+        async def body():
+            for event in events:
+                self.sent[index] += 1
+                yield event
+
+        return httpx.Response(200, content=body(), headers={"Content-Type": "text/event-stream"})
+
+
+def _client(server: StreamServer) -> AsyncLLMClient:
+    return AsyncLLMClient(
+        base_url="https://llm.test",
+        api_key="key",
+        timeout_s=5,
+        transport=httpx.MockTransport(server),
+    )
+
+
+def test_stream_chat_completion_aborts_the_stream_early():
+    server = StreamServer([json.dumps(_TOO_LONG)])
+    client = _client(server)
+
+    async def _run():
+        with pytest.raises(LLMStreamAborted) as exc:
+            await client.stream_chat_completion(
+                model="test-model",
+                messages=[{"role": "user", "content": "hi"}],
+                max_tokens=10,
+                check_factory=lambda: StreamingOutputValidator().feed,
+            )
+        await client.aclose()
+        return exc.value
+
+    aborted = asyncio.run(_run())
+    assert aborted.reason == "body_too_long"
+    assert server.requests[0]["stream"] is True
+    assert server.sent[0] < len(_sse(json.dumps(_TOO_LONG)))
+    assert aborted.usage["estimated"] is True
+    assert aborted.usage["completion_tokens"] == len(aborted.content) // 4
+
+
+def test_stream_chat_completion_retries_a_malformed_event():
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        if len(attempts) == 1:
+            events = [b'data: {"choices": [{"delta": {"content": "{"}}]}\n\n', b"data: {oops\n\n"]
+        else:
+            events = _sse(json.dumps(_VALID))
+
+        async def body():
+            for event in events:
+                yield event
+
+        return httpx.Response(200, content=body(), headers={"Content-Type": "text/event-stream"})
+
+    async def _sleep(delay: float) -> None:
+        return None
+
+    client = AsyncLLMClient(
+        base_url="https://llm.test",
+        api_key="key",
+        timeout_s=5,
+        transport=httpx.MockTransport(handler),
+        sleep=_sleep,
+    )
+
+    async def _run():
+        response = await client.stream_chat_completion(
+            model="test-model", messages=[{"role": "user", "content": "hi"}], max_tokens=10
+        )
+        await client.aclose()
+        return response
+
+    response = asyncio.run(_run())
+    assert len(attempts) == 2
+    assert json.loads(response.content) == _VALID
+
+
+def _input() -> LLMEmailInput:
+    return LLMEmailInput(
+        lead=LeadModel(id=1, company_id=1, contact_email="a@acme.example"),
+        company=CompanyModel(id=1, name="Acme Co", website_url="https://acme.example"),
+        contact=None,
+        snippets={"about": "We build tools."},
+        value_props=["automation"],
+        persona="CTO",
+        tone="concise",
+    )
+
+
+@pytest.mark.parametrize(
+    ("bodies", "subject", "error"),
+    [
+        ([json.dumps(_TOO_LONG), json.dumps(_VALID)], "One", None),
+        ([json.dumps(_TOO_LONG)] * 2, None, "stream_aborted:body_too_long"),
+    ],
+)
+def test_writer_retries_an_aborted_stream_then_falls_back(bodies, subject, error):
+    server = StreamServer(bodies)
+    client = _client(server)
+    ledger = TokenLedger(store=LocalTokenLedgerStore())
+    writer = LLMEmailWriter(async_client=client, budget=ledger, run_id="stream-run")
+    writer.cache = None
+    writer.stream = True
+    writer.stream_retries = 1
+
+    async def _run():
+        result = await writer.generate_async(_input())
+        summary = await ledger.summary(run_id="stream-run")
+        await client.aclose()
+        return result, summary
+
+    (output, _, _, _, found_error), summary = asyncio.run(_run())
+    assert len(server.requests) == 2
+    assert found_error == error
+    if subject is None:
+        assert output.rationale == "fallback_template"
+    else:
+        assert output.chosen_subject == subject
+    assert summary["completion_tokens"] > 0
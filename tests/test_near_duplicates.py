@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from amis_agent.application.services.near_duplicates import (
+    NearDuplicateIndex,
+    company_core,
+    domain_core,
+    pack_signatures,
+    unpack_signatures,
+)
+
+
+def test_company_core_strips_legal_suffixes_and_punctuation():
+    assert company_core("Acme Plumbing LLC") == "acmeplumbing"
+    assert company_core("ACME Plumbing, L.L.C.") == "acmeplumbing"
+    assert domain_core("https://www.acmeplumbing.com/contact") == "acmeplumbing"
+    assert domain_core("acme-plumbing.co.uk") == "acmeplumbing"
+
+
+def test_company_core_keeps_words_that_distinguish_names():
+    assert company_core("The Plumbing Company") == "theplumbingcompany"
+    assert company_core("Plumbing Co") != company_core("Plumbing")
+
+
+def test_near_duplicate_index_requires_matching_names_and_domains():
+    index = NearDuplicateIndex()
+    index.add(1, index.signatures_for("Acme Plumbing LLC", None))
+    index.add(2, index.signatures_for("Zeta Roofing", "https://zetaroof.com"))
+
+    by_name = index.query(index.signatures_for("ACME Plumbing, L.L.C.", None))
+    same_domain = index.query(index.signatures_for("Zeta Roofing Inc", "https://zetaroof.net"))
+    other_domain = index.query(index.signatures_for("Zeta Roofing", "https://zetaroofs.com"))
+    domain_only = index.signatures_for(None, "https://www.acmeplumbing.com")
+    unrelated = index.query(index.signatures_for("Bright Smile Dental", "brightsmile.test"))
+
+    assert [(m.company_id, m.same_domain) for m in by_name] == [(1, None)]
+    assert [(m.company_id, m.same_domain) for m in same_domain] == [(2, True)]
+    assert other_domain == []
+    assert domain_only == [] and index.query(domain_only) == []
+    assert unrelated == []
+    assert index.query(index.signatures_of(1), before_id=1) == []
+
+
+def test_signatures_round_trip_through_bytes():
+    index = NearDuplicateIndex()
+    signatures = index.signatures_for("Acme Plumbing", "https://acme.test")
+    raw = pack_signatures(signatures)
+    assert unpack_signatures(raw, index.hasher.num_perm) == signatures
+    assert NearDuplicateIndex().signatures_for("Acme Plumbing", None) == signatures[:1]
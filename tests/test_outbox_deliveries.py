@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from amis_agent.infrastructure.db.base import Base
+from amis_agent.infrastructure.db.models import CompanyModel, ContactModel, LeadModel, OutboxModel
+from amis_agent.infrastructure.db.outbox_repository import claim_approved, fetch_delivery
+
+
+async def _init_db() -> tuple[AsyncEngine, async_sessionmaker[AsyncSession]]:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def _count_queries(engine: AsyncEngine) -> list[str]:
+    statements: list[str] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    return statements
+
+
+async def _seed(session: AsyncSession, count: int) -> None:
+    for i in range(count):
+        company = CompanyModel(name=f"Co {i}", region="US")
+        session.add(company)
+        await session.flush()
+        contact = None
+        if i % 2:
+            contact = ContactModel(company_id=company.id, email=f"hi@co{i}.test", confidence=80)
+            session.add(contact)
+            await session.flush()
+        lead = LeadModel(
+            company_id=company.id,
+            region="US",
+            contact_email=f"hi@co{i}.test",
+            contact_id=contact.id if contact else None,
+        )
+        session.add(lead)
+        await session.flush()
+        session.add(
+            OutboxModel(
+                lead_id=lead.id,
+                to_email=lead.contact_email,
+                subject="Hi",
+                body_text="Body",
+                status="approved",
+                approved_by_human=True,
+            )
+        )
+    await session.commit()
+
+
+def test_claim_approved_query_count_does_not_grow_with_the_batch():
+    async def _claim(count: int):
+        engine, session_factory = await _init_db()
+        async with session_factory() as session:
+            await _seed(session, count)
+            statements = _count_queries(engine)
+            deliveries = await claim_approved(session, worker_id="w1", limit=count)
+            # Touch everything the sender reads; nothing may lazy-load.
+            seen = [
+                (
+                    d.draft.to_email,
+                    d.lead.status,
+                    d.company.name,
+                    d.contact.email if d.contact else None,
+                )
+                for d in deliveries
+            ]
+        await engine.dispose()
+        return len(statements), deliveries, seen
+
+    small_queries, small, _ = asyncio.run(_claim(3))
+    large_queries, large, seen = asyncio.run(_claim(30))
+    assert len(small) == 3 and len(large) == 30
+    assert small_queries == large_queries
+    assert all(d.company.id == d.lead.company_id for d in large)
+    assert sum(1 for _, _, _, email in seen if email) == 15
+
+
+def test_fetch_delivery_is_one_query_and_reports_missing_lead():
+    async def _run():
+        engine, session_factory = await _init_db()
+        async with session_factory() as session:
+            await _seed(session, 2)
+            orphan = OutboxModel(lead_id=999, subject="Hi", body_text="Body", status="approved")
+            session.add(orphan)
+            await session.commit()
+
+            statements = _count_queries(engine)
+            found = await fetch_delivery(session, 2)
+            queries = len(statements)
+            missing_lead = await fetch_delivery(session, orphan.id)
+            missing = await fetch_delivery(session, 12345)
+        await engine.dispose()
+        return queries, found, missing_lead, missing
+
+    queries, found, missing_lead, missing = asyncio.run(_run())
+    assert queries == 1
+    assert found.draft.id == 2 and found.lead.id == found.draft.lead_id
+    assert found.company is not None and found.contact is not None
+    assert missing_lead.lead is None and missing_lead.company is None
+    assert missing is None
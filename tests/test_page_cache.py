@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from amis_agent.infrastructure.scraping.http_client import HttpResponse
+from amis_agent.infrastructure.scraping.page_cache import PageCache
+
+
+class ConditionalServer:
+    def __init__(self, body: str, etag: str):
+        self.body = body
+        self.etag = etag
+        self.requests: list[dict | None] = []
+
+    def __call__(self, url: str, *, timeout_s: int, headers: dict | None = None) -> HttpResponse:
+        self.requests.append(headers)
+        if headers and headers.get("If-None-Match") == self.etag:
+            return HttpResponse(url=url, status_code=304, text="")
+        return HttpResponse(url=url, status_code=200, text=self.body, etag=self.etag)
+
+
+def test_page_cache_serves_fresh_hits_without_network(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), max_bytes=10_000, ttl_s=3600)
+    server = ConditionalServer("<html>hello</html>", '"v1"')
+
+    first = cache.fetch("https://example.com", timeout_s=1, fetcher=server)
+    second = cache.fetch("https://example.com", timeout_s=1, fetcher=server)
+
+    assert first.text == second.text == "<html>hello</html>"
+    assert len(server.requests) == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.hits == 1
+
+
+def test_page_cache_revalidates_stale_entries(tmp_path):
+    path = str(tmp_path / "pages.sqlite3")
+    server = ConditionalServer("<html>hello</html>", '"v1"')
+    PageCache(path, max_bytes=10_000, ttl_s=0).fetch("https://example.com", timeout_s=1, fetcher=server)
+
+    cache = PageCache(path, max_bytes=10_000, ttl_s=0)
+    resp = cache.fetch("https://example.com", timeout_s=1, fetcher=server)
+
+    assert resp.status_code == 200
+    assert resp.text == "<html>hello</html>"
+    assert server.requests[-1] == {"If-None-Match": '"v1"'}
+    assert cache.stats.revalidated == 1
+
+
+def test_page_cache_evicts_least_recently_used(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), max_bytes=25, ttl_s=3600)
+    cache.put("https://a.test", "a" * 10, etag=None, last_modified=None)
+    cache.put("https://b.test", "b" * 10, etag=None, last_modified=None)
+    cache.get("https://a.test")
+    cache.put("https://c.test", "c" * 10, etag=None, last_modified=None)
+
+    assert cache.get("https://b.test") is None
+    assert cache.get("https://a.test") is not None
+    assert cache.total_bytes() <= 25
+    assert cache.stats.evicted == 1
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from amis_agent.application.services.qualification import qualify_company, should_dedupe
+from amis_agent.application.services.qualification import lead_dedupe_key, qualify_company
 
 
 def test_qualification_requires_name():
@@ -59,6 +59,7 @@ def test_qualification_allows_valid_company():
     assert decision.score > 0
 
 
-def test_dedupe_by_name_and_domain():
-    existing = {("acme co", "example.com")}
-    assert should_dedupe("Acme Co", "example.com", existing) is True
+def test_lead_dedupe_key_normalizes_name_and_domain():
+    assert lead_dedupe_key("  Acme   Co ", "Example.COM") == "acme co|example.com"
+    assert lead_dedupe_key("Acme Co", None) is None
+    assert lead_dedupe_key("", "example.com") is None
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from amis_agent.application.services.lead_scoring import ScoringRules
+from amis_agent.application.services.near_duplicates import NearDuplicateIndex
+from amis_agent.infrastructure.db.base import Base
+from amis_agent.infrastructure.db.models import (
+    CompanyModel,
+    CompanyQualificationModel,
+    CompanySignatureModel,
+    LeadModel,
+)
+from amis_agent.infrastructure.db.signature_repository import sync_near_duplicate_index
+from amis_agent.workers.qualification import qualify_backlog
+
+
+async def _init_db() -> async_sessionmaker[AsyncSession]:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def test_qualify_backlog_walks_all_chunks_with_bulk_writes():
+    async def _run():
+        session_factory = await _init_db()
+        async with session_factory() as session:
+            for i in range(23):
+                session.add(
+                    CompanyModel(
+                        name=f"Co {i}",
+                        region="US",
+                        source="seed_static",
+                        website_status="has_website" if i % 3 else "no_website",
+                        website_url=f"https://co{i}.test" if i % 3 else None,
+                    )
+                )
+            # Same normalized name and domain as "Co 1": qualifies but must not get a second lead.
+            session.add(
+                CompanyModel(
+                    name="  co 1 ",
+                    region="UK",
+                    source="seed_static",
+                    website_status="has_website",
+                    website_url="https://CO1.test/about",
+                )
+            )
+            await session.commit()
+
+        stats = await qualify_backlog(
+            session_factory,
+            rules=ScoringRules(allowed_sources=frozenset({"seed_static"})),
+            chunk_size=10,
+        )
+        rerun = await qualify_backlog(
+            session_factory,
+            rules=ScoringRules(allowed_sources=frozenset({"seed_static"})),
+            chunk_size=10,
+        )
+        async with session_factory() as session:
+            decisions = (await session.execute(select(CompanyQualificationModel))).scalars().all()
+            leads = (await session.execute(select(LeadModel))).scalars().all()
+            co1 = (
+                await session.execute(select(CompanyModel).where(CompanyModel.name == "Co 1"))
+            ).scalar_one()
+        return stats, rerun, decisions, leads, co1
+
+    stats, rerun, decisions, leads, co1 = asyncio.run(_run())
+
+    assert stats.chunks == 3
+    assert stats.total == 24
+    assert stats.created == 15
+    assert rerun.total == 0
+    assert len(decisions) == 24
+    assert sum(1 for d in decisions if d.decision == "qualified") == 16
+    assert len(leads) == 15
+    assert co1.website_domain == "co1.test"
+
+
+def test_qualify_backlog_skips_companies_whose_dedupe_key_has_a_lead():
+    async def _run():
+        session_factory = await _init_db()
+        async with session_factory() as session:
+            old = CompanyModel(name="Acme", website_url="https://acme.test", website_domain="acme.test")
+            session.add(old)
+            await session.flush()
+            session.add(CompanyQualificationModel(company_id=old.id, decision="qualified", score=90))
+            session.add(LeadModel(company_id=old.id, status="new", dedupe_key="acme|acme.test"))
+            session.add(
+                CompanyModel(
+                    name="ACME",
+                    region="US",
+                    source="seed_static",
+                    website_status="has_website",
+                    website_url="https://acme.test",
+                )
+            )
+            await session.commit()
+
+        stats = await qualify_backlog(
+            session_factory, rules=ScoringRules(allowed_sources=frozenset({"seed_static"})), chunk_size=10
+        )
+        async with session_factory() as session:
+            leads = (await session.execute(select(LeadModel))).scalars().all()
+        return stats, leads
+
+    stats, leads = asyncio.run(_run())
+
+    assert stats.total == 1
+    assert stats.created == 0
+    assert [lead.dedupe_key for lead in leads] == ["acme|acme.test"]
+
+
+def test_qualify_backlog_skips_near_duplicates_of_companies_with_leads():
+    async def _run():
+        session_factory = await _init_db()
+        async with session_factory() as session:
+            for name, url, status in [
+                ("Acme Plumbing LLC", "https://acmeplumbing.com", "has_website"),
+                ("ACME Plumbing, L.L.C.", "https://acme-plumbing.net", "has_website"),
+                ("Zeta Roofing", None, "no_website"),
+                ("Zeta Roofing Inc", "https://zetaroofing.com", "has_website"),
+            ]:
+                session.add(
+                    CompanyModel(
+                        name=name, region="US", source="seed_static", website_status=status, website_url=url
+                    )
+                )
+            await session.commit()
+
+        index = NearDuplicateIndex()
+        stats = await qualify_backlog(
+            session_factory,
+            rules=ScoringRules(allowed_sources=frozenset({"seed_static"})),
+            chunk_size=2,
+            near_duplicates=index,
+        )
+        async with session_factory() as session:
+            lead_companies = (await session.execute(select(LeadModel.company_id))).scalars().all()
+            stored = (await session.execute(select(CompanySignatureModel.company_id))).scalars().all()
+        return stats, sorted(lead_companies), sorted(stored), len(index)
+
+    stats, lead_companies, stored, indexed = asyncio.run(_run())
+
+    assert stats.near_duplicates == 1
+    assert lead_companies == [1, 4]
+    assert stored == [1, 2, 3, 4]
+    assert indexed == 4
+
+
+def test_qualify_backlog_keeps_same_named_companies_with_other_domains_or_regions():
+    async def _run():
+        session_factory = await _init_db()
+        async with session_factory() as session:
+            # Companies without a domain can only be told apart by their region.
+            for name, url, region in [
+                ("Acme Plumbing", "https://acmeplumbing.com", "US"),
+                ("Acme Plumbing", "https://acmeplumbingtx.com", "US-TX"),
+                ("Zeta Roofing", None, "US"),
+                ("Zeta Roofing", None, "CA"),
+                ("Zeta Roofing Inc", None, "US"),
+            ]:
+                session.add(
+                    CompanyModel(
+                        name=name,
+                        region=region,
+                        source="seed_static",
+                        website_status="has_website",
+                        website_url=url,
+                    )
+                )
+            await session.commit()
+
+        index = NearDuplicateIndex()
+        stats = await qualify_backlog(
+            session_factory,
+            rules=ScoringRules(allowed_sources=frozenset({"seed_static"})),
+            chunk_size=10,
+            near_duplicates=index,
+        )
+        async with session_factory() as session:
+            lead_companies = (await session.execute(select(LeadModel.company_id))).scalars().all()
+        resynced = await sync_near_duplicate_index(session_factory, index)
+        return stats, sorted(lead_companies), resynced
+
+    stats, lead_companies, resynced = asyncio.run(_run())
+
+    assert stats.near_duplicates == 1
+    assert lead_companies == [1, 2, 3, 4]
+    assert resynced == 0
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+from amis_agent.infrastructure.scraping import robots as robots_module
+from amis_agent.infrastructure.scraping.rate_limit import LocalTokenBucketStore, RateLimiter
+from amis_agent.infrastructure.scraping.robots import RobotsCache
+
+
+class DictStore:
+    def __init__(self):
+        self.entries: dict[str, dict] = {}
+        self.ttls: dict[str, int] = {}
+
+    def get(self, host: str) -> dict | None:
+        return self.entries.get(host)
+
+    def set(self, host: str, entry: dict, ttl_s: int) -> None:
+        self.entries[host] = entry
+        self.ttls[host] = ttl_s
+
+
+def test_robots_cache_shares_entries_across_instances(monkeypatch):
+    calls: list[str] = []
+
+    def fake_download(robots_url: str) -> dict:
+        calls.append(robots_url)
+        body = "User-agent: *\nDisallow: /private\nCrawl-delay: 4"
+        return {"status": "ok", "code": 200, "body": body}
+
+    monkeypatch.setattr(robots_module, "_download", fake_download)
+    store = DictStore()
+    limiter = RateLimiter(LocalTokenBucketStore(), rate_per_s=1)
+
+    first = RobotsCache(cache={}, store=store, rate_limiter=limiter)
+    parser = first.get("https://example.com/page", "TestAgent")
+    second = RobotsCache(cache={}, store=store)
+    second.get("https://example.com/other", "TestAgent")
+
+    assert calls == ["https://example.com/robots.txt"]
+    assert parser.can_fetch("TestAgent", "https://example.com/public") is True
+    assert parser.can_fetch("TestAgent", "https://example.com/private") is False
+    assert limiter.rate_for("example.com") == 0.25
+
+
+def test_robots_cache_negative_entries_use_shorter_ttls(monkeypatch):
+    responses = {
+        "https://missing.test/robots.txt": {"status": "missing", "code": 404, "body": ""},
+        "https://down.test/robots.txt": {"status": "error", "code": None, "body": ""},
+    }
+    monkeypatch.setattr(robots_module, "_download", lambda url: responses[url])
+    store = DictStore()
+    cache = RobotsCache(cache={}, store=store)
+
+    missing = cache.get("https://missing.test/", "TestAgent")
+    down = cache.get("https://down.test/", "TestAgent")
+
+    assert missing.can_fetch("TestAgent", "https://missing.test/x") is True
+    assert down.can_fetch("TestAgent", "https://down.test/x") is False
+    assert store.ttls["down.test"] < store.ttls["missing.test"]
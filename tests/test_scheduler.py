@@ -1,9 +1,22 @@
 from __future__ import annotations
 
+import os
 from datetime import datetime, timedelta, timezone
 
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
 from amis_agent.application.services.jobs import DEFAULT_JOBS
 from amis_agent.application.services.scheduler import CronJob, is_due, run_scheduler
+from amis_agent.core.config import get_settings
+from amis_agent.workers.scheduler import cron_jobs
 
 
 class InMemoryStore:
@@ -63,3 +76,17 @@ def test_run_scheduler_enqueues_when_due(monkeypatch):
     assert result == 1
     assert enqueued == ["discover"]
 
+
+
+def test_cron_jobs_schedule_draft_batch_only_in_batch_mode(monkeypatch):
+    monkeypatch.setenv("LLM_DRAFT_MODE", "online")
+    get_settings.cache_clear()
+    online = {job.name: job for job in cron_jobs()}
+    monkeypatch.setenv("LLM_DRAFT_MODE", "batch")
+    get_settings.cache_clear()
+    batch = {job.name: job for job in cron_jobs()}
+    get_settings.cache_clear()
+
+    assert "draft_batch" not in online
+    assert batch["draft_batch"].job is DEFAULT_JOBS["draft_batch"]
+    assert batch["draft_batch"].job.func_path == "amis_agent.workers.draft_batch.run"
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+import redis
+
+from amis_agent.infrastructure.scraping.rate_limit import LocalTokenBucketStore, RateLimiter
+
+
+class DownStore:
+    def reserve(self, host: str, *, rate_per_s: float, burst: int) -> float:
+        raise redis.ConnectionError("down")
+
+    async def areserve(self, host: str, *, rate_per_s: float, burst: int) -> float:
+        raise redis.ConnectionError("down")
+
+
+def test_token_bucket_allows_burst_then_spaces_requests():
+    store = LocalTokenBucketStore()
+    waits = [store.reserve("example.com", rate_per_s=2, burst=2) for _ in range(4)]
+    assert waits[0] == 0 and waits[1] == 0
+    assert 0.4 < waits[2] <= 0.5
+    assert 0.9 < waits[3] <= 1.0
+
+
+def test_acquire_does_not_block_other_hosts():
+    limiter = RateLimiter(LocalTokenBucketStore(), rate_per_s=2, burst=1)
+
+    async def _run() -> dict[str, float]:
+        start = time.perf_counter()
+        done: dict[str, float] = {}
+
+        async def hit(host: str, label: str) -> None:
+            await limiter.acquire(host)
+            done[label] = time.perf_counter() - start
+
+        await asyncio.gather(hit("slow.test", "a1"), hit("slow.test", "a2"), hit("fast.test", "b1"))
+        return done
+
+    done = asyncio.run(_run())
+    assert done["b1"] < 0.1
+    assert done["a2"] >= 0.45
+
+
+def test_rate_limiter_falls_back_to_local_bucket_when_redis_is_down():
+    limiter = RateLimiter(DownStore(), rate_per_s=100, burst=1)
+    limiter.wait("example.com")
+    assert limiter.reserve("example.com") > 0
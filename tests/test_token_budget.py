@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import datetime, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+import pytest
+import redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from amis_agent.application.services.llm_email_writer import (
+    LLMEmailInput,
+    LLMEmailWriter,
+    write_outbox_drafts,
+)
+from amis_agent.infrastructure.db.base import Base
+from amis_agent.infrastructure.db.models import CompanyModel, LeadModel
+from amis_agent.infrastructure.llm.client import LLMResponse
+from amis_agent.infrastructure.llm import token_budget
+from amis_agent.infrastructure.llm.token_budget import (
+    LocalTokenLedgerStore,
+    TokenBudgetExceeded,
+    TokenLedger,
+)
+
+
+def _ledger(**kwargs) -> TokenLedger:
+    return TokenLedger(
+        store=LocalTokenLedgerStore(),
+        now=lambda: datetime(2026, 1, 21, 12, tzinfo=timezone.utc),
+        **kwargs,
+    )
+
+
+def test_token_ledger_tracks_day_run_model_and_persona():
+    ledger = _ledger(prompt_cost_per_1k=0.5, completion_cost_per_1k=2.0)
+
+    async def _run():
+        usage = {"prompt_tokens": 1000, "completion_tokens": 250}
+        await ledger.record(usage, model="m1", persona="CTO", run_id="r1")
+        await ledger.record(usage, model="m1", persona="Founder", run_id="r2")
+        await ledger.record({"total_tokens": 40}, model="m2", persona=None, run_id="r2")
+        return await ledger.summary(), await ledger.summary(run_id="r2")
+
+    day, run = asyncio.run(_run())
+    assert day["day"] == "2026-01-21"
+    assert (day["prompt_tokens"], day["completion_tokens"]) == (2040, 500)
+    assert day["cost_usd"] == pytest.approx(2.02)
+    assert day["by_model"] == {
+        "m1": {"prompt": 2000, "completion": 500},
+        "m2": {"prompt": 40, "completion": 0},
+    }
+    assert day["by_persona"]["CTO"] == {"prompt": 1000, "completion": 250}
+    assert day["by_persona"]["unknown"] == {"prompt": 40, "completion": 0}
+    assert (run["run_id"], run["prompt_tokens"], run["completion_tokens"]) == ("r2", 1040, 250)
+
+
+def test_token_ledger_enforces_daily_and_run_budgets():
+    ledger = _ledger(daily_budget=100, run_budget=60)
+
+    async def _run():
+        assert await ledger.check("r1", action="fallback") is None
+        usage = {"prompt_tokens": 50, "completion_tokens": 10}
+        await ledger.record(usage, model="m", persona="CTO", run_id="r1")
+        run_reason = await ledger.check("r1", action="fallback")
+        other_run = await ledger.check("r2", action="fallback")
+        await ledger.record({"prompt_tokens": 40}, model="m", persona="CTO", run_id="r2")
+        with pytest.raises(TokenBudgetExceeded) as exc:
+            await ledger.check("r3", action="defer")
+        return run_reason, other_run, exc.value.reason, await ledger.summary()
+
+    run_reason, other_run, day_reason, summary = asyncio.run(_run())
+    assert run_reason == "run_token_budget_exhausted"
+    assert other_run is None
+    assert day_reason == "daily_token_budget_exhausted"
+    assert (summary["budget"], summary["remaining"]) == (100, 0)
+
+
+class TokenSpendingClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def create_chat_completion(self, *, model, messages, max_tokens, temperature=0.4):
+        self.calls += 1
+        content = (
+            '{"subject_variants": ["One", "Two", "Three"], "chosen_subject": "One", '
+            '"body_text": "Hello there.", "followup_text": "Following up.", '
+            '"personalization_fact": "Has a website", '
+            '"personalization_source_url": "https://acme.example", "confidence": 0.8}'
+        )
+        usage = {"prompt_tokens": 80, "completion_tokens": 40}
+        return LLMResponse(content=content, model=model, usage=usage, latency_ms=5)
+
+
+async def _lead_inputs(count: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        company = CompanyModel(name="Acme Co", website_url="https://acme.example")
+        session.add(company)
+        await session.flush()
+        leads = [
+            LeadModel(company_id=company.id, contact_email=f"{i}@acme.example")
+            for i in range(count)
+        ]
+        session.add_all(leads)
+        await session.commit()
+    inputs = [
+        LLMEmailInput(
+            lead=lead,
+            company=company,
+            contact=None,
+            snippets={"about": None},
+            value_props=["automation"],
+            persona="CTO",
+            tone="concise",
+        )
+        for lead in leads
+    ]
+    return engine, session_factory, inputs
+
+
+class SyncTokenSpendingClient:
+    def __init__(self):
+        self.calls = 0
+
+    def create_chat_completion(self, *, model, messages, max_tokens, temperature=0.4):
+        self.calls += 1
+        return asyncio.run(
+            TokenSpendingClient().create_chat_completion(
+                model=model, messages=messages, max_tokens=max_tokens
+            )
+        )
+
+
+def test_sync_generate_is_charged_to_the_run_budget():
+    client = SyncTokenSpendingClient()
+    ledger = _ledger(run_budget=100)
+    writer = LLMEmailWriter(client=client, budget=ledger, budget_action="fallback")
+    writer.cache = None
+    engine, _, inputs = asyncio.run(_lead_inputs(1))
+    asyncio.run(engine.dispose())
+
+    first = writer.generate(inputs[0])
+    second = writer.generate(inputs[0])
+    run = asyncio.run(ledger.store.read(ledger._run_key(writer.run_id)))
+
+    assert client.calls == 1
+    assert first[4] is None
+    assert second[4] == "run_token_budget_exhausted"
+    assert (run["prompt"], run["completion"], run["reserved"]) == (80, 40, 0)
+    writer.budget_action = "defer"
+    with pytest.raises(TokenBudgetExceeded):
+        writer.generate(inputs[0])
+    assert client.calls == 1
+
+
+@pytest.mark.parametrize("action", ["fallback", "defer"])
+def test_writer_stops_calling_the_llm_once_the_run_budget_is_spent(action):
+    async def _run():
+        engine, session_factory, inputs = await _lead_inputs(3)
+        client = TokenSpendingClient()
+        writer = LLMEmailWriter(
+            async_client=client,
+            budget=_ledger(run_budget=100),
+            budget_action=action,
+        )
+        # Every lead has the same prompt, so the response cache would hide the budget.
+        writer.cache = None
+        first = await write_outbox_drafts(session_factory, inputs[:1], writer=writer)
+        rest = await write_outbox_drafts(session_factory, inputs[1:], writer=writer)
+        await engine.dispose()
+        return client, first + rest
+
+    client, drafts = asyncio.run(_run())
+    assert client.calls == 1
+    assert drafts[0].llm_rationale != "fallback_template"
+    if action == "defer":
+        assert drafts[1:] == [None, None]
+    else:
+        assert [d.llm_rationale for d in drafts[1:]] == ["fallback_template"] * 2
+
+
+def test_concurrent_calls_reserve_the_budget_before_they_start():
+    class SlowClient(TokenSpendingClient):
+        async def create_chat_completion(self, **kwargs):
+            await asyncio.sleep(0.01)
+            return await super().create_chat_completion(**kwargs)
+
+    async def _run():
+        engine, session_factory, inputs = await _lead_inputs(5)
+        client = SlowClient()
+        ledger = _ledger(run_budget=100)
+        writer = LLMEmailWriter(async_client=client, budget=ledger, budget_action="fallback")
+        writer.cache = None
+        # The whole chunk is in flight at once; only the first call fits the budget.
+        drafts = await write_outbox_drafts(session_factory, inputs, writer=writer)
+        await engine.dispose()
+        return client, drafts, await ledger.store.read(ledger._run_key(writer.run_id))
+
+    client, drafts, run = asyncio.run(_run())
+    assert client.calls == 1
+    assert [d.llm_rationale for d in drafts].count("fallback_template") == 4
+    assert (run["prompt"], run["completion"], run["reserved"]) == (80, 40, 0)
+
+
+def test_token_ledger_reservations_overshoot_by_at_most_one_call():
+    ledger = _ledger(run_budget=100)
+
+    async def _run():
+        granted = await asyncio.gather(
+            *(ledger.reserve("r1", 60, action="fallback") for _ in range(5))
+        )
+        held = await ledger.store.read(ledger._run_key("r1"))
+        for reason in granted:
+            if reason is None:
+                await ledger.release("r1", 60)
+        return granted, held, await ledger.store.read(ledger._run_key("r1"))
+
+    granted, held, released = asyncio.run(_run())
+    assert granted.count(None) == 2
+    assert set(granted) - {None} == {"run_token_budget_exhausted"}
+    assert held["reserved"] == 120
+    assert released["reserved"] == 0
+
+
+def test_token_ledger_retries_redis_after_the_cooldown(monkeypatch):
+    class FlakyStore(LocalTokenLedgerStore):
+        def __init__(self):
+            super().__init__()
+            self.down = True
+
+        async def add(self, key, fields, ttl_s):
+            if self.down:
+                raise redis.ConnectionError("down")
+            return await super().add(key, fields, ttl_s)
+
+    clock = [100.0]
+    monkeypatch.setattr(token_budget.time, "monotonic", lambda: clock[0])
+    store = FlakyStore()
+    ledger = TokenLedger(store=store, retry_after_s=30)
+    usage = {"prompt_tokens": 10}
+
+    async def _run():
+        await ledger.record(usage, model="m", persona="CTO", run_id="r1")
+        store.down = False
+        await ledger.record(usage, model="m", persona="CTO", run_id="r1")
+        during = dict(store._hashes)
+        clock[0] += 31
+        await ledger.record(usage, model="m", persona="CTO", run_id="r1")
+        return during, await store.read(ledger._run_key("r1"))
+
+    during, run = asyncio.run(_run())
+    assert during == {}
+    assert run["prompt"] == 10
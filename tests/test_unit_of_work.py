@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+import pytest
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import defer
+
+from amis_agent.infrastructure.db.audit_repository import log_audit
+from amis_agent.infrastructure.db.base import Base
+from amis_agent.infrastructure.db.contact_repository import upsert_contact
+from amis_agent.infrastructure.db.lead_repository import create_lead, update_lead
+from amis_agent.infrastructure.db.models import CompanyModel, LeadModel
+from amis_agent.infrastructure.db.unit_of_work import unit_of_work
+
+
+async def _init_db(expire_on_commit: bool = False) -> async_sessionmaker[AsyncSession]:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=expire_on_commit)
+
+
+def _count_commits(session: AsyncSession) -> list[int]:
+    commits = [0]
+
+    @event.listens_for(session.sync_session, "after_commit")
+    def _after_commit(_session):
+        commits[0] += 1
+
+    return commits
+
+
+async def _enrich_like(session: AsyncSession, company_id: int, i: int) -> LeadModel:
+    contact = await upsert_contact(
+        session, company_id=company_id, email=f"hi{i}@acme.test", source_url=None, confidence=50
+    )
+    lead = await create_lead(
+        session,
+        company_id=company_id,
+        region="US",
+        contact_email=contact.email,
+        contact_status="found",
+        status="new",
+        contact_id=contact.id,
+    )
+    await update_lead(session, lead, status="enriched")
+    await log_audit(session, action="enriched", details={"lead_id": lead.id})
+    return lead
+
+
+def test_unit_of_work_commits_at_chunk_boundaries():
+    async def _run():
+        session_factory = await _init_db()
+        async with session_factory() as session:
+            company = CompanyModel(name="Acme", region="US")
+            session.add(company)
+            await session.commit()
+            commits = _count_commits(session)
+
+            leads = []
+            async with unit_of_work(session, commit_every=5) as uow:
+                for i in range(12):
+                    leads.append(await _enrich_like(session, company.id, i))
+                    await uow.checkpoint()
+            batched = commits[0]
+
+            await _enrich_like(session, company.id, 99)
+            per_call = commits[0] - batched
+
+        async with session_factory() as session:
+            stored = (
+                await session.execute(
+                    select(func.count()).select_from(LeadModel).where(LeadModel.status == "enriched")
+                )
+            ).scalar_one()
+        return leads, batched, per_call, stored
+
+    leads, batched, per_call, stored = asyncio.run(_run())
+    # 12 leads in chunks of 5: two checkpoints plus the final commit on exit.
+    assert batched == 3
+    assert per_call == 4
+    assert stored == 13
+    assert all(lead.id and lead.contact_id for lead in leads)
+    assert all(lead.created_at is not None and lead.verification_status is None for lead in leads)
+
+
+def test_unit_of_work_rolls_back_the_open_chunk_on_error():
+    async def _run():
+        session_factory = await _init_db()
+        async with session_factory() as session:
+            company = CompanyModel(name="Acme", region="US")
+            session.add(company)
+            await session.commit()
+            with pytest.raises(RuntimeError):
+                async with unit_of_work(session, commit_every=2) as uow:
+                    for i in range(3):
+                        await _enrich_like(session, company.id, i)
+                        await uow.checkpoint()
+                    raise RuntimeError("boom")
+        async with session_factory() as session:
+            return (await session.execute(select(func.count()).select_from(LeadModel))).scalar_one()
+
+    assert asyncio.run(_run()) == 2
+
+
+def test_repositories_still_reload_expired_rows_outside_a_unit_of_work():
+    async def _run():
+        session_factory = await _init_db(expire_on_commit=True)
+        async with session_factory() as session:
+            company = CompanyModel(name="Acme", region="US")
+            session.add(company)
+            await session.flush()
+            company_id = company.id
+            await session.commit()
+            contact = await upsert_contact(
+                session, company_id=company_id, email="hi@acme.test", source_url=None, confidence=50
+            )
+            seen = [contact.id, contact.email]
+            lead = await create_lead(
+                session,
+                company_id=company_id,
+                region="US",
+                contact_email="hi@acme.test",
+                contact_status="found",
+                status="new",
+            )
+            seen += [lead.id, lead.created_at]
+            lead = await update_lead(session, lead, status="enriched")
+            seen += [lead.status, lead.contact_email]
+            return seen
+
+    contact_id, email, lead_id, created_at, status, lead_email = asyncio.run(_run())
+    assert contact_id and email == "hi@acme.test"
+    assert lead_id and created_at is not None
+    assert status == "enriched" and lead_email == "hi@acme.test"
+
+
+def test_saving_a_partially_loaded_row_leaves_its_deferred_columns_alone():
+    async def _run():
+        session_factory = await _init_db()
+        async with session_factory() as session:
+            company = CompanyModel(name="Acme", region="US")
+            session.add(company)
+            await session.flush()
+            session.add(LeadModel(company_id=company.id, contact_email="hi@acme.test"))
+            await session.commit()
+        async with session_factory() as session:
+            lead = (
+                await session.execute(select(LeadModel).options(defer(LeadModel.contact_email)))
+            ).scalar_one()
+            async with unit_of_work(session):
+                await update_lead(session, lead, status="enriched")
+            unloaded = "contact_email" in inspect(lead).unloaded
+            await session.refresh(lead, attribute_names=["contact_email"])
+            return unloaded, lead.status, lead.contact_email
+
+    unloaded, status, email = asyncio.run(_run())
+    assert unloaded
+    assert (status, email) == ("enriched", "hi@acme.test")
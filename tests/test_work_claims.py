@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("EMAIL_FROM", "test@example.com")
+os.environ.setdefault("EMAIL_DISPLAY_NAME", "Test User")
+os.environ.setdefault("COMPANY_NAME", "TestCo")
+os.environ.setdefault("FOOTER_ADDRESS", "N/A")
+os.environ.setdefault("GMAIL_SENDER", "test@example.com")
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", "/tmp/creds.json")
+os.environ.setdefault("GOOGLE_TOKEN_FILE", "/tmp/token.json")
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from amis_agent.infrastructure.db.base import Base
+from amis_agent.infrastructure.db.claims import release_claims
+from amis_agent.infrastructure.db.lead_repository import claim_leads_for_enrichment
+from amis_agent.infrastructure.db.models import CompanyModel, LeadModel, OutboxModel, OutreachModel
+from amis_agent.infrastructure.db.outbox_repository import claim_approved
+from amis_agent.infrastructure.db.outreach_repository import claim_queued_outreach
+
+
+async def _init_db(url: str = "sqlite+aiosqlite:///:memory:") -> async_sessionmaker[AsyncSession]:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _seed_leads(session_factory, count: int) -> None:
+    async with session_factory() as session:
+        company = CompanyModel(name="Acme", region="US")
+        session.add(company)
+        await session.flush()
+        for i in range(count):
+            session.add(
+                LeadModel(
+                    company_id=company.id,
+                    region="US",
+                    contact_email=f"hi{i}@acme.test",
+                    status="new" if i % 5 else "enriched",
+                    contact_status="pending",
+                )
+            )
+        await session.commit()
+
+
+def test_workers_claim_disjoint_leads_until_the_backlog_is_empty(tmp_path):
+    async def _run():
+        # A file database gives each worker its own connection, like separate processes.
+        session_factory = await _init_db(f"sqlite+aiosqlite:///{tmp_path / 'claims.db'}")
+        await _seed_leads(session_factory, 25)
+
+        async def _worker(name: str) -> list[int]:
+            claimed: list[int] = []
+            async with session_factory() as session:
+                while leads := await claim_leads_for_enrichment(
+                    session, worker_id=name, limit=3, lease_s=60
+                ):
+                    claimed.extend(c.lead.id for c in leads)
+                    await asyncio.sleep(0)
+            return claimed
+
+        first, second = await asyncio.gather(_worker("w1"), _worker("w2"))
+        async with session_factory() as session:
+            eligible = set(
+                (await session.execute(select(LeadModel.id).where(LeadModel.status == "new")))
+                .scalars()
+                .all()
+            )
+            owners = dict(
+                (await session.execute(select(LeadModel.id, LeadModel.claimed_by))).all()
+            )
+        return first, second, eligible, owners
+
+    first, second, eligible, owners = asyncio.run(_run())
+    assert first and second
+    assert not set(first) & set(second)
+    assert set(first) | set(second) == eligible
+    assert all(owners[lead_id] == "w1" for lead_id in first)
+
+
+def test_expired_and_released_leases_become_claimable_again():
+    async def _run():
+        session_factory = await _init_db()
+        await _seed_leads(session_factory, 4)
+        async with session_factory() as session:
+            held = await claim_leads_for_enrichment(session, worker_id="w1", limit=2, lease_s=60)
+            rest = await claim_leads_for_enrichment(session, worker_id="w2", limit=10, lease_s=60)
+            none_left = await claim_leads_for_enrichment(session, worker_id="w3", limit=10, lease_s=60)
+
+            await session.execute(
+                update(LeadModel)
+                .where(LeadModel.id == held[0].lead.id)
+                .values(lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+            )
+            await session.commit()
+            expired = await claim_leads_for_enrichment(session, worker_id="w3", limit=10, lease_s=60)
+
+            # Releasing only touches rows the caller still owns.
+            await release_claims(session, LeadModel, [c.lead.id for c in rest + expired], worker_id="w2")
+            released = await claim_leads_for_enrichment(session, worker_id="w4", limit=10, lease_s=60)
+        return held, rest, none_left, expired, released
+
+    held, rest, none_left, expired, released = asyncio.run(_run())
+    assert len(held) == 2 and len(rest) == 1
+    assert none_left == []
+    assert [c.lead.id for c in expired] == [held[0].lead.id]
+    assert [c.lead.id for c in released] == [c.lead.id for c in rest]
+    assert all(c.company.website_url is None and c.company.region == "US" for c in released)
+
+
+def test_claim_approved_and_queued_outreach_only_take_eligible_rows():
+    async def _run():
+        session_factory = await _init_db()
+        await _seed_leads(session_factory, 2)
+        async with session_factory() as session:
+            lead_id = (await session.execute(select(LeadModel.id).limit(1))).scalar_one()
+            for status, approved in [("approved", True), ("approved", False), ("draft", True)]:
+                session.add(
+                    OutboxModel(
+                        lead_id=lead_id,
+                        to_email="hi@acme.test",
+                        subject="Hi",
+                        body_text="Body",
+                        status=status,
+                        approved_by_human=approved,
+                    )
+                )
+            for status in ["queued", "sent"]:
+                session.add(OutreachModel(lead_id=lead_id, subject="Hi", body="Body", status=status))
+            await session.commit()
+
+            drafts = await claim_approved(session, worker_id="w1")
+            again = await claim_approved(session, worker_id="w2")
+            items = await claim_queued_outreach(session, worker_id="w1")
+            items_again = await claim_queued_outreach(session, worker_id="w2")
+        return drafts, again, items, items_again
+
+    drafts, again, items, items_again = asyncio.run(_run())
+    assert [(d.draft.status, d.draft.approved_by_human, d.draft.claimed_by) for d in drafts] == [
+        ("approved", True, "w1")
+    ]
+    assert again == []
+    assert len(items) == 1 and items[0].to_email == "hi0@acme.test"
+    assert items_again == []
+
+
+def test_outreach_worker_failing_mid_batch_frees_its_claims(monkeypatch):
+    import pytest
+    from sqlalchemy.exc import IntegrityError
+
+    from amis_agent.workers import outreach as outreach_worker
+
+    async def failing_apply_results(session, results):
+        # A NOT NULL violation fails the flush and leaves the session needing a rollback.
+        session.add(OutreachModel(lead_id=None, subject="x", body="x"))
+        await session.flush()
+
+    monkeypatch.setattr(outreach_worker, "process_outreach_items", lambda items, **kw: [])
+    monkeypatch.setattr(outreach_worker, "apply_results", failing_apply_results)
+
+    async def _run():
+        session_factory = await _init_db()
+        await _seed_leads(session_factory, 2)
+        async with session_factory() as session:
+            for lead_id in (1, 2):
+                session.add(OutreachModel(lead_id=lead_id, subject="Hi", body="Hello"))
+            await session.commit()
+        with pytest.raises(IntegrityError):
+            await outreach_worker.run_async(session_factory=session_factory, sender=object())
+        async with session_factory() as session:
+            rows = (await session.execute(select(OutreachModel))).scalars().all()
+            return [(row.status, row.claimed_by, row.lease_expires_at) for row in rows]
+
+    assert asyncio.run(_run()) == [("queued", None, None)] * 2